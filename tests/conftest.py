@@ -77,6 +77,12 @@ def pytest_runtest_setup(item):
 
     increment_cache_key_prefix()
 
+    # parsed log artifacts are cached on disk
+    from django.core.cache import caches
+    caches['log_artifacts'].clear()
+    # and the reference data ids in memory
+    caches['refdata'].clear()
+
     # this should provide isolation between tests.
     call_command("init_master_db", interactive=False, skip_fixtures=True)
 
@@ -47,3 +47,33 @@ def test_bz_api_process(mock_extract, refdata):
     # test that a second ingestion of the same bugs doesn't insert new rows
     process.run()
     assert len(row_data) == 15
+
+
+def test_bz_api_delta_sync(mock_extract, refdata, monkeypatch):
+    """Test only the bugs changed since the last sync are fetched again."""
+    process = BzApiBugProcess()
+    process.run(full_sync=True)
+
+    urls = []
+    extract = BzApiBugProcess.extract
+
+    def extract_changed(obj, url):
+        urls.append(url)
+        bug_list = extract(obj, url)
+        bug_list['bugs'] = bug_list['bugs'][:1]
+        return bug_list
+
+    monkeypatch.setattr(BzApiBugProcess, 'extract', extract_changed)
+    process.run(full_sync=False)
+
+    row_data = refdata.dhub.execute(
+        proc='refdata_test.selects.test_bugscache',
+        return_type='tuple'
+    )
+
+    refdata.disconnect()
+
+    assert len(urls) == 1
+    assert 'last_change_time=' in urls[0]
+    # the bugs which weren't fetched again are not deleted
+    assert len(row_data) == 15
@@ -165,6 +165,67 @@ def test_ingest_builds4h_jobs(jm, initial_data,
     assert len(stored_obj) == 20
 
 
+def test_ingest_builds4h_jobs_once(jm, initial_data,
+                                   mock_buildapi_builds4h_url,
+                                   mock_get_resultset,
+                                   mock_get_remote_content):
+    """
+    the builds already ingested are skipped by the next runs
+    """
+    from treeherder.etl.buildapi import (Builds4hJobsProcess,
+                                         get_processed_builds)
+    etl_process = Builds4hJobsProcess()
+    loaded = []
+    etl_process.load = lambda th_collections, chunk_size: loaded.append(
+        sum(len(collection.data) for collection in th_collections.values()))
+
+    etl_process.run()
+    processed_builds = get_processed_builds()
+    assert processed_builds
+    assert loaded[0] > 0
+
+    etl_process.run()
+    assert len(loaded) == 1
+    assert get_processed_builds() == processed_builds
+
+    # the filtered runs go through all the builds
+    etl_process.run(filter_to_project=jm.project)
+    assert loaded[1] == loaded[0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_json_array_items(chunk_size):
+    """
+    the items of a json array are the same when read as a stream
+    """
+    import gzip
+    from StringIO import StringIO
+    from treeherder.etl.mixins import iter_gunzipped, iter_json_array_items
+
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                        "sample_data", "buildbot_text.json")
+    with open(path) as f:
+        content = f.read()
+    expected = json.loads(content)['builds']
+
+    # the other members of the object are skipped
+    content = '{"before": {"builds": [1], "text": "] \\\\\\" }"}, ' + \
+        '"name": "{[", ' + content.strip()[1:-1] + ', "after": 12345}'
+
+    chunks = [content[i:i + chunk_size]
+              for i in range(0, len(content), chunk_size)]
+    assert list(iter_json_array_items(chunks, 'builds')) == expected
+
+    compressed = StringIO()
+    with gzip.GzipFile(fileobj=compressed, mode='wb') as gz:
+        gz.write(content)
+    compressed = compressed.getvalue()
+    chunks = [compressed[i:i + chunk_size]
+              for i in range(0, len(compressed), chunk_size)]
+    assert list(iter_json_array_items(iter_gunzipped(chunks),
+                                      'builds')) == expected
+
+
 def test_ingest_running_to_complete_job(jm, initial_data,
                                         mock_buildapi_running_url,
                                         mock_buildapi_builds4h_url,
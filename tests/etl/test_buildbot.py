@@ -2,6 +2,11 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import glob
+import json
+import os
+from collections import OrderedDict
+
 from treeherder.etl import buildbot
 import pytest
 
@@ -1518,3 +1523,72 @@ def test_buildername_translation(buildername, exp_result):
     assert buildbot.extract_job_type(buildername, default="not found") == exp_result["job_type"]
     assert buildbot.extract_build_type(buildername) == exp_result["build_type"]
     assert buildbot.extract_name_info(buildername) == exp_result["name"]
+
+
+def get_fixture_buildernames():
+    """Return all the buildernames of the test fixtures"""
+    names = set(buildername for buildername, exp_result in buildernames)
+
+    def add_buildernames(data):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key == 'buildername':
+                    names.add(value)
+                else:
+                    add_buildernames(value)
+        elif isinstance(data, list):
+            for value in data:
+                add_buildernames(value)
+
+    sample_data = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                               "sample_data")
+    for path in glob.glob(os.path.join(sample_data, "*.json")):
+        with open(path) as f:
+            add_buildernames(json.load(f))
+    return sorted(names)
+
+
+def first_match(entries, buildername, get_regex=lambda entry: entry['regex']):
+    for entry in entries:
+        if get_regex(entry).search(buildername):
+            return entry
+    return None
+
+
+def test_classify_buildername_parity(monkeypatch):
+    """
+    the memoized classification is the same as scanning the regex tables
+    """
+    monkeypatch.setattr(buildbot, 'buildername_classifications', OrderedDict())
+    monkeypatch.setattr(buildbot, 'BUILDERNAME_CACHE_SIZE', 10)
+
+    fixture_buildernames = get_fixture_buildernames()
+    assert len(fixture_buildernames) > 10
+
+    # the second time, the oldest classifications were dropped
+    for buildername in fixture_buildernames * 2:
+        platform = first_match(buildbot.PLATFORMS_BUILDERNAME, buildername)
+        build_type = first_match(buildbot.BUILD_TYPE_BUILDERNAME, buildername)
+        job_type = first_match(
+            [(job_type, regex) for job_type in buildbot.JOB_TYPE_BUILDERNAME
+             for regex in buildbot.JOB_TYPE_BUILDERNAME[job_type]],
+            buildername, lambda entry: entry[1])
+        test_name = first_match(buildbot.JOB_NAME_BUILDERNAME, buildername)
+
+        for i in range(2):
+            platform_info = buildbot.extract_platform_info(buildername)
+            assert platform_info['vm'] == bool(
+                first_match(buildbot.VM_STATUS, buildername, lambda entry: entry))
+            assert platform_info['os'] == (
+                platform['attributes']['os'] if platform else 'unknown')
+            assert platform_info['os_platform'] == (
+                platform['attributes']['os_platform'] if platform
+                else buildername[:24])
+            assert buildbot.extract_build_type(buildername) == (
+                build_type['type'] if build_type else 'opt')
+            assert buildbot.extract_job_type(buildername, default=None) == (
+                job_type[0] if job_type else None)
+            assert buildbot.extract_name_info(buildername)['name'] == (
+                test_name['name'] if test_name else 'unknown')
+
+    assert len(buildbot.buildername_classifications) == 10
@@ -2,17 +2,26 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import copy
 import json
 
+import pytest
+from jsonschema import ValidationError
+
 from tests.sampledata import SampleData
-from treeherder.etl.perf_data_adapters import TalosDataAdapter
+from treeherder.etl.perf_data_adapters import (PerformanceDataAdapter,
+                                               TalosDataAdapter,
+                                               TREEHERDER_PERF_TEST_SCHEMA,
+                                               get_validator,
+                                               validate_required)
 
 
-def test_adapt_and_load():
+@pytest.mark.parametrize("trusted", [False, True])
+def test_adapt_and_load(trusted):
 
     talos_perf_data = SampleData.get_talos_perf_data()
 
-    tda = TalosDataAdapter()
+    tda = TalosDataAdapter(trusted=trusted)
 
     result_count = 0
     for datum in talos_perf_data:
@@ -51,3 +60,42 @@ def test_adapt_and_load():
         tda.adapt_and_load(reference_data, job_data, datum)
 
     assert result_count == len(tda.performance_artifact_placeholders)
+
+
+def test_batch_calculations_match():
+    for datum in SampleData.get_talos_perf_data():
+        results = datum['results']
+
+        expected_results = copy.deepcopy(results)
+        expected_series = dict(
+            (test, PerformanceDataAdapter._calculate_test_data(
+                1, 1, 1402692388, replicates))
+            for test, replicates in expected_results.items())
+        expected_summary = PerformanceDataAdapter._calculate_summary_data(
+            1, 1, 1402692388, expected_results)
+
+        series = PerformanceDataAdapter._calculate_test_data_batch(
+            1, 1, 1402692388, results)
+        summary = PerformanceDataAdapter._calculate_summary_data_batch(
+            1, 1, 1402692388, results)
+
+        assert results == expected_results
+        assert series == expected_series
+        assert summary == expected_summary
+
+
+@pytest.mark.parametrize("obj", [
+    {"job_guid": "abc", "name": "test", "type": "performance"},
+    {"job_guid": 1, "name": "test", "type": "performance",
+     "blob": {"date": 1, "series_signature": "abc", "testsuite": "ts"}},
+    {"job_guid": "abc", "name": "test", "type": "performance",
+     "blob": {"date": "1", "series_signature": "abc", "testsuite": "ts"}},
+    {"job_guid": "abc", "name": "test", "type": "performance",
+     "blob": {"date": 1, "testsuite": "ts"}},
+])
+def test_validate_required(obj):
+    """The trusted validation rejects what the full validation rejects"""
+    with pytest.raises(ValidationError):
+        get_validator(TREEHERDER_PERF_TEST_SCHEMA).validate(obj)
+    with pytest.raises(ValidationError):
+        validate_required(obj, TREEHERDER_PERF_TEST_SCHEMA)
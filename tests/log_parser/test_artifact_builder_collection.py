@@ -2,7 +2,14 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
-from treeherder.log_parser.artifactbuildercollection import ArtifactBuilderCollection
+import gzip
+
+import billiard
+import pytest
+from django.conf import settings
+
+from treeherder.log_parser.artifactbuildercollection import (ArtifactBuilderCollection,
+                                                             iter_gzip_lines)
 from treeherder.log_parser.artifactbuilders import BuildbotLogViewArtifactBuilder
 from ..sampledata import SampleData
 from datadiff import diff
@@ -83,3 +90,55 @@ def test_all_builders_complete():
     del(act["text_log_summary"]["logurl"])
 
     assert exp == lpc.artifacts, diff(exp, lpc.artifacts)
+
+
+@pytest.mark.parametrize("read_size", [1, 100, 4096, 1024 * 1024])
+def test_iter_gzip_lines(read_size):
+    """test the streamed lines match reading the whole gzip file"""
+    log_path = SampleData().get_log_path(
+        "mozilla-central_fedora-b2g_test-crashtest-1-bm54-tests1-linux-build50.txt.gz")
+    with gzip.open(log_path) as f:
+        exp = list(f)
+
+    with open(log_path, 'rb') as f:
+        act = list(iter_gzip_lines(f, read_size=read_size))
+
+    assert exp == act
+
+
+@pytest.mark.parametrize("log", [
+    "mozilla-central_mountainlion-debug_test-mochitest-2-bm80-tests1-macosx-build93",
+    "mozilla-inbound_ubuntu64_vm-debug_test-mochitest-other-bm53-tests1-linux-build122",
+])
+def test_parallel_parse(monkeypatch, log):
+    """test parsing the log in chunks gives the same artifacts as serially"""
+    url = "file://{0}".format(
+        SampleData().get_log_path("{0}.txt.gz".format(log)))
+    monkeypatch.setattr(settings, 'PARSER_CHUNK_LINES', 100)
+
+    serial = ArtifactBuilderCollection(url, processes=1)
+    serial.parse()
+
+    parallel = ArtifactBuilderCollection(url, processes=2)
+    assert parallel.parallel
+    parallel.parse()
+
+    assert serial.artifacts == parallel.artifacts, diff(serial.artifacts,
+                                                        parallel.artifacts)
+
+
+def test_parallel_parse_in_daemon(monkeypatch):
+    """test daemonic processes, like the celery workers, parse in parallel"""
+    url = "file://{0}".format(SampleData().get_log_path(
+        "mozilla-central_mountainlion-debug_test-mochitest-2-bm80-tests1-macosx-build93.txt.gz"))
+    monkeypatch.setattr(settings, 'PARSER_CHUNK_LINES', 100)
+    monkeypatch.setattr(billiard.current_process(), 'daemon', True)
+
+    serial = ArtifactBuilderCollection(url, processes=1)
+    serial.parse()
+
+    parallel = ArtifactBuilderCollection(url, processes=2)
+    assert parallel.parallel
+    parallel.parse()
+
+    assert serial.artifacts == parallel.artifacts
@@ -0,0 +1,69 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import glob
+import gzip
+import re
+
+import pytest
+
+from treeherder.log_parser.parsers import (ErrorParser,
+                                           IN_SEARCH_TERMS,
+                                           RE_ERR_PREFILTER,
+                                           literal_trie_pattern)
+from ..sampledata import SampleData
+
+
+def test_literal_trie_pattern():
+    """test the trie pattern matches exactly the given literals"""
+    pattern = re.compile(literal_trie_pattern(("make", "mozmake", "abort:", "abc")))
+
+    assert pattern.search("gmake[1]: ***")
+    assert pattern.search("12:00:00 abort: foo")
+    assert pattern.search("abc")
+    assert not pattern.search("ab")
+    assert not pattern.search("mak abort")
+
+
+@pytest.mark.parametrize("term", IN_SEARCH_TERMS)
+def test_prefilter_search_terms(term):
+    """test every search term gets past the prefilter"""
+    assert RE_ERR_PREFILTER.search("foo {0} bar".format(term))
+
+
+def test_prefilter_sample_logs():
+    """test the prefilter never rejects an error line of the sample logs"""
+    error_parser = ErrorParser()
+    num_errors = 0
+    for log_path in glob.glob(SampleData().get_log_path("*.txt.gz")):
+        with gzip.open(log_path) as f:
+            for line in f:
+                if error_parser.is_error_line(line):
+                    num_errors += 1
+                    assert RE_ERR_PREFILTER.search(line), line
+
+    assert num_errors > 0
+
+
+@pytest.mark.parametrize("line", [
+    "12:00:00     INFO -  TEST-PASS | foo | make sure it works",
+    "12:00:00     INFO -  Nothing to see here",
+])
+def test_not_error_line(line):
+    """test non error lines aren't reported"""
+    error_parser = ErrorParser()
+    error_parser.parse_line(line, 1)
+    assert error_parser.get_artifact() == []
+
+
+@pytest.mark.parametrize("line", [
+    "12:00:00    ERROR - Return code: 1",
+    "12:00:00     INFO -  gmake[1]: *** [libs] Error 2",
+    "PROCESS-CRASH | foo | application crashed [@ bar]",
+])
+def test_error_line(line):
+    """test error lines are reported with their line number"""
+    error_parser = ErrorParser()
+    error_parser.parse_line(line, 5)
+    assert error_parser.get_artifact() == [{"linenumber": 5, "line": line}]
@@ -1,7 +1,8 @@
 import json
 import pytest
 
-from treeherder.model.derived import ArtifactsModel, JobsModel
+from treeherder.model.derived import (ArtifactsModel, JobsModel,
+                                      ObjectNotFoundException)
 
 
 xfail = pytest.mark.xfail
@@ -93,3 +94,27 @@ def test_load_artifact_second_time_fails(
 
     assert set(artifact_names) == {'Bug suggestions'}
     assert bs_blob == act_bs_obj
+
+
+def test_load_artifact_unknown_job(
+        test_project, eleven_jobs_processed,
+        mock_post_collection, mock_error_summary,
+        sample_data):
+    """
+    test loading an artifact of a job which doesn't exist fails
+
+    """
+
+    bs_artifact = {
+        'type': 'json',
+        'name': 'Bug suggestions',
+        'blob': json.dumps(["flim", "flam"]),
+        'job_guid': 'unknown'
+    }
+
+    with ArtifactsModel(test_project) as artifacts_model:
+        with pytest.raises(ObjectNotFoundException):
+            artifacts_model.load_job_artifacts(
+                [bs_artifact],
+                {bs_artifact['job_guid']: {'id': 1000000}}
+            )
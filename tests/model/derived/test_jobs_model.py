@@ -7,10 +7,12 @@ import json
 import pytest
 import copy
 
+from django.conf import settings
 from django.core.management import call_command
 
 from treeherder.model.derived.base import DatasetNotFoundError
 from treeherder.model.derived import ArtifactsModel
+from treeherder.model.derived.jobs import JobCountsLockError
 from tests.sample_data_generator import job_data, result_set
 from tests import test_utils
 
@@ -207,6 +209,57 @@ def test_ingest_retry_sample_job_no_running(jm, refdata, sample_data, initial_da
     assert jl[0]['result'] == 'retry'
 
 
+def test_calculate_eta(jm, refdata, sample_data, initial_data,
+                       sample_resultset, mock_log_parser):
+    """
+    The ETAs of the completed jobs are stored without reading the jobs back,
+    unless their stats were lost
+    """
+    # the first stats are computed from the jobs, there are none yet
+    jm.calculate_eta()
+
+    job_data = sample_data.job_data[:20]
+    test_utils.do_job_ingestion(jm, refdata, job_data, sample_resultset, False)
+
+    running_times = {}
+    for job in jm.jobs_execute(proc="jobs_test.selects.jobs"):
+        if (job['state'] == 'completed' and job['start_timestamp'] > 0 and
+                job['end_timestamp'] >= job['start_timestamp'] and
+                job['start_timestamp'] >= job['submit_timestamp']):
+            running_times.setdefault(job['signature'], []).append(
+                job['end_timestamp'] - job['start_timestamp'])
+
+    jm.calculate_eta()
+    etas = jm.jobs_execute(proc="jobs_test.selects.job_eta")
+
+    # nothing changed since the previous run
+    jm.calculate_eta()
+    etas_after = jm.jobs_execute(proc="jobs_test.selects.job_eta")
+
+    # the stats lost from the cache are computed again from the jobs, the
+    # sample jobs being older than the default sample window
+    from django.core.cache import cache
+    from treeherder.model.eta import get_eta_position_cache_key
+    cache.delete(get_eta_position_cache_key(jm.project))
+    jm.calculate_eta(sample_window_seconds=int(time.time()))
+    etas_recomputed = jm.jobs_execute(proc="jobs_test.selects.job_eta")
+
+    jm.disconnect()
+
+    assert running_times
+    running_etas = dict((eta['signature'], eta) for eta in etas
+                        if eta['state'] == 'running')
+    assert set(running_etas) == set(running_times)
+    for signature, samples in running_times.items():
+        eta = running_etas[signature]
+        assert eta['sample_count'] == len(samples)
+        assert eta['avg_sec'] == int(round(float(sum(samples)) / len(samples)))
+        assert eta['min_sec'] == min(samples)
+        assert eta['max_sec'] == max(samples)
+    assert len(etas_after) == len(etas)
+    assert len(etas_recomputed) == 2 * len(etas)
+
+
 def test_cycle_all_data(jm, refdata, sample_data, initial_data,
                         sample_resultset, mock_log_parser):
     """
@@ -263,6 +316,10 @@ def test_cycle_one_job(jm, refdata, sample_data, initial_data,
         placeholders=[cycle_date_ts]
     )
 
+    # the jobs tables are partitioned by submit timestamp, so the jobs of
+    # the old result set must have been submitted before the others
+    set_jobs_submit_timestamp(jm, time_now, cycle_date_ts, 1)
+
     jobs_to_be_deleted = jm.jobs_execute(
         proc="jobs_test.selects.get_result_set_jobs",
         placeholders=[1]
@@ -286,6 +343,75 @@ def test_cycle_one_job(jm, refdata, sample_data, initial_data,
     assert len(jobs_after) == len(jobs_before) - len(jobs_to_be_deleted)
 
 
+def test_cycle_jobs_partitions(jm, refdata, sample_data, initial_data,
+                               sample_resultset, mock_log_parser):
+    """
+    Test cycling the jobs tables by dropping their old partitions
+    """
+    job_data = sample_data.job_data[:20]
+    test_utils.do_job_ingestion(jm, refdata, job_data, sample_resultset, False)
+
+    time_now = int(time.time())
+    cycle_date_ts = time_now - 7 * 24 * 3600
+
+    jm.jobs_execute(
+        proc="jobs_test.updates.set_result_sets_push_timestamp",
+        placeholders=[time_now]
+    )
+    jm.jobs_execute(
+        proc="jobs_test.updates.set_one_result_set_push_timestamp",
+        placeholders=[cycle_date_ts]
+    )
+    set_jobs_submit_timestamp(jm, time_now, cycle_date_ts, 1)
+
+    old_job_ids = set(j['id'] for j in jm.jobs_execute(
+        proc="jobs_test.selects.get_result_set_jobs",
+        placeholders=[1]
+    ))
+    assert old_job_ids
+
+    # a new jobs database only has the catch-all partitions
+    assert [p['name'] for p in jm.get_partitions(jm.CT_JOBS, 'job')] == ['pmax']
+
+    assert jm.cycle_jobs_partitions(time_now - 24 * 3600, 100, 0) == 1
+
+    job_ids = set(j['id'] for j in jm.jobs_execute(
+        proc="jobs_test.selects.jobs"))
+    log_job_ids = set(l['job_id'] for l in jm.get_job_log_url_list(
+        list(old_job_ids)))
+    for table, _ in jm.JOBS_PARTITIONED_TABLES:
+        partitions = jm.get_partitions(jm.CT_JOBS, table)
+        assert len(partitions) > settings.JOBS_PARTITIONS_AHEAD
+        assert int(partitions[0]['less_than']) > time_now - 24 * 3600
+
+    jm.disconnect()
+
+    assert job_ids
+    assert not job_ids & old_job_ids
+    assert not log_job_ids
+
+
+def set_jobs_submit_timestamp(jm, submit_timestamp, result_set_submit_timestamp,
+                              result_set_id):
+    """
+    Set the submit timestamp of the jobs, and of the jobs of
+    ``result_set_id`` to ``result_set_submit_timestamp``
+    """
+    jm.jobs_execute(
+        proc="jobs_test.updates.set_jobs_submit_timestamp",
+        placeholders=[submit_timestamp]
+    )
+    jm.jobs_execute(
+        proc="jobs_test.updates.set_result_set_jobs_submit_timestamp",
+        placeholders=[result_set_submit_timestamp, result_set_id]
+    )
+    for table in ('job_artifact', 'job_log_url'):
+        jm.jobs_execute(
+            proc="jobs_test.updates.copy_job_submit_timestamp",
+            replace=[table]
+        )
+
+
 def test_cycle_all_data_in_chunks(jm, refdata, sample_data, initial_data,
                                   sample_resultset, mock_log_parser):
     """
@@ -396,6 +522,29 @@ def test_store_result_set_data(jm, initial_data, sample_resultset):
     assert data['revision_ids'] == revision_ids
 
 
+def test_store_result_set_data_twice(jm, initial_data, sample_resultset):
+    """A revision hash is stored as a single result set"""
+    jm.store_result_set_data(sample_resultset)
+
+    # the partitioned result_set can't keep the revision hashes unique
+    # when the push timestamps differ
+    pushed_again = copy.deepcopy(sample_resultset)
+    for pushed in pushed_again:
+        pushed['push_timestamp'] += 3600
+    data = jm.store_result_set_data(pushed_again)
+
+    result_sets = jm.get_dhub(jm.CT_JOBS).execute(
+        proc="jobs_test.selects.result_set_ids"
+    )
+
+    jm.disconnect()
+
+    assert len(result_sets) == len(set(
+        pushed['revision_hash'] for pushed in sample_resultset))
+    assert data['result_set_ids'] == dict(
+        (stored['revision_hash'], stored) for stored in result_sets)
+
+
 def test_get_job_data(jm, test_project, refdata, sample_data, initial_data,
                       mock_log_parser, sample_resultset):
 
@@ -447,6 +596,146 @@ def test_store_performance_artifact(
     assert performance_artifact_signatures == series_signatures
 
 
+def test_perf_signature_index(
+        jm, test_project, refdata, sample_data, sample_resultset, initial_data,
+        mock_log_parser, monkeypatch):
+    """The signature index finds the same signatures as the database"""
+    from django.conf import settings
+
+    tp_data = test_utils.ingest_talos_performance_data(
+        jm, refdata, sample_data, sample_resultset
+    )
+    perf_data = tp_data['perf_data']
+    for index, d in enumerate(perf_data):
+        perf_data[index]['blob'] = json.dumps({'talos_data': [d['blob']]})
+    with ArtifactsModel(test_project) as artifacts_model:
+        artifacts_model.store_performance_artifact(tp_data['job_ids'],
+                                                   perf_data)
+
+    signatures = jm.get_jobs_dhub().execute(
+        proc="jobs.selects.get_all_series_signatures",
+        return_type='set',
+        key_column='signature')
+    signature = sorted(signatures)[0]
+
+    # load the index, then add a signature it gets from the journal
+    jm.get_signature_properties([signature])
+    jm.set_series_signature('c' * 40, {'suite': 'new suite', 'test': 't'})
+
+    monkeypatch.setattr(settings, 'PERF_SIGNATURE_INDEX_ENABLED', False)
+    exp_properties = jm.get_signature_properties([signature])
+    suite = exp_properties[0]['suite']
+    exp_signatures = jm.get_signatures_from_properties({'suite': suite})
+    exp_new_signatures = jm.get_signatures_from_properties(
+        {'suite': 'new suite', 'test': 't'})
+
+    monkeypatch.setattr(settings, 'PERF_SIGNATURE_INDEX_ENABLED', True)
+    properties = jm.get_signature_properties([signature])
+    suite_signatures = jm.get_signatures_from_properties({'suite': suite})
+    new_signatures = jm.get_signatures_from_properties(
+        {'suite': 'new suite', 'test': 't'})
+    no_signatures = jm.get_signatures_from_properties(
+        {'suite': suite, 'test': 'no such test'})
+
+    jm.disconnect()
+
+    assert properties == exp_properties
+    assert suite_signatures == exp_signatures
+    assert new_signatures == exp_new_signatures
+    assert new_signatures.keys() == ['c' * 40]
+    assert no_signatures == {"success": False}
+
+
+def test_performance_series_intervals(jm):
+    """The series of every interval are read from the same points"""
+    signature = 'b' * 40
+    now = int(time.time())
+    points = [
+        {'job_id': 1, 'result_set_id': 1, 'push_timestamp': now - 3 * 86400,
+         'total_replicates': 5, 'min': 1.0, 'max': 3.0, 'mean': 2.0,
+         'std': 0.5, 'median': 2.0},
+        {'job_id': 2, 'result_set_id': 2, 'push_timestamp': now - 3600,
+         'total_replicates': 5, 'min': 2.0, 'max': 4.0, 'mean': 3.0,
+         'std': 0.5, 'median': 3.0},
+    ]
+    jm.store_performance_points({signature: points})
+    # a point of a job is only stored once
+    jm.store_performance_points({signature: points[1:]})
+
+    day_series = jm.get_performance_series_from_signatures([signature], 86400)
+    week_series = jm.get_performance_series_from_signatures([signature],
+                                                            7 * 86400)
+
+    jm.disconnect()
+
+    assert day_series == [{'series_signature': signature, 'blob': points[1:]}]
+    assert week_series == [{'series_signature': signature,
+                            'blob': [points[1], points[0]]}]
+
+
+def test_performance_series_summary_changes(jm):
+    """The cached series summaries are updated with the new signatures"""
+    now = int(time.time())
+    signatures = {'a' * 40: {'suite': 'a', 'test': 't'},
+                  'b' * 40: {'suite': 'b', 'test': 't'}}
+    for signature, properties in signatures.items():
+        jm.set_series_signature(signature, properties)
+
+    def get_points(job_id, push_timestamp):
+        return [{'job_id': job_id, 'result_set_id': job_id,
+                 'push_timestamp': push_timestamp, 'geomean': 1.0}]
+
+    jm.store_performance_points({'a' * 40: get_points(1, now - 3600)})
+    summary = jm.get_performance_series_summary(86400)
+    version = jm.get_performance_series_summary_changes(86400, '')['version']
+
+    jm.store_performance_points({'b' * 40: get_points(2, now - 60)})
+    changes = jm.get_performance_series_summary_changes(86400, version)
+    summary_after = jm.get_performance_series_summary(86400)
+    unknown_changes = jm.get_performance_series_summary_changes(86400,
+                                                                'unknown-1')
+
+    jm.disconnect()
+
+    assert summary == {'a' * 40: signatures['a' * 40]}
+    assert changes['version'] != version
+    assert not changes['full']
+    assert changes['signatures'] == {'b' * 40: signatures['b' * 40]}
+    assert changes['removed'] == []
+    assert summary_after == signatures
+    assert unknown_changes['full']
+    assert unknown_changes['signatures'] == signatures
+
+
+def test_performance_series_summary_locked(jm):
+    """A summary built without the lock isn't cached"""
+    from django.core.cache import cache
+
+    signature = 'a' * 40
+    jm.set_series_signature(signature, {'suite': 'a', 'test': 't'})
+    jm.store_performance_points({signature: [
+        {'job_id': 1, 'result_set_id': 1,
+         'push_timestamp': int(time.time()) - 3600, 'geomean': 1.0}]})
+
+    cache_key = jm.get_performance_series_cache_key(jm.project, 86400)
+    cache.delete(cache_key)
+    cache.add(cache_key + '-lock', True, 60)
+    try:
+        summary = jm.get_performance_series_summary(86400)
+        cached = cache.get(cache_key)
+    finally:
+        cache.delete(cache_key + '-lock')
+    summary_unlocked = jm.get_performance_series_summary(86400)
+    cached_unlocked = cache.get(cache_key)
+
+    jm.disconnect()
+
+    assert summary == summary_unlocked == {signature: {'suite': 'a',
+                                                       'test': 't'}}
+    assert cached is None
+    assert cached_unlocked is not None
+
+
 def test_remove_existing_jobs_single_existing(jm, sample_data, initial_data, refdata,
                                               mock_log_parser, sample_resultset):
     """Remove single existing job prior to loading"""
@@ -474,6 +763,40 @@ def test_remove_existing_jobs_one_existing_one_new(jm, sample_data, initial_data
     assert len(data) == 1
 
 
+def test_remove_existing_jobs_known_states(jm, sample_data, initial_data, refdata,
+                                           mock_log_parser, sample_resultset,
+                                           monkeypatch):
+    """Jobs found in the same state once are dropped without a query"""
+
+    job_data = sample_data.job_data[:1]
+    test_utils.do_job_ingestion(jm, refdata, job_data, sample_resultset)
+
+    assert len(jm._remove_existing_jobs(sample_data.job_data[:2])) == 1
+
+    queries = []
+    orig_jobs_execute = jm.jobs_execute
+
+    def jobs_execute_mock(**kwargs):
+        queries.append(kwargs['placeholders'])
+        return orig_jobs_execute(**kwargs)
+
+    monkeypatch.setattr(jm, "jobs_execute", jobs_execute_mock)
+
+    assert len(jm._remove_existing_jobs(job_data)) == 0
+    assert queries == []
+
+    # only the unknown job is looked up
+    assert len(jm._remove_existing_jobs(sample_data.job_data[:2])) == 1
+    assert len(queries) == 1
+    assert job_data[0]['job']['job_guid'] not in queries[0]
+
+    # a job in another state is looked up again
+    changed_job = copy.deepcopy(job_data[0])
+    changed_job['job']['state'] = 'running'
+    assert len(jm._remove_existing_jobs([changed_job])) == 1
+    assert len(queries) == 2
+
+
 def test_ingesting_skip_existing(jm, sample_data, initial_data, refdata,
                                  mock_log_parser, sample_resultset):
     """Remove single existing job prior to loading"""
@@ -551,3 +874,108 @@ def test_retry_on_operational_failure(jm, initial_data, monkeypatch):
         assert True
 
     assert retry_count['num'] == 20
+
+
+def test_exclusion_profile_hides_jobs(jm, eleven_jobs_stored):
+    """The jobs of the excluded signatures are left out of the job lists"""
+    from django.contrib.auth.models import User
+    from treeherder.model.models import ExclusionProfile
+
+    jobs = jm.get_job_list(0, 20)
+    hidden_signature = jobs[0]['signature']
+    result_set_id = jobs[0]['result_set_id']
+    num_hidden = len([job for job in jobs
+                      if job['signature'] == hidden_signature])
+
+    user = User.objects.create(username="MyName")
+    profile = ExclusionProfile.objects.create(name="hide", is_default=True,
+                                              author=user)
+    assert jm.get_job_list(0, 20, exclusion_profile="default") == jobs
+
+    profile.flat_exclusion = {jm.project: [hidden_signature],
+                              "other-project": [jobs[1]['signature']]}
+    profile.update_excluded_signatures()
+
+    for exclusion_profile in ("default", "hide"):
+        visible_jobs = jm.get_job_list(0, 20,
+                                       exclusion_profile=exclusion_profile)
+        assert len(visible_jobs) == len(jobs) - num_hidden
+        assert hidden_signature not in [job['signature'] for job in visible_jobs]
+
+    assert jm.get_job_list(0, 20, exclusion_profile="missing") == jobs
+
+    num_hidden_in_result_set = len([
+        job for job in jobs if job['signature'] == hidden_signature and
+        job['result_set_id'] == result_set_id])
+    total = sum(jm.get_resultset_status(result_set_id, None).values())
+    visible_total = sum(jm.get_resultset_status(result_set_id).values())
+    assert visible_total == total - num_hidden_in_result_set
+
+
+def test_resultset_job_counts(jm, eleven_jobs_stored):
+    """The stored job counts follow the jobs loaded and updated"""
+    jobs = jm.get_job_list(0, 20)
+    result_set_ids = set(job['result_set_id'] for job in jobs)
+    assert jm.get_counted_result_set_ids()
+    assert jm.get_resultset_job_count_diffs(result_set_ids) == []
+
+    job = jobs[0]
+    result_set_id = job['result_set_id']
+    num_jobs = len([j for j in jobs if j['result_set_id'] == result_set_id])
+    status = jm.get_resultset_status(result_set_id, None)
+    assert sum(status.values()) == num_jobs
+
+    # a job updated behind their back is reported, and fixed
+    jm.jobs_execute(proc='jobs_test.updates.set_state_any',
+                    placeholders=['pending', job['id']])
+    diffs = jm.get_resultset_job_count_diffs(result_set_ids)
+    assert [diff[:2] for diff in diffs] == [(result_set_id, 0)]
+    call_command('verify_resultset_job_counts', jm.project, fix=True)
+    assert jm.get_resultset_job_count_diffs(result_set_ids) == []
+    assert jm.get_resultset_status(result_set_id, None).get('pending') == \
+        status.get('pending', 0) + 1
+
+    # the changes of the jobs are added to the counts
+    jm.set_state(job['id'], 'running')
+    status_after = jm.get_resultset_status(result_set_id, None)
+    assert status_after.get('running') == status.get('running', 0) + 1
+    assert status_after.get('pending', 0) == status.get('pending', 0)
+    assert jm.get_resultset_job_count_diffs(result_set_ids) == []
+
+    # missing counts are computed when read, and stored again
+    jm.jobs_execute(proc='jobs.deletes.delete_result_set_job_counts',
+                    placeholders=[result_set_id], replace=['%s'])
+    assert sum(jm.get_resultset_status(result_set_id, None).values()) == num_jobs
+    assert result_set_id in jm.get_counted_result_set_ids()
+    assert jm.get_resultset_job_count_diffs(result_set_ids) == []
+
+    # and follow the jobs of the result set from then on
+    jm.set_state(job['id'], 'pending')
+    assert jm.get_resultset_status(result_set_id, None).get('pending', 0) == \
+        status.get('pending', 0) + 1
+    assert jm.get_resultset_job_count_diffs(result_set_ids) == []
+
+
+def test_resultset_job_counts_locked(jm, eleven_jobs_stored, monkeypatch):
+    """The jobs aren't changed if the job counts lock can't be acquired"""
+    job = jm.get_job_list(0, 1)[0]
+    result_set_id = job['result_set_id']
+    status = jm.get_resultset_status(result_set_id, None)
+
+    jobs_execute = jm.jobs_execute
+
+    def timed_out_lock(**kwargs):
+        if kwargs['proc'] == 'generic.locks.get_lock':
+            return [{'lock': 0}]
+        return jobs_execute(**kwargs)
+    monkeypatch.setattr(jm, 'jobs_execute', timed_out_lock)
+
+    with pytest.raises(JobCountsLockError):
+        jm.set_state(job['id'], 'running')
+    assert jm.get_job(job['id'])[0]['state'] == job['state']
+
+    # the missing counts are still computed when read, but not stored
+    jobs_execute(proc='jobs.deletes.delete_result_set_job_counts',
+                 placeholders=[result_set_id], replace=['%s'])
+    assert jm.get_resultset_status(result_set_id, None) == status
+    assert result_set_id not in jm.get_counted_result_set_ids()
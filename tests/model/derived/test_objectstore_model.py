@@ -3,8 +3,11 @@
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
 import json
+import time
 import pytest
 
+from django.conf import settings
+
 from .sample_data_generator import job_data
 from tests.sample_data_generator import result_set
 
@@ -70,6 +73,67 @@ def test_mark_object_complete(jm):
     assert row_data["processed_state"] == "complete"
 
 
+def test_cycle_objectstore_partitions(jm):
+    """Drops the expired partitions once all their blobs are loaded."""
+    # a new objectstore only has the catch-all partition
+    assert [p['name'] for p in jm.get_objectstore_partitions()] == ['pmax']
+
+    jm.store_job_data([job_data()])
+    now = int(time.time())
+
+    # nothing is old enough to be cycled, but the partitions for the next
+    # days are created
+    assert jm.cycle_objectstore_partitions(now - 24 * 3600) == 0
+    partitions = jm.get_objectstore_partitions()
+    assert len(partitions) > settings.OBJECTSTORE_PARTITIONS_AHEAD
+    assert partitions[-1]['name'] == 'pmax'
+
+    # the partition of the blob is expired, but the blob wasn't loaded yet
+    jm.cycle_objectstore_partitions(now + 2 * 24 * 3600)
+    assert len(jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.selects.all")) == 1
+
+    row_id = jm.claim_objects(1)[0]["id"]
+    jm.mark_objects_complete([["fakehash", row_id]])
+
+    jm.cycle_objectstore_partitions(now + 2 * 24 * 3600)
+    rows = jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.selects.all")
+    partition_bounds = [int(p['less_than'])
+                        for p in jm.get_objectstore_partitions()
+                        if p['less_than'] != 'MAXVALUE']
+
+    jm.disconnect()
+
+    assert rows == []
+    assert min(partition_bounds) > now + 2 * 24 * 3600
+
+
+def test_cycle_objectstore_partitions_unfinished(jm):
+    """Keeps the errored blobs until the grace period is over."""
+    jm.store_job_data([job_data()])
+    now = int(time.time())
+    jm.cycle_objectstore_partitions(now - 24 * 3600)
+
+    row_id = jm.claim_objects(1)[0]["id"]
+    jm.mark_object_error(row_id, "failed to load")
+
+    # the partition of the errored blob is expired, but it's kept
+    jm.cycle_objectstore_partitions(now + 2 * 24 * 3600)
+    assert len(jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.selects.all")) == 1
+
+    grace_period = int(
+        settings.OBJECTSTORE_PARTITION_GRACE_PERIOD.total_seconds())
+    jm.cycle_objectstore_partitions(now + 2 * 24 * 3600 + grace_period)
+    rows = jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.selects.all")
+
+    jm.disconnect()
+
+    assert rows == []
+
+
 def test_process_objects(jm, initial_data, mock_log_parser):
     """Claims and processes a chunk of unprocessed JSON jobs data blobs."""
     # Load some rows into the objectstore
@@ -110,6 +174,76 @@ def test_process_objects(jm, initial_data, mock_log_parser):
     assert len(date_set) == 2
 
 
+def test_objectstore_loader(jm, initial_data, mock_log_parser):
+    """The loader processes all the blobs in batches, one batch ahead."""
+    from treeherder.model.objectstore_loader import ObjectstoreLoader
+
+    rs = result_set()
+
+    blobs = [
+        job_data(submit_timestamp="1330454755",
+                 job_guid="guid1", revision_hash=rs['revision_hash']),
+        job_data(submit_timestamp="1330454756",
+                 job_guid="guid2", revision_hash=rs['revision_hash']),
+        job_data(submit_timestamp="1330454757",
+                 job_guid="guid3", revision_hash=rs['revision_hash']),
+    ]
+
+    jm.store_result_set_data([rs])
+
+    jm.store_job_data(blobs)
+
+    stats = ObjectstoreLoader(jm.project, batch_size=2).run()
+
+    test_run_rows = jm.get_dhub(jm.CT_JOBS).execute(
+        proc="jobs_test.selects.jobs")
+    complete_count = jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+    loading_count = jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.counts.loading")[0]["loading_count"]
+
+    jm.disconnect()
+
+    assert complete_count == 3
+    assert loading_count == 0
+    assert len(test_run_rows) == 3
+    assert stats['batches'] == 2
+    assert stats['objects'] == 3
+    assert stats['lag'] == 0
+
+
+def test_process_objects_decodes_blobs_once(jm, initial_data,
+                                            mock_log_parser, monkeypatch):
+    """Each JSON blob is decoded only once while being processed."""
+    from treeherder.model.derived.jobs import JobData
+
+    rs = result_set()
+    jm.store_result_set_data([rs])
+    jm.store_job_data([
+        job_data(job_guid="guid1", revision_hash=rs['revision_hash']),
+        job_data(job_guid="guid2", revision_hash=rs['revision_hash']),
+    ])
+
+    decoded = []
+    from_json = JobData.from_json
+
+    def counting_from_json(json_blob):
+        decoded.append(json_blob)
+        return from_json(json_blob)
+
+    monkeypatch.setattr(JobData, 'from_json', staticmethod(counting_from_json))
+
+    jm.process_objects(2, raise_errors=True)
+
+    complete_count = jm.get_dhub(jm.CT_OBJECTSTORE).execute(
+        proc="objectstore_test.counts.complete")[0]["complete_count"]
+
+    jm.disconnect()
+
+    assert complete_count == 2
+    assert len(decoded) == 2
+
+
 def test_process_objects_unknown_error(jm):
     """process_objects fail for invalid json"""
     response = jm.store_job_data(['{invalid json}'])
@@ -221,6 +221,23 @@ def test_refdata_manager(refdata, params):
     refdata.disconnect()
 
 
+@pytest.mark.parametrize(("params"), [
+    params for params in test_params
+    # job types without a group aren't cached
+    if params['func'] != 'get_or_create_job_types'])
+def test_refdata_manager_cached_ids(refdata, params):
+    """test get_or_create methods don't query the db for known values"""
+
+    getattr(refdata, params['func'])(params['input'])
+    refdata.reset_reference_data()
+
+    refdata.execute = Mock(side_effect=AssertionError("unexpected query"))
+    expected = getattr(refdata, params['func'])(params['input'])
+    assert expected == params['expected']
+
+    refdata.disconnect()
+
+
 # some tests don't fit into a standard layout
 def test_reference_data_signatures(refdata):
 
@@ -541,6 +558,91 @@ def test_get_recent_resolved_bugs(refdata, sample_bugs):
     assert all_others_bugs == exp_bugs
 
 
+def test_get_bug_suggestions_for_terms(refdata, sample_bugs):
+    """Test the batched suggestions match the suggestions of each term."""
+    bug_list = sample_bugs['bugs']
+    fifty_days_ago = datetime.now() - timedelta(days=50)
+    # Put half of the bugs in each of the suggestion groups.
+    for i, bug in enumerate(bug_list):
+        bug['last_change_time'] = fifty_days_ago - timedelta(days=50 * (i % 2))
+    refdata.update_bugscache(bug_list)
+
+    search_terms = [search_term for search_term, exp_bugs in BUG_SEARCHES]
+    suggestions = refdata.get_bug_suggestions_for_terms(search_terms)
+
+    assert sorted(suggestions.keys()) == sorted(search_terms)
+    for search_term in search_terms:
+        exp = refdata.get_bug_suggestions(search_term)
+        for group in ('open_recent', 'all_others'):
+            assert (sorted(b['id'] for b in suggestions[search_term][group]) ==
+                    sorted(b['id'] for b in exp[group]))
+
+
+@pytest.mark.parametrize(("search_term", "exp_bugs"), BUG_SEARCHES)
+def test_bugscache_index_suggestions(refdata, sample_bugs, monkeypatch,
+                                     search_term, exp_bugs):
+    """Test the bugscache index suggests the same bugs as the database, in
+    the same order."""
+    from django.conf import settings
+
+    bug_list = sample_bugs['bugs']
+    fifty_days_ago = datetime.now() - timedelta(days=50)
+    # Put half of the bugs in each of the suggestion groups.
+    for i, bug in enumerate(bug_list):
+        bug['last_change_time'] = fifty_days_ago - timedelta(days=50 * (i % 2))
+    refdata.update_bugscache(bug_list)
+
+    monkeypatch.setattr(settings, 'BUGSCACHE_INDEX_ENABLED', False)
+    exp = refdata.get_bug_suggestions(search_term)
+    monkeypatch.setattr(settings, 'BUGSCACHE_INDEX_ENABLED', True)
+    suggestions = refdata.get_bug_suggestions(search_term)
+
+    for group in ('open_recent', 'all_others'):
+        # the bugs with the same relevance may come in any order
+        assert ([b['relevance'] for b in suggestions[group]] ==
+                [b['relevance'] for b in exp[group]])
+        assert (sorted(suggestions[group], key=lambda b: b['id']) ==
+                sorted(exp[group], key=lambda b: b['id']))
+
+
+def test_bugscache_index_max_bugs(refdata, sample_bugs, monkeypatch):
+    """Test the bugscache index is dropped past BUGSCACHE_INDEX_MAX_BUGS."""
+    from django.conf import settings
+    from treeherder.model.bugscache_index import (bugscache_index,
+                                                  bump_bugscache_version)
+
+    bug_list = sample_bugs['bugs']
+    refdata.update_bugscache(bug_list)
+    search_term = BUG_SEARCHES[0][0]
+
+    monkeypatch.setattr(settings, 'BUGSCACHE_INDEX_MAX_BUGS', len(bug_list))
+    suggestions = refdata.get_bug_suggestions(search_term)
+    assert bugscache_index.bugs
+
+    bump_bugscache_version()
+    monkeypatch.setattr(settings, 'BUGSCACHE_INDEX_MAX_BUGS', len(bug_list) - 1)
+    assert refdata.get_bug_suggestions(search_term) == suggestions
+    assert not bugscache_index.bugs
+
+
+def test_bugscache_index_refresh(refdata, sample_bugs):
+    """Test the bugscache index only reads again the modified bugs."""
+    bug_list = sample_bugs['bugs']
+    refdata.update_bugscache(bug_list)
+    assert refdata.get_bug_suggestions("a summary that changed") == {
+        'open_recent': [], 'all_others': []}
+
+    bug = bug_list[1]
+    bug['summary'] = "a summary that changed"
+    bug['last_change_time'] = datetime.now()
+    refdata.update_bugscache(bug_list)
+
+    refdata.get_bugs = Mock(wraps=refdata.get_bugs)
+    suggestions = refdata.get_bug_suggestions("a summary that changed")
+    assert [b['id'] for b in suggestions['open_recent']] == [bug['id']]
+    refdata.get_bugs.assert_called_once_with([bug['id']])
+
+
 def test_delete_bugscache(refdata, sample_bugs):
     bug_list = sample_bugs['bugs']
     refdata.update_bugscache(bug_list)
@@ -0,0 +1,105 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import math
+import random
+
+import pytest
+from django.core.cache import cache
+
+from treeherder.model import eta
+from treeherder.model.eta import RunningStats, StreamingMedian
+from treeherder.model.utils import cache_lock
+
+
+@pytest.mark.parametrize(("values", "median"), [
+    ([], 0),
+    ([3], 3),
+    ([5, 1], 3),
+    ([7, 1, 4], 4),
+    ([9, 3, 5, 1, 7], 5),
+])
+def test_streaming_median_few_values(values, median):
+    """The median of up to five values is exact."""
+    streaming_median = StreamingMedian()
+    for value in values:
+        streaming_median.add(value)
+    assert streaming_median.median == median
+
+
+def test_streaming_median_estimate():
+    """The median of many values is estimated closely."""
+    rng = random.Random(42)
+    values = [int(rng.lognormvariate(6, 0.5)) for i in range(5000)]
+
+    streaming_median = StreamingMedian()
+    for value in values:
+        streaming_median.add(value)
+
+    median = sorted(values)[len(values) / 2]
+    assert abs(streaming_median.median - median) < median * 0.05
+
+
+def test_running_stats():
+    """The running stats match the stats of the whole sample."""
+    values = [120, 340, 90, 1020, 400, 380, 35]
+    started = 1000
+
+    stats = RunningStats(started)
+    for value in values[:3]:
+        stats.add(value)
+    # the stats are kept in the cache between updates
+    stats = RunningStats.from_dict(stats.to_dict())
+    for value in values[3:]:
+        stats.add(value)
+
+    mean = float(sum(values)) / len(values)
+    std = math.sqrt(sum((value - mean) ** 2 for value in values) / len(values))
+
+    assert stats.started == started
+    assert stats.count == len(values)
+    assert abs(stats.mean - mean) < 1e-9
+    assert abs(stats.std - std) < 1e-9
+    assert stats.min_value == min(values)
+    assert stats.max_value == max(values)
+
+
+def test_eta_stats_lock():
+    """The samples added while the ETA stats are locked are kept for later"""
+    project = 'test_eta_stats_lock'
+    signature = 'a' * 40
+    now = 1000
+
+    def no_samples(since):
+        return []
+
+    eta.get_eta_stats(project, now, 3600, no_samples)
+    eta.add_eta_samples(project, [(signature, 'running', 60)], now)
+    with cache_lock(eta.get_eta_lock_cache_key(project)) as locked:
+        eta.add_eta_samples(project, [(signature, 'running', 120)], now)
+        locked_rows = eta.get_eta_stats(project, now, 3600, no_samples)
+    # expire the stats, so they don't remain in the cache
+    rows = eta.get_eta_stats(project, now, 0, no_samples)
+
+    assert locked
+    assert locked_rows == []
+    assert rows == [[signature, 'running', 90, 90, 60, 120, 30, 2, now]]
+
+
+def test_eta_stats_lost():
+    """The ETA stats are computed from the jobs when they aren't cached"""
+    project = 'test_eta_stats_lost'
+    signature = 'b' * 40
+    now = 1000
+    job_samples = [(signature, 'running', 30)]
+
+    rows = eta.get_eta_stats(project, now, 3600, lambda since: job_samples)
+    assert rows == [[signature, 'running', 30, 30, 30, 30, 0, 1, now]]
+
+    eta.add_eta_samples(project, [(signature, 'running', 60)], now)
+    job_samples.append((signature, 'running', 60))
+    cache.delete(eta.get_eta_stats_cache_key(project, signature))
+
+    rows = eta.get_eta_stats(project, now, 0, lambda since: job_samples)
+    assert rows == [[signature, 'running', 45, 45, 30, 60, 15, 2, now]]
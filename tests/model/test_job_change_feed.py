@@ -0,0 +1,52 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.core.cache import cache
+
+from treeherder.model.job_change_feed import (get_job_changes,
+                                              job_change_feed,
+                                              publish_job_changes)
+
+
+def test_job_changes_since_cursor():
+    """The jobs published after a cursor are returned once"""
+    cursor, job_ids = get_job_changes("proj", None)
+    assert job_ids is None
+
+    publish_job_changes("proj", [1, 2])
+    publish_job_changes("proj", [2, 3])
+    publish_job_changes("other", [4])
+
+    cursor, job_ids = get_job_changes("proj", cursor)
+    assert job_ids == set([1, 2, 3])
+
+    cursor, job_ids = get_job_changes("proj", cursor)
+    assert job_ids == set()
+
+
+def test_job_changes_reset():
+    """Clients are told to reload when the changes can't be known"""
+    cursor, _ = get_job_changes("proj", None)
+    for job_id in range(60):
+        publish_job_changes("proj", [job_id])
+
+    assert get_job_changes("proj", "bad-cursor")[1] is None
+    assert get_job_changes("proj", "other-epoch:1")[1] is None
+
+    # an old entry expired from the cache
+    cache.delete(job_change_feed.get_entry_cache_key("proj", 1))
+    assert get_job_changes("proj", cursor)[1] is None
+
+
+def test_job_changes_in_flight():
+    """A recent entry not written yet is left for the next call"""
+    cursor, _ = get_job_changes("proj", None)
+    publish_job_changes("proj", [1])
+    publish_job_changes("proj", [2])
+    publish_job_changes("proj", [3])
+    cache.delete(job_change_feed.get_entry_cache_key("proj", 2))
+
+    new_cursor, job_ids = get_job_changes("proj", cursor)
+    assert job_ids == set([1])
+    assert new_cursor.endswith(":1")
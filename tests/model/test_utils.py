@@ -0,0 +1,25 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from treeherder.model.utils import get_range_partitions
+
+
+def test_get_range_partitions():
+    """Daily partitions are named after their day, and cover the range."""
+    day = 24 * 3600
+    partitions = get_range_partitions(day + 10, 3 * day, day)
+
+    assert partitions == [("p19700102", 2 * day),
+                          ("p19700103", 3 * day),
+                          ("p19700104", 4 * day)]
+
+
+def test_get_range_partitions_under_a_day():
+    """Partitions shorter than a day get unique names."""
+    partitions = get_range_partitions(0, 24 * 3600, 6 * 3600)
+    names = [name for name, _ in partitions]
+
+    assert len(names) == 5
+    assert len(set(names)) == len(names)
+    assert names[1] == "p19700101060000"
@@ -0,0 +1,78 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import os
+import time
+
+import pytest
+
+from treeherder.cache import LRUFileBasedCache
+
+
+@pytest.fixture
+def lru_cache(tmpdir):
+    return LRUFileBasedCache(str(tmpdir), {
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 100,
+            'MAX_SIZE': 3000,
+            # cull just below the size limit
+            'CULL_FREQUENCY': 20
+        }
+    })
+
+
+def test_lru_cache_get_set(lru_cache):
+    """test values can be stored and retrieved"""
+    assert lru_cache.get('foo') is None
+    lru_cache.set('foo', {'bar': [1, 2]})
+    assert lru_cache.get('foo') == {'bar': [1, 2]}
+    assert lru_cache.has_key('foo')
+
+    lru_cache.delete('foo')
+    assert lru_cache.get('foo', 'default') == 'default'
+
+
+def test_lru_cache_expiry(lru_cache):
+    """test expired values aren't returned"""
+    lru_cache.set('foo', 'bar', timeout=-1)
+    assert lru_cache.get('foo') is None
+    assert not lru_cache.has_key('foo')
+
+
+def test_lru_cache_evicts_least_recently_used(lru_cache):
+    """test the least recently used entries are evicted first"""
+    for i, key in enumerate(['a', 'b', 'c']):
+        lru_cache.set(key, 'x' * 900)
+        # make sure the access times differ
+        fname = lru_cache._key_to_file(key)
+        os.utime(fname, (time.time() - 100 + i, time.time() - 100 + i))
+
+    # reading 'a' makes 'b' the least recently used entry
+    assert lru_cache.get('a') is not None
+    lru_cache.set('d', 'x' * 900)
+
+    assert lru_cache.has_key('a')
+    assert not lru_cache.has_key('b')
+    assert lru_cache.has_key('c')
+    assert lru_cache.has_key('d')
+    assert lru_cache.get_size() <= 3000
+
+
+def test_lru_cache_culls_beyond_limits(lru_cache, monkeypatch):
+    """test the size of the cache is only read when beyond its limits"""
+    lru_cache.set('a', 'x' * 900)
+
+    def fail():
+        raise AssertionError("the cache files were read")
+    stat_cache_files = lru_cache._stat_cache_files
+    monkeypatch.setattr(lru_cache, '_stat_cache_files', fail)
+    lru_cache.set('b', 'x' * 900)
+    lru_cache.set('c', 'x' * 900)
+
+    monkeypatch.setattr(lru_cache, '_stat_cache_files', stat_cache_files)
+    lru_cache.set('d', 'x' * 900)
+
+    assert lru_cache.get_size() <= 3000
+    assert lru_cache.has_key('d')
@@ -26,11 +26,11 @@ describe('JobsCtrl', function(){
             getJSONFixture('resultset_list.json')
         );
 
-        $httpBackend.whenGET(projectPrefix + 'jobs/?count=2000&result_set_id=1&return_type=list').respond(
+        $httpBackend.whenGET(projectPrefix + 'jobs/?count=2000&result_set_id=1&return_type=columns').respond(
             getJSONFixture('job_list/job_1.json')
         );
 
-        $httpBackend.whenGET(projectPrefix + 'jobs/?count=2000&result_set_id=2&return_type=list').respond(
+        $httpBackend.whenGET(projectPrefix + 'jobs/?count=2000&result_set_id=2&return_type=columns').respond(
             getJSONFixture('job_list/job_2.json')
         );
 
@@ -45,11 +45,11 @@ describe('ThResultSetStore', function(){
         );
 
         
-        $httpBackend.whenGET(foregroundPrefix + '/jobs/?count=2000&result_set_id=1&return_type=list').respond(
+        $httpBackend.whenGET(foregroundPrefix + '/jobs/?count=2000&result_set_id=1&return_type=columns').respond(
             getJSONFixture('job_list/job_1.json')
         );
 
-        $httpBackend.whenGET(foregroundPrefix + '/jobs/?count=2000&result_set_id=2&return_type=list').respond(
+        $httpBackend.whenGET(foregroundPrefix + '/jobs/?count=2000&result_set_id=2&return_type=columns').respond(
             getJSONFixture('job_list/job_2.json')
         );
 
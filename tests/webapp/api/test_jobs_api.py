@@ -2,11 +2,13 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+from django.conf import settings
 from django.core.urlresolvers import reverse
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 
 import json
+import time
 
 
 def test_job_list(webapp, eleven_jobs_processed, jm):
@@ -70,6 +72,72 @@ def test_job_list(webapp, eleven_jobs_processed, jm):
     assert jobs[0]['id'] == 10
 
 
+def test_job_list_columns(webapp, eleven_jobs_processed, jm):
+    """
+    test retrieving the job list as dictionary encoded columns gives the
+    same jobs as the default format.
+    """
+    url = reverse("jobs-list", kwargs={"project": jm.project})
+    jobs = webapp.get(url).json["results"]
+
+    resp = webapp.get(url + "?return_type=columns")
+    assert resp.status_int == 200
+    response_dict = resp.json
+    assert response_dict["meta"] == {"repository": jm.project,
+                                     "offset": 0, "count": 10}
+
+    names = response_dict["job_property_names"]
+    columns = response_dict["columns"]
+    dictionaries = response_dict["dictionaries"]
+    assert set(names) == set(columns)
+    assert "platform" in dictionaries
+    assert len(dictionaries["platform"]) < len(jobs)
+
+    decoded = {}
+    for name in names:
+        if name in dictionaries:
+            decoded[name] = [dictionaries[name][i] for i in columns[name]]
+        else:
+            decoded[name] = columns[name]
+    assert [dict((name, decoded[name][i]) for name in names)
+            for i in range(len(jobs))] == jobs
+
+
+def test_job_changes(webapp, eleven_jobs_processed, jm, monkeypatch):
+    """
+    test the change feed only returns the jobs changed since the cursor.
+    """
+    url = reverse("jobs-changes", kwargs={"project": jm.project})
+    resp = webapp.get(url).json
+    assert resp["meta"]["reset"]
+    assert resp["results"] == []
+
+    job = jm.get_job_list(0, 1)[0]
+    jm.set_state(job["id"], "completed")
+
+    resp = webapp.get(url + "?cursor=" + resp["meta"]["cursor"]).json
+    assert not resp["meta"]["reset"]
+    assert [changed["id"] for changed in resp["results"]] == [job["id"]]
+
+    resp = webapp.get(url + "?cursor=" + resp["meta"]["cursor"]).json
+    assert not resp["meta"]["reset"]
+    assert resp["results"] == []
+
+    # long-polling is disabled by default, the wait is capped
+    start = time.time()
+    webapp.get(url + "?wait=20&cursor=" + resp["meta"]["cursor"])
+    assert time.time() - start < 10
+
+    webapp.get(url + "?wait=never", status=400)
+
+    # with too many jobs changed, the client reloads them all
+    monkeypatch.setattr(settings, "JOB_CHANGE_FEED_MAX_JOBS", 0)
+    jm.set_state(job["id"], "running")
+    resp = webapp.get(url + "?cursor=" + resp["meta"]["cursor"]).json
+    assert resp["meta"]["reset"]
+    assert resp["results"] == []
+
+
 def test_job_list_bad_project(webapp, eleven_jobs_processed, jm):
     """
     test retrieving a job list with a bad project throws 404.
@@ -0,0 +1,51 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import gzip
+
+import pytest
+
+from tests.sampledata import SampleData
+from treeherder.webapp.api.logslice import (LogIndex, LogSliceView,
+                                            filesystem,
+                                            get_log_block_cache_key)
+
+
+@pytest.fixture
+def log_path():
+    return SampleData().get_log_path(
+        "mozilla-central-macosx64-debug-bm65-build1-build15.txt.gz")
+
+
+@pytest.fixture
+def log_url(log_path):
+    return "file://{0}".format(log_path)
+
+
+@pytest.fixture
+def log_lines(log_path):
+    with gzip.open(log_path) as f:
+        return list(f)
+
+
+@pytest.mark.parametrize(("start_line", "end_line"), [
+    (0, 1), (0, 50), (123, 456), (1000, 100000)])
+def test_log_index_get_lines(log_url, log_lines, start_line, end_line):
+    """A slice of the blocks is the same as a slice of the whole log"""
+    index = LogIndex.build(log_url, log_lines, block_size=4096)
+    assert len(index.first_lines) > 1
+
+    index = LogIndex.get(log_url)
+    assert index.get_lines(start_line, end_line) == list(
+        enumerate(log_lines))[start_line:end_line]
+
+
+def test_log_index_culled_block(log_url, log_lines):
+    """A slice is rebuilt from the log when one of its blocks is gone"""
+    index = LogIndex.build(log_url, log_lines, block_size=4096)
+    filesystem.delete(get_log_block_cache_key(log_url, 1))
+    assert index.get_lines(0, len(log_lines)) is None
+
+    lines = LogSliceView().get_log_lines(log_url, 0, len(log_lines))
+    assert lines == list(enumerate(log_lines))
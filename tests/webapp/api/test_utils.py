@@ -2,7 +2,10 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
-from treeherder.webapp.api.utils import UrlQueryFilter
+import datetime
+import json
+
+from treeherder.webapp.api.utils import UrlQueryFilter, iter_columnar_json
 
 
 def test_single_filter():
@@ -88,3 +91,26 @@ def test_get_default_value():
     actual = filter.get("foo", "bar")
 
     assert expected == actual
+
+
+def test_iter_columnar_json():
+    """the streamed columns decode to the rows, datetimes included"""
+    rows = [
+        {"id": 1, "platform": "linux",
+         "last_modified": datetime.datetime(2015, 4, 20, 10, 30, 5)},
+        {"id": 2, "platform": "linux",
+         "last_modified": datetime.datetime(2015, 4, 20, 11, 0, 0)},
+    ]
+
+    body = json.loads("".join(iter_columnar_json({"meta": {}}, rows,
+                                                 ["platform"])))
+
+    assert body["meta"] == {}
+    assert set(body["job_property_names"]) == set(["id", "platform",
+                                                   "last_modified"])
+    assert body["columns"] == {
+        "id": [1, 2],
+        "platform": [0, 0],
+        "last_modified": ["2015-04-20T10:30:05", "2015-04-20T11:00:00"],
+    }
+    assert body["dictionaries"] == {"platform": ["linux"]}
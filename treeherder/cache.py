@@ -2,7 +2,15 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import hashlib
+import os
+import tempfile
+import time
+
 from django.core.cache.backends import memcached
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.encoding import force_bytes
+from django.utils.six.moves import cPickle as pickle
 
 
 class MemcachedCache(memcached.MemcachedCache):
@@ -25,3 +33,162 @@ A subclass of Django's built-in Memcached backend that fixes some issues.
     def set(self, key, value, timeout=0, version=None):
         key = self.make_key(key, version=version)
         return self._cache.set(key, value, self._get_memcache_timeout(timeout))
+
+
+class LRUFileBasedCache(BaseCache):
+
+    """
+A file based cache backend that evicts the least recently used entries.
+
+- Each entry is pickled to its own file, named after a hash of its key.
+- Reading an entry marks it as recently used by touching its file.
+- Once the cache grows beyond the ``MAX_SIZE`` option (in bytes) or
+  ``MAX_ENTRIES`` entries, the least recently used entries are deleted
+  until it's ``CULL_FREQUENCY`` times below them.
+- The size of the cache is only read from the disk when it's estimated to
+  be beyond a limit, so the entries written by the other processes are
+  only counted at the next cull.
+
+"""
+    cache_suffix = '.djcache'
+
+    def __init__(self, location, params):
+        super(LRUFileBasedCache, self).__init__(params)
+        self._dir = os.path.abspath(location)
+        options = params.get('OPTIONS', {})
+        self._max_size = int(options.get('MAX_SIZE', 0))
+        # the estimated entries and size of the cache, None until read
+        self._num_entries = None
+        self._total_size = None
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.has_key(key, version=version):
+            return False
+        self.set(key, value, timeout, version=version)
+        return True
+
+    def get(self, key, default=None, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            with open(fname, 'rb') as f:
+                expiry = pickle.load(f)
+                if expiry is not None and expiry < time.time():
+                    expired = True
+                else:
+                    expired = False
+                    value = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.PickleError):
+            return default
+
+        if expired:
+            self._delete(fname)
+            return default
+
+        try:
+            os.utime(fname, None)
+        except OSError:
+            # deleted by another process in the meantime
+            pass
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            os.makedirs(self._dir)
+        except OSError:
+            # the cache directory already exists
+            pass
+
+        # write to a temporary file first, so readers never see a
+        # partially written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self.get_backend_timeout(timeout), f,
+                            pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.rename(tmp_path, fname)
+        except Exception:
+            self._delete(tmp_path)
+            raise
+
+        if self._num_entries is None:
+            self._cull()
+        else:
+            # an overwritten entry is counted twice until the next cull
+            self._num_entries += 1
+            self._total_size += size
+            if self._is_full(self._num_entries, self._total_size):
+                self._cull()
+
+    def delete(self, key, version=None):
+        self._delete(self._key_to_file(key, version))
+
+    def has_key(self, key, version=None):
+        return os.path.exists(self._key_to_file(key, version))
+
+    def clear(self):
+        for fname in self._list_cache_files():
+            self._delete(fname)
+
+    def get_size(self):
+        """Return the total size in bytes of all entries."""
+        return sum(size for mtime, size, fname in self._stat_cache_files())
+
+    def _key_to_file(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return os.path.join(self._dir, ''.join(
+            [hashlib.md5(force_bytes(key)).hexdigest(), self.cache_suffix]))
+
+    def _delete(self, fname):
+        try:
+            os.remove(fname)
+        except OSError:
+            pass
+
+    def _list_cache_files(self):
+        try:
+            names = os.listdir(self._dir)
+        except OSError:
+            return []
+        return [os.path.join(self._dir, name) for name in names
+                if name.endswith(self.cache_suffix)]
+
+    def _stat_cache_files(self):
+        entries = []
+        for fname in self._list_cache_files():
+            try:
+                stat = os.stat(fname)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, fname))
+        return entries
+
+    def _is_full(self, num_entries, total_size, ratio=1):
+        return (num_entries > self._max_entries * ratio or
+                bool(self._max_size) and total_size > self._max_size * ratio)
+
+    def _cull(self):
+        entries = self._stat_cache_files()
+        total_size = sum(size for mtime, size, fname in entries)
+        num_entries = len(entries)
+
+        if self._is_full(num_entries, total_size):
+            if self._cull_frequency:
+                ratio = 1 - 1.0 / self._cull_frequency
+            else:
+                # like Django's caches, a CULL_FREQUENCY of 0 clears it all
+                ratio = 0
+
+            # oldest access time first
+            for mtime, size, fname in sorted(entries):
+                if not self._is_full(num_entries, total_size, ratio):
+                    break
+                self._delete(fname)
+                num_entries -= 1
+                total_size -= size
+
+        self._num_entries = num_entries
+        self._total_size = total_size
@@ -2,15 +2,21 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import logging
 from urllib import urlencode
 
 from django.conf import settings
+from django.core.cache import cache
 
 from treeherder.etl.mixins import JsonExtractorMixin
 from treeherder.model.derived import RefDataManager
 
+logger = logging.getLogger(__name__)
 
-def get_bz_source_url():
+BZ_FULL_SYNC_CACHE_KEY = "bugscache-full-sync"
+
+
+def get_bz_source_url(last_change_time=None):
     hostname = settings.BZ_API_URL
     params = {
         'keywords': 'intermittent-failure',
@@ -19,6 +25,9 @@ def get_bz_source_url():
                            'op_sys,cf_crash_signature, '
                            'keywords, last_change_time')
     }
+    if last_change_time:
+        # only the bugs changed since then
+        params['last_change_time'] = last_change_time
     endpoint = 'rest/bug'
 
     source_url = '{0}/{1}?{2}'.format(
@@ -29,9 +38,11 @@ def get_bz_source_url():
 
 class BzApiBugProcess(JsonExtractorMixin):
 
-    def run(self):
-        # this is the last day we fetched bugs from bugzilla
-
+    def fetch_bugs(self, last_change_time=None):
+        """
+        Fetch the intermittent failure bugs changed since
+        ``last_change_time``, or all of them if it's None.
+        """
         bug_list = []
 
         offset = 0
@@ -40,7 +51,7 @@ class BzApiBugProcess(JsonExtractorMixin):
         while True:
             # fetch the bugzilla service until we have an empty result
             paginated_url = "{0}&offset={1}&limit={2}".format(
-                get_bz_source_url(),
+                get_bz_source_url(last_change_time),
                 offset,
                 limit
             )
@@ -51,10 +62,38 @@ class BzApiBugProcess(JsonExtractorMixin):
                 break
             offset += limit
 
-        if bug_list:
-            for bug in bug_list:
-                # drop the timezone indicator to avoid issues with mysql
-                bug["last_change_time"] = bug["last_change_time"][0:19]
+        for bug in bug_list:
+            # drop the timezone indicator to avoid issues with mysql
+            bug["last_change_time"] = bug["last_change_time"][0:19]
+
+        return bug_list
+
+    def run(self, full_sync=None):
+        """
+        Sync the bugscache with bugzilla.
+
+        Unless ``full_sync`` is True, only the bugs changed since the most
+        recent ``last_change_time`` in the bugscache are fetched and
+        upserted.  A full sync, which also deletes the bugs which aren't
+        intermittent failures anymore, is still done if there wasn't one
+        in the last ``BZ_FULL_SYNC_INTERVAL`` seconds.
+        """
+        with RefDataManager() as rdm:
+            last_change_time = rdm.get_bugscache_last_modified()
+
+            if full_sync is None:
+                full_sync = (last_change_time is None or
+                             cache.add(BZ_FULL_SYNC_CACHE_KEY, True,
+                                       settings.BZ_FULL_SYNC_INTERVAL))
+
+            if full_sync:
+                bug_list = self.fetch_bugs()
+                if bug_list:
+                    rdm.update_bugscache(bug_list)
+            else:
+                bug_list = self.fetch_bugs(
+                    last_change_time.strftime('%Y-%m-%dT%H:%M:%SZ'))
+                rdm.upsert_bugs(bug_list)
 
-            with RefDataManager() as rdm:
-                rdm.update_bugscache(bug_list)
+            logger.info("Synced {0} bugs ({1} sync)".format(
+                len(bug_list), "full" if full_sync else "delta"))
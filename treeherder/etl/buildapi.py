@@ -4,10 +4,12 @@
 
 import logging
 import simplejson as json
-import copy
+import struct
+import zlib
 
 from collections import defaultdict
 from django.conf import settings
+from django.core.cache import cache
 from treeherder.client import TreeherderJobCollection
 
 from treeherder.etl import common, buildbot
@@ -17,6 +19,47 @@ from treeherder.model.models import Datasource
 
 logger = logging.getLogger(__name__)
 
+PROCESSED_BUILDS4H_CACHE_KEY = "builds4h-processed-builds"
+
+# the builds are only in builds-4hr for 4 hours, after that nobody cares
+# whether they were processed
+PROCESSED_BUILDS4H_TIMEOUT = 6 * 60 * 60
+
+
+def get_build_key(build):
+    """
+    Return the ``(request_id, endtime)`` identifying a completed build, or
+    None if the build doesn't have them.
+    """
+    try:
+        request_ids = build['properties'].get('request_ids',
+                                              build['request_ids'])
+        return int(request_ids[-1]), int(build['endtime'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def get_processed_builds():
+    """Return the keys of the builds-4hr builds already processed."""
+    packed = cache.get(PROCESSED_BUILDS4H_CACHE_KEY)
+    if not packed:
+        return set()
+    packed = zlib.decompress(packed)
+    values = struct.unpack("<{0}Q".format(len(packed) / 8), packed)
+    return set(zip(values[::2], values[1::2]))
+
+
+def set_processed_builds(build_keys):
+    """
+    Store the keys of the builds-4hr builds processed, packed so the keys
+    of a whole feed fit in a single cache entry.
+    """
+    values = [value for build_key in sorted(build_keys)
+              for value in build_key]
+    cache.set(PROCESSED_BUILDS4H_CACHE_KEY,
+              zlib.compress(struct.pack("<{0}Q".format(len(values)), *values)),
+              PROCESSED_BUILDS4H_TIMEOUT)
+
 
 class Builds4hTransformerMixin(object):
 
@@ -75,17 +118,36 @@ class Builds4hTransformerMixin(object):
         return job_guid_data
 
     def transform(self, data, filter_to_project=None, filter_to_revision=None,
-                  filter_to_job_group=None):
+                  filter_to_job_group=None, processed_builds=None):
         """
         transform the builds4h structure into something we can ingest via
         our restful api
+
+        ``data['builds']`` is only iterated once, so it can be a stream.
+        If ``processed_builds``, a set of ``get_build_key`` keys, is given,
+        the builds it contains are skipped, and it's replaced with the keys
+        of the builds which don't need to be transformed again.  The builds
+        of missing resultsets are left out, so they get another chance.
         """
         revisions = defaultdict(list)
         missing_resultsets = defaultdict(set)
 
         projects = set(x.project for x in Datasource.objects.cached())
 
+        # the builds to transform, with their key
+        builds = []
+        done_builds = set()
+
         for build in data['builds']:
+            build_key = get_build_key(build) if processed_builds is not None else None
+            if build_key is not None:
+                if build_key in processed_builds:
+                    done_builds.add(build_key)
+                    continue
+                # the builds skipped below are skipped for good, only the
+                # ones of missing resultsets are tried again
+                done_builds.add(build_key)
+
             prop = build['properties']
 
             if 'buildername' not in prop:
@@ -124,17 +186,17 @@ class Builds4hTransformerMixin(object):
                 continue
 
             revisions[prop['branch']].append(prop['revision'])
+            builds.append((build_key, build))
 
         revisions_lookup = common.lookup_revisions(revisions)
 
         # Holds one collection per unique branch/project
         th_collections = {}
 
-        for build in data['builds']:
+        for build_key, build in builds:
             try:
                 prop = build['properties']
                 project = prop['branch']
-                artifact_build = copy.deepcopy(build)
                 resultset = common.get_resultset(project,
                                                  revisions_lookup,
                                                  prop['revision'],
@@ -142,7 +204,10 @@ class Builds4hTransformerMixin(object):
                                                  logger)
             except KeyError:
                 # skip this job, at least at this point
+                done_builds.discard(build_key)
                 continue
+            # only the top level and the properties are trimmed below
+            artifact_build = dict(build, properties=dict(prop))
             if filter_to_revision and filter_to_revision != resultset['revision']:
                 continue
 
@@ -284,6 +349,10 @@ class Builds4hTransformerMixin(object):
         if missing_resultsets and not filter_to_revision:
             common.fetch_missing_resultsets("builds4h", missing_resultsets, logger)
 
+        if processed_builds is not None:
+            processed_builds.clear()
+            processed_builds.update(done_builds)
+
         return th_collections
 
 
@@ -439,15 +508,31 @@ class Builds4hJobsProcess(JsonExtractorMixin,
 
     def run(self, filter_to_revision=None, filter_to_project=None,
             filter_to_job_group=None):
-        extracted_content = self.extract(settings.BUILDAPI_BUILDS4H_URL)
-        if extracted_content:
-            self.load(
-                self.transform(extracted_content,
-                               filter_to_revision=filter_to_revision,
-                               filter_to_project=filter_to_project,
-                               filter_to_job_group=filter_to_job_group),
-                chunk_size=settings.BUILDAPI_BUILDS4H_CHUNK_SIZE
-            )
+        """
+        Ingest the builds of builds-4hr which weren't ingested by the
+        previous runs.
+
+        The feed is read as a stream, and the builds already processed are
+        skipped before being transformed.  The filtered runs, used to fetch
+        the jobs of missing resultsets, go through all the builds.
+        """
+        processed_builds = None
+        if not (filter_to_revision or filter_to_project or filter_to_job_group):
+            processed_builds = get_processed_builds()
+
+        builds = self.extract_items(settings.BUILDAPI_BUILDS4H_URL, 'builds')
+        th_collections = self.transform({'builds': builds},
+                                        filter_to_revision=filter_to_revision,
+                                        filter_to_project=filter_to_project,
+                                        filter_to_job_group=filter_to_job_group,
+                                        processed_builds=processed_builds)
+        if th_collections:
+            self.load(th_collections,
+                      chunk_size=settings.BUILDAPI_BUILDS4H_CHUNK_SIZE)
+
+        # only once the jobs are posted, else they're posted again next time
+        if processed_builds is not None:
+            set_processed_builds(processed_builds)
 
 
 class PendingJobsProcess(JsonExtractorMixin,
@@ -3,6 +3,8 @@
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
 import re
+import threading
+from collections import OrderedDict
 
 RESULT_DICT = {
     0: "success",
@@ -935,70 +937,121 @@ SYMBOLS = {
 NUMBER_RE = re.compile(r".*-(\d+)$")
 
 
-def extract_platform_info(source_string):
-    output = {
+# the number of buildernames whose classification is kept in memory
+BUILDERNAME_CACHE_SIZE = 10000
+
+
+def _search(regexes, source_string):
+    """Return the index of the first of ``regexes`` found, or None."""
+    for index, regex in enumerate(regexes):
+        if regex.search(source_string):
+            return index
+    return None
+
+
+PLATFORMS_REGEXES = [platform['regex'] for platform in PLATFORMS_BUILDERNAME]
+
+BUILD_TYPE_REGEXES = [build_type['regex'] for build_type in BUILD_TYPE_BUILDERNAME]
+
+# the regexes of all the job types, in the order they are searched
+JOB_TYPE_REGEXES = [regex for job_type in JOB_TYPE_BUILDERNAME
+                    for regex in JOB_TYPE_BUILDERNAME[job_type]]
+
+JOB_TYPES = [job_type for job_type in JOB_TYPE_BUILDERNAME
+             for regex in JOB_TYPE_BUILDERNAME[job_type]]
+
+JOB_NAME_REGEXES = [test_name['regex'] for test_name in JOB_NAME_BUILDERNAME]
+
+
+def _classify_buildername(source_string):
+    platform = {
         'os': 'unknown',
         'os_platform': source_string[:24],
         'arch': 'unknown',
-        'vm': extract_vm_status(source_string)
+        'vm': _search(VM_STATUS, source_string) is not None
     }
-    for platform in PLATFORMS_BUILDERNAME:
-        if platform['regex'].search(source_string):
-            output.update(platform['attributes'])
-            return output
-    return output
+    index = _search(PLATFORMS_REGEXES, source_string)
+    if index is not None:
+        platform.update(PLATFORMS_BUILDERNAME[index]['attributes'])
+
+    build_type = 'opt'
+    index = _search(BUILD_TYPE_REGEXES, source_string)
+    if index is not None:
+        build_type = BUILD_TYPE_BUILDERNAME[index]['type']
+
+    job_type = None
+    index = _search(JOB_TYPE_REGEXES, source_string)
+    if index is not None:
+        job_type = JOB_TYPES[index]
+
+    name_info = {
+        "name": "unknown",
+        "job_symbol": "?",
+        "group_name": "unknown",
+        "group_symbol": "?",
+    }
+    index = _search(JOB_NAME_REGEXES, source_string)
+    if index is not None:
+        name = JOB_NAME_BUILDERNAME[index]["name"]
+        group_name = GROUP_NAMES.get(name, "unknown")
+        name_info.update({
+            "name": name,
+            "job_symbol": get_symbol(name, source_string),
+            "group_name": group_name,
+            "group_symbol": SYMBOLS.get(group_name, "?")
+        })
+
+    return {
+        'platform': platform,
+        'build_type': build_type,
+        'job_type': job_type,
+        'name': name_info,
+    }
+
+
+buildername_classifications = OrderedDict()
+buildername_classifications_lock = threading.Lock()
+
+
+def classify_buildername(source_string):
+    """
+    Return the platform info, build type, job type and name info of a
+    buildername, as a dict with the keys ``platform``, ``build_type``,
+    ``job_type`` (None if not found) and ``name``.
+
+    The buildapi feeds list the same buildernames every minute, so the
+    classifications are kept, the oldest ones being dropped once there are
+    ``BUILDERNAME_CACHE_SIZE`` of them.  The result must not be modified.
+    """
+    classification = buildername_classifications.get(source_string)
+    if classification is None:
+        classification = _classify_buildername(source_string)
+        with buildername_classifications_lock:
+            buildername_classifications[source_string] = classification
+            while len(buildername_classifications) > BUILDERNAME_CACHE_SIZE:
+                buildername_classifications.popitem(last=False)
+    return classification
+
+
+def extract_platform_info(source_string):
+    return dict(classify_buildername(source_string)['platform'])
 
 
 def extract_vm_status(source_string):
-    vm = False
-    for regex in VM_STATUS:
-        if regex.search(source_string):
-            return True
-    return vm
+    return classify_buildername(source_string)['platform']['vm']
 
 
 def extract_build_type(source_string):
-    output = 'opt'
-    for build_type in BUILD_TYPE_BUILDERNAME:
-        if build_type["regex"].search(source_string):
-            output = build_type["type"]
-            return output
-    return output
+    return classify_buildername(source_string)['build_type']
 
 
 def extract_job_type(source_string, default="build"):
-    for job_type in JOB_TYPE_BUILDERNAME:
-        for regex in JOB_TYPE_BUILDERNAME[job_type]:
-            if regex.search(source_string):
-                return job_type
-    return default
+    return classify_buildername(source_string)['job_type'] or default
 
 
 def extract_name_info(source_string):
     """Extract all the pieces that comprise a name, including symbols"""
-    output = {
-        "name": "unknown",
-        "job_symbol": "?",
-        "group_name": "unknown",
-        "group_symbol": "?",
-    }
-
-    for test_name in JOB_NAME_BUILDERNAME:
-        if test_name["regex"].search(source_string):
-            name = test_name["name"]
-            group_name = GROUP_NAMES.get(name, "unknown")
-            group_symbol = SYMBOLS.get(group_name, "?")
-            symbol = get_symbol(name, source_string)
-
-            output.update({
-                "name": name,
-                "job_symbol": symbol,
-                "group_name": group_name,
-                "group_symbol": group_symbol
-            })
-            return output
-
-    return output
+    return dict(classify_buildername(source_string)['name'])
 
 
 def get_symbol(name, bn):
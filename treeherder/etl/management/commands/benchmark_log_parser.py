@@ -0,0 +1,127 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import glob
+import io
+import multiprocessing
+import resource
+import time
+import zlib
+from contextlib import closing
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from treeherder import path
+from treeherder.log_parser.artifactbuildercollection import (ArtifactBuilderCollection,
+                                                             GZIP_WINDOW_SIZE,
+                                                             iter_gzip_lines)
+
+DEFAULT_LOGS = path("..", "tests", "sample_data", "logs", "*.txt.gz")
+
+
+def buffered_gzip_lines(fileobj, read_size=4096):
+    """
+    Yield the lines of ``fileobj`` the way the log parser used to.
+
+    Every decompressed block is appended to a single ``BytesIO`` that is
+    re-scanned from the last read position, so the whole uncompressed log
+    is kept in memory.  Only used as the baseline for the benchmark.
+    """
+    zipobj = zlib.decompressobj(GZIP_WINDOW_SIZE)
+    with closing(io.BytesIO()) as f:
+        readpos = 0
+        while True:
+            compressed = fileobj.read(read_size)
+            end = not compressed
+            f.write(zipobj.flush() if end else zipobj.decompress(compressed))
+            f.seek(readpos)
+            for line in f:
+                if '\n' not in line and not end:
+                    readpos = f.tell() - len(line)
+                    break
+                yield line
+            else:
+                readpos = f.tell()
+            if end:
+                break
+            f.seek(0, 2)
+
+
+LINE_ITERATORS = {
+    "streaming": iter_gzip_lines,
+    "buffered": buffered_gzip_lines,
+}
+
+
+def run_benchmark(args):
+    """
+    Parse a single log and return ``(lines, seconds, peak rss in kb)``.
+
+    This is run in a fresh worker process so the peak RSS of one run
+    doesn't leak into the next one.
+    """
+    log_path, mode = args
+    line_iterator = LINE_ITERATORS[mode]
+    artifact_bc = ArtifactBuilderCollection("file://{0}".format(log_path))
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    num_lines = 0
+    with open(log_path, 'rb') as lh:
+        for line in line_iterator(lh):
+            num_lines += 1
+            for builder in artifact_bc.builders:
+                builder.parse_line(line)
+    elapsed = time.time() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return num_lines, elapsed, rss_after - rss_before
+
+
+class Command(BaseCommand):
+    """Management command to benchmark log parsing"""
+
+    help = """
+    Compares the peak RSS and lines/sec of the streaming log line splitter
+    with the previous buffered implementation, running the default
+    artifact builders over each of the given gzipped logs.  If no logs are
+    given, the sample logs from the test suite are used.
+    """
+    args = "<log path> <log path> ..."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--runs',
+                    action='store',
+                    dest='runs',
+                    type=int,
+                    default=3,
+                    help='Number of times to parse each log'),)
+
+    def handle(self, *args, **options):
+        log_paths = args or sorted(glob.glob(DEFAULT_LOGS))
+        if not log_paths:
+            raise CommandError("No logs found to benchmark")
+
+        for mode in sorted(LINE_ITERATORS):
+            total_lines = 0
+            total_time = 0
+            peak_rss = 0
+            for log_path in log_paths:
+                for i in range(options['runs']):
+                    pool = multiprocessing.Pool(processes=1)
+                    try:
+                        num_lines, elapsed, rss = pool.apply(run_benchmark,
+                                                             [(log_path, mode)])
+                    finally:
+                        pool.terminate()
+                    total_lines += num_lines
+                    total_time += elapsed
+                    peak_rss = max(peak_rss, rss)
+
+            self.stdout.write("{0}: {1} lines in {2:.2f}s ({3:.0f} lines/sec), "
+                              "peak RSS growth {4} KB".format(
+                                  mode, total_lines, total_time,
+                                  total_lines / total_time if total_time else 0,
+                                  peak_rss))
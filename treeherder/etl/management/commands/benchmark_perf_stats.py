@@ -0,0 +1,77 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import copy
+import json
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from treeherder import path
+from treeherder.etl.perf_data_adapters import PerformanceDataAdapter
+
+DEFAULT_PERF_DATA = path("..", "tests", "sample_data", "artifacts",
+                         "performance", "talos_perf.json")
+
+
+def calculate_per_test(results):
+    """Compute the stats of ``results`` one test at a time."""
+    for replicates in results.values():
+        PerformanceDataAdapter._calculate_test_data(1, 1, 0, replicates)
+    PerformanceDataAdapter._calculate_summary_data(1, 1, 0, results)
+
+
+def calculate_batched(results):
+    """Compute the stats of all the tests of ``results`` at once."""
+    PerformanceDataAdapter._calculate_test_data_batch(1, 1, 0, results)
+    PerformanceDataAdapter._calculate_summary_data_batch(1, 1, 0, results)
+
+
+CALCULATORS = {
+    "per-test": calculate_per_test,
+    "batched": calculate_batched,
+}
+
+
+class Command(BaseCommand):
+    """Management command to benchmark the performance series stats"""
+
+    help = """
+    Compares the time taken to compute the performance series stats of
+    talos jobs one test at a time with the NumPy batched implementation.
+    If no talos data file is given, the sample data from the test suite is
+    used.
+    """
+    args = "<talos json path>"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--runs',
+                    action='store',
+                    dest='runs',
+                    type=int,
+                    default=100,
+                    help='Number of times to compute the stats of each job'),)
+
+    def handle(self, *args, **options):
+        with open(args[0] if args else DEFAULT_PERF_DATA) as f:
+            talos_data = json.load(f)
+
+        for mode in sorted(CALCULATORS):
+            calculate = CALCULATORS[mode]
+            # the replicates get sorted, so every run gets a fresh copy
+            runs = [copy.deepcopy(talos_datum['results'])
+                    for talos_datum in talos_data
+                    for i in range(options['runs'])]
+            num_tests = sum(len(results) for results in runs)
+
+            start = time.time()
+            for results in runs:
+                calculate(results)
+            elapsed = time.time() - start
+
+            self.stdout.write("{0}: {1} jobs, {2} tests in {3:.2f}s "
+                              "({4:.0f} tests/sec)".format(
+                                  mode, len(runs), num_tests, elapsed,
+                                  num_tests / elapsed if elapsed else 0))
@@ -4,8 +4,10 @@
 
 from StringIO import StringIO
 import gzip
+import re
 import urllib2
 import logging
+import zlib
 from collections import defaultdict
 
 import simplejson as json
@@ -40,6 +42,175 @@ class JsonExtractorMixin(object):
             logger.error('Error fetching {0}'.format(url), exc_info=True)
             return None
 
+    def extract_items(self, url, key):
+        """
+        Yield the items of the ``key`` array of the json object at ``url``
+        one at a time, uncompressing it if needed.
+
+        Unlike ``extract``, neither the body nor the whole object is ever
+        kept in memory.  If the download fails, the items read so far are
+        the only ones yielded.
+        """
+        req = urllib2.Request(url)
+        req.add_header('Accept', 'application/json')
+        req.add_header('Content-Type', 'application/json')
+        try:
+            handler = urllib2.urlopen(req, timeout=settings.TREEHERDER_REQUESTS_TIMEOUT)
+            encoding = handler.info().get('Content-Encoding')
+            chunks = iter(lambda: handler.read(JSON_READ_SIZE), '')
+            if encoding and 'gzip' in encoding:
+                chunks = iter_gunzipped(chunks)
+
+            for item in iter_json_array_items(chunks, key):
+                yield item
+        except Exception:
+            logger.error('Error fetching {0}'.format(url), exc_info=True)
+
+
+JSON_READ_SIZE = 64 * 1024
+
+GZIP_WINDOW_SIZE = 16 + zlib.MAX_WBITS
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# the characters ending a string, and the tokens delimiting the values:
+# whole strings, the start of the strings cut short, and brackets
+STRING_DELIMITERS = re.compile(r'["\\]')
+VALUE_DELIMITERS = re.compile(r'"(?:[^"\\]+|\\.)*"|[\[\]{}"]')
+
+
+def iter_gunzipped(chunks):
+    """Uncompress the gzipped ``chunks`` as they come."""
+    zipobj = zlib.decompressobj(GZIP_WINDOW_SIZE)
+    for chunk in chunks:
+        yield zipobj.decompress(chunk)
+    yield zipobj.flush()
+
+
+class JsonStream(object):
+    """
+    A json document read piecewise from an iterable of string chunks.
+
+    Only the part of the document not decoded yet is buffered, and the
+    values are decoded one at a time with ``JSONDecoder.raw_decode``, so
+    the items of a large array can be read without holding the whole array.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        for chunk in self.chunks:
+            if chunk:
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.eof = True
+        return False
+
+    def _skip_whitespace(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._read():
+                return
+
+    def accept(self, char):
+        """Consume ``char`` if it's the next character of the document."""
+        self._skip_whitespace()
+        if self.buf[self.pos:self.pos + 1] == char:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.accept(char):
+            raise ValueError("Expecting {0!r} at {1!r}".format(
+                char, self.buf[self.pos:self.pos + 20]))
+
+    def decode(self):
+        """Decode the next value of the document."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+            else:
+                # a number at the end of the buffer may be cut short
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            self._read()
+
+    def skip(self):
+        """
+        Skip the next value of the document without decoding it.
+
+        The objects, arrays and strings are scanned for their end as the
+        chunks are read, so skipping a large value doesn't decode it again
+        after every chunk.
+        """
+        self._skip_whitespace()
+        if self.buf[self.pos:self.pos + 1] not in ('{', '[', '"'):
+            self.decode()
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            delimiters = STRING_DELIMITERS if in_string else VALUE_DELIMITERS
+            match = delimiters.search(self.buf, self.pos)
+            if not match:
+                self.pos = len(self.buf)
+                if not self._read():
+                    raise ValueError("Unterminated value")
+                continue
+
+            token = match.group()
+            self.pos = match.end()
+            if token == '\\':
+                # the escaped character can't end the string
+                if self.pos == len(self.buf) and not self._read():
+                    raise ValueError("Unterminated string")
+                self.pos += 1
+                continue
+            if token == '"':
+                in_string = not in_string
+            elif token in ('[', '{'):
+                depth += 1
+            elif token in (']', '}'):
+                depth -= 1
+            if not depth and not in_string:
+                return
+
+
+def iter_json_array_items(chunks, key):
+    """
+    Yield the items of the ``key`` array of the json object made of the
+    string ``chunks``, the other members of the object are skipped.
+    """
+    stream = JsonStream(chunks)
+    stream.expect('{')
+    while not stream.accept('}'):
+        name = stream.decode()
+        stream.expect(':')
+        if name == key:
+            stream.expect('[')
+            if not stream.accept(']'):
+                while True:
+                    yield stream.decode()
+                    if stream.accept(']'):
+                        break
+                    stream.expect(',')
+        else:
+            stream.skip()
+        stream.accept(',')
+
 
 class JsonLoaderMixin(object):
 
@@ -5,11 +5,14 @@
 import simplejson as json
 from simplejson import encoder
 
+from collections import defaultdict
 from hashlib import sha1
 import math
 import zlib
 
-from jsonschema import validate
+import numpy
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
 
 import logging
 logger = logging.getLogger(__name__)
@@ -17,11 +20,115 @@ logger = logging.getLogger(__name__)
 encoder.FLOAT_REPR = lambda o: format(o, '.2f')
 
 
+# the python types of the json schema types, for validate_required
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": basestring,
+    "integer": (int, long),
+    "number": (int, long, float),
+    "boolean": bool,
+}
+
+DATAZILLA_SCHEMA = {
+    "title": "Datazilla Schema",
+
+    "type": "object",
+
+    "properties": {
+        "test_machine": {"type": "object"},
+        "testrun": {"type": "object"},
+        "results": {"type": "object"},
+        "test_build": {"type": "object"},
+        "test_aux": {"type": "object"}
+    },
+
+    "required": ["results", "test_build", "testrun", "test_machine"]
+}
+
+# name = test suite name
+# type = perf_test | perf_aux
+#
+# perf_aux can have any structure
+TREEHERDER_PERF_TEST_SCHEMA = {
+    "title": "Treeherder Schema",
+
+    "type": "object",
+
+    "properties": {
+        "job_guid": {"type": "string"},
+        "name": {"type": "string"},
+        "type": {"type": "string"},
+        "blob": {
+            "type": "object",
+            "properties": {
+                "date": {"type": "integer"},  # time test was run
+                "series_properties": {"type": "object"},
+                "series_signature": {"type": "string"},
+                "testsuite": {"type": "string"},
+                "test": {"type": "string"},
+                "replicates": {"type": "array"},
+                "performance_series": {"type": "object"},
+                "metadata": {"type": "object"}  # (holds 'options' from talos data & various auxiliary data including 'test_aux', 'talox_aux', 'results_aux', and 'results_xperf')
+            },
+            "required": [
+                "date", "series_signature", "testsuite",
+            ]
+        }
+    },
+    "required": ["blob", "job_guid", "name", "type"]
+}
+
+
+def get_validator(schema):
+    """Return the validator of ``schema``, once the schema is checked."""
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+# The schemas are checked and compiled once, instead of on every call to
+# jsonschema.validate.
+DATAZILLA_VALIDATOR = get_validator(DATAZILLA_SCHEMA)
+TREEHERDER_PERF_TEST_VALIDATOR = get_validator(TREEHERDER_PERF_TEST_SCHEMA)
+
+
+def validate_required(instance, schema, path=()):
+    """
+    Check only the types and the required properties of ``schema``.
+
+    This is the cheaper validation of the data from trusted submitters,
+    raising the same ``ValidationError`` as a full validation.
+    """
+    expected_type = schema.get("type")
+    if expected_type is not None:
+        python_type = JSON_TYPES[expected_type]
+        # bool is an int, but not a json integer or number
+        if (not isinstance(instance, python_type) or
+                (isinstance(instance, bool) and expected_type != "boolean")):
+            raise ValidationError(
+                "{0!r} is not of type {1!r}".format(instance, expected_type),
+                path=path)
+
+    if isinstance(instance, dict):
+        for prop in schema.get("required", []):
+            if prop not in instance:
+                raise ValidationError(
+                    "{0!r} is a required property".format(prop), path=path)
+        for prop, prop_schema in schema.get("properties", {}).items():
+            if prop in instance:
+                validate_required(instance[prop], prop_schema,
+                                  path + (prop,))
+
+
 class PerformanceDataAdapter(object):
 
     """
     Base class for translating different performance data structures into
     treeherder performance artifacts.
+
+    The data of ``trusted`` submitters only has its types and required
+    properties validated.
     """
 
     performance_types = set([
@@ -29,58 +136,20 @@ class PerformanceDataAdapter(object):
         'talos_data'
     ])
 
-    def __init__(self):
-
-        self.datazilla_schema = {
-            "title": "Datazilla Schema",
-
-            "type": "object",
+    datazilla_schema = DATAZILLA_SCHEMA
+    treeherder_perf_test_schema = TREEHERDER_PERF_TEST_SCHEMA
 
-            "properties": {
-                "test_machine": {"type": "object"},
-                "testrun": {"type": "object"},
-                "results": {"type": "object"},
-                "test_build": {"type": "object"},
-                "test_aux": {"type": "object"}
-            },
+    datazilla_validator = DATAZILLA_VALIDATOR
+    treeherder_perf_test_validator = TREEHERDER_PERF_TEST_VALIDATOR
 
-            "required": ["results", "test_build", "testrun", "test_machine"]
-        }
+    def __init__(self, trusted=False):
+        self.trusted = trusted
 
-        """
-        name = test suite name
-        type = perf_test | perf_aux
-
-        perf_aux can have any structure
-        """
-        self.treeherder_perf_test_schema = {
-            "title": "Treeherder Schema",
-
-            "type": "object",
-
-            "properties": {
-                "job_guid": {"type": "string"},
-                "name": {"type": "string"},
-                "type": {"type": "string"},
-                "blob": {
-                    "type": "object",
-                    "properties": {
-                        "date": {"type": "integer"},  # time test was run
-                        "series_properties": {"type": "object"},
-                        "series_signature": {"type": "string"},
-                        "testsuite": {"type": "string"},
-                        "test": {"type": "string"},
-                        "replicates": {"type": "array"},
-                        "performance_series": {"type": "object"},
-                        "metadata": {"type": "object"}  # (holds 'options' from talos data & various auxiliary data including 'test_aux', 'talox_aux', 'results_aux', and 'results_xperf')
-                    },
-                    "required": [
-                        "date", "series_signature", "testsuite",
-                    ]
-                }
-            },
-            "required": ["blob", "job_guid", "name", "type"]
-        }
+    def _validate(self, instance, validator):
+        if self.trusted:
+            validate_required(instance, validator.schema)
+        else:
+            validator.validate(instance)
 
     @staticmethod
     def _round(num):
@@ -147,6 +216,89 @@ class PerformanceDataAdapter(object):
 
         return series_data
 
+    @staticmethod
+    def _calculate_summary_data_batch(job_id, result_set_id, push_timestamp,
+                                      results):
+        """
+        Same as ``_calculate_summary_data``, computing the logarithms of
+        all the replicates at once.
+        """
+        values = []
+        for test in results:
+            values += results[test]
+
+        if values:
+            logs = numpy.log(numpy.array(values, dtype=float) + 1)
+            # summed left to right, like the builtin sum
+            geomean = math.exp(logs.cumsum()[-1] / len(values)) - 1
+        else:
+            geomean = 0.0
+
+        return {
+            "job_id": job_id,
+            "result_set_id": result_set_id,
+            "push_timestamp": push_timestamp,
+            "geomean": PerformanceDataAdapter._round(geomean)
+        }
+
+    @staticmethod
+    def _calculate_test_data_batch(job_id, result_set_id, push_timestamp,
+                                   results):
+        """
+        Return the series data of each test of ``results``, a dict of test
+        name to replicates, with the same values as ``_calculate_test_data``.
+
+        The tests with the same number of replicates are computed together,
+        as the rows of a single array.  Like ``_calculate_test_data``, the
+        replicates are sorted in place.
+        """
+        calculate_test_data = PerformanceDataAdapter._calculate_test_data
+
+        tests_by_length = defaultdict(list)
+        for test, replicates in results.items():
+            replicates.sort()
+            tests_by_length[len(replicates)].append(test)
+
+        _round = PerformanceDataAdapter._round
+        series = {}
+        for r_len, tests in tests_by_length.items():
+            values = numpy.array([results[test] for test in tests],
+                                 dtype=float)
+            if r_len:
+                # summed left to right, like the builtin sum
+                means = values.cumsum(axis=1)[:, -1] / r_len
+            if not r_len or (means < 0).any():
+                # let _calculate_test_data deal with these
+                for test in tests:
+                    series[test] = calculate_test_data(
+                        job_id, result_set_id, push_timestamp, results[test])
+                continue
+
+            # _calculate_test_data takes the std, and the median of an even
+            # number of replicates, from the mean
+            stds = numpy.sqrt(means)
+            if r_len % 2 == 1:
+                medians = values[:, r_len / 2]
+            else:
+                medians = means
+
+            rows = zip(tests, values[:, 0].tolist(), values[:, -1].tolist(),
+                       means.tolist(), stds.tolist(), medians.tolist())
+            for test, min_value, max_value, mean, std, median in rows:
+                series[test] = {
+                    "job_id": job_id,
+                    "result_set_id": result_set_id,
+                    "push_timestamp": push_timestamp,
+                    "total_replicates": r_len,
+                    "min": _round(min_value),
+                    "max": _round(max_value),
+                    "mean": _round(mean),
+                    "std": _round(std),
+                    "median": _round(median)
+                }
+
+        return series
+
     @staticmethod
     def _get_series_signature(signature_properties):
         signature_prop_values = signature_properties.keys()
@@ -162,6 +314,7 @@ class PerformanceDataAdapter(object):
                                   name, testname, testdata):
         if series_signature not in self.signatures:
             self.signatures[series_signature] = []
+            self.signature_properties[series_signature] = signature_properties
 
             for signature_property in signature_properties:
                 self.signature_property_placeholders.append([
@@ -185,13 +338,14 @@ class PerformanceDataAdapter(object):
 
 class TalosDataAdapter(PerformanceDataAdapter):
 
-    def __init__(self):
+    def __init__(self, trusted=False):
 
-        super(TalosDataAdapter, self).__init__()
+        super(TalosDataAdapter, self).__init__(trusted)
 
         self.adapted_data = []
 
         self.signatures = {}
+        self.signature_properties = {}
         self.performance_artifact_placeholders = []
         self.signature_property_placeholders = []
 
@@ -225,7 +379,7 @@ class TalosDataAdapter(PerformanceDataAdapter):
         # Get just the talos datazilla structure for treeherder
         target_datum = json.loads(datum['blob'])
         for talos_datum in target_datum['talos_data']:
-            validate(talos_datum, self.datazilla_schema)
+            self._validate(talos_datum, self.datazilla_validator)
 
             _job_guid = datum["job_guid"]
             _name = datum["name"]
@@ -280,13 +434,16 @@ class TalosDataAdapter(PerformanceDataAdapter):
                                                   signature_properties,
                                                   series_data)
                     obj['test'] = _test
-                    validate(obj, self.treeherder_perf_test_schema)
+                    self._validate(obj, self.treeherder_perf_test_validator)
                     self._add_performance_artifact(job_id, series_signature,
                                                    signature_properties, obj,
                                                    _name, _test, series_data)
 
             subtest_signatures = []
 
+            test_series_data = self._calculate_test_data_batch(
+                job_id, result_set_id, push_timestamp, talos_datum["results"])
+
             # series for all the subtests
             for _test in talos_datum["results"].keys():
 
@@ -300,10 +457,7 @@ class TalosDataAdapter(PerformanceDataAdapter):
                     signature_properties)
                 subtest_signatures.append(series_signature)
 
-                series_data = self._calculate_test_data(
-                    job_id, result_set_id, push_timestamp,
-                    talos_datum["results"][_test]
-                )
+                series_data = test_series_data[_test]
 
                 obj = self._get_base_perf_obj(_job_guid, _name, _type,
                                               talos_datum,
@@ -313,7 +467,7 @@ class TalosDataAdapter(PerformanceDataAdapter):
                 obj['test'] = _test
                 obj['replicates'] = talos_datum["results"][_test]
 
-                validate(obj, self.treeherder_perf_test_schema)
+                self._validate(obj, self.treeherder_perf_test_validator)
                 self._add_performance_artifact(job_id, series_signature,
                                                signature_properties, obj,
                                                _name, _test, series_data)
@@ -328,7 +482,7 @@ class TalosDataAdapter(PerformanceDataAdapter):
                 summary_signature = self._get_series_signature(
                     summary_properties)
 
-                summary_data = self._calculate_summary_data(
+                summary_data = self._calculate_summary_data_batch(
                     job_id, result_set_id, push_timestamp, talos_datum["results"])
 
                 obj = self._get_base_perf_obj(_job_guid, _name, _type,
@@ -337,7 +491,7 @@ class TalosDataAdapter(PerformanceDataAdapter):
                                               summary_properties,
                                               summary_data)
 
-                validate(obj, self.treeherder_perf_test_schema)
+                self._validate(obj, self.treeherder_perf_test_validator)
                 self._add_performance_artifact(job_id, summary_signature,
                                                summary_properties, obj,
                                                _name, 'summary', summary_data)
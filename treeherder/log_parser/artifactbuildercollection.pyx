@@ -2,15 +2,101 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
-import io
+import collections
 import urllib2
 import zlib
 from contextlib import closing
+
+import billiard
 from django.conf import settings
 
-from .artifactbuilders import (BuildbotLogViewArtifactBuilder,
+from .artifactbuilders import (ArtifactBuilderBase,
+                               BuildbotLogViewArtifactBuilder,
                                BuildbotJobArtifactBuilder,
                                BuildbotPerformanceDataArtifactBuilder)
+from .parsers import HeaderParser, RE_STEP_START, RE_STEP_FINISH
+
+# zlib window size for gzip
+GZIP_WINDOW_SIZE = 16 + zlib.MAX_WBITS
+
+# size of the compressed blocks read from the log handle
+LOG_READ_SIZE = 1024 * 1024
+
+
+def iter_gzip_lines(fileobj, read_size=LOG_READ_SIZE):
+    """
+    Yield the decompressed lines of the gzipped ``fileobj``.
+
+    We can't just use GzipFile, because that wants the
+    methods seek() and tell(), which don't exist on a normal
+    fileobj (at least in Python 2.x, apparently it does in Python 3.2).
+    interesting write-up here:
+    http://www.enricozini.org/2011/cazzeggio/python-gzip/
+
+    The log is decompressed while we're downloading it, and only the
+    partial line at the end of each block is carried over to the next
+    one, so memory use doesn't grow with the size of the log.  Lines
+    are split on ``\\n`` only and keep their line ending, the same as
+    iterating over a file object.
+    """
+    zipobj = zlib.decompressobj(GZIP_WINDOW_SIZE)
+    remainder = b''
+    while True:
+        compressed = fileobj.read(read_size)
+        if compressed:
+            buf = remainder + zipobj.decompress(compressed)
+        else:
+            buf = remainder + zipobj.flush()
+
+        start = 0
+        end = buf.find(b'\n')
+        while end != -1:
+            yield buf[start:end + 1]
+            start = end + 1
+            end = buf.find(b'\n', start)
+        remainder = buf[start:]
+
+        if not compressed:
+            break
+
+    if remainder:
+        yield remainder
+
+
+def get_default_builders(url, check_errors=True):
+    """Return new instances of the default artifact builders."""
+    return [
+        BuildbotLogViewArtifactBuilder(
+            url=url,
+            check_errors=check_errors,
+            ),
+        BuildbotJobArtifactBuilder(url),
+        BuildbotPerformanceDataArtifactBuilder(url)
+    ]
+
+
+def parse_log_chunk(url, lines, lineno, check_errors=True):
+    """
+    Run the default artifact builders over a chunk of a log.
+
+    ``lines`` must start at the beginning of the log or with the start
+    line of a step, and ``lineno`` is the line number of its first line.
+    Returns the partial artifacts of each builder, keyed by builder name.
+    """
+    builders = get_default_builders(url, check_errors)
+    for builder in builders:
+        builder.lineno = lineno
+        if lineno:
+            # the header is only found at the start of the log
+            for parser in builder.parsers:
+                if isinstance(parser, HeaderParser):
+                    parser.complete = True
+
+    for line in lines:
+        for builder in builders:
+            builder.parse_line(line)
+
+    return dict((builder.name, builder.get_artifact()) for builder in builders)
 
 
 class ArtifactBuilderCollection(object):
@@ -28,6 +114,9 @@ ArtifactBuilderCollection
 builders, otherwise creates the default artifact builders.
 * Reads the log from the log handle/url and walks each line
 calling into each artifact builder with each line for handling
+* If more than one process is used with the default builders, the
+log is split into chunks on step boundaries instead, which are parsed
+in a process pool and merged back into the builders' artifacts
 * Maintains no state
 
 
@@ -60,16 +149,21 @@ BuildbotPerformanceDataArtifactBuilder
 * TalosParser
 """
 
-    def __init__(self, url, builders=None, check_errors=True):
+    def __init__(self, url, builders=None, check_errors=True, processes=None):
         """
         ``url`` - url of the log to be parsed
         ``builders`` - ArtifactBuilder instances to generate artifacts.
         In omitted, use defaults.
+        ``processes`` - number of processes used to parse the log with the
+        default builders.  If omitted, use ``PARSER_PROCESSES``.
 
         """
 
         self.url = url
         self.artifacts = {}
+        self.check_errors = check_errors
+        self.processes = processes or settings.PARSER_PROCESSES
+        self.parallel = not builders and self.processes > 1
 
         if builders:
             # ensure that self.builders is a list, even if a single parser was
@@ -79,14 +173,7 @@ BuildbotPerformanceDataArtifactBuilder
             self.builders = builders
         else:
             # use the defaults
-            self.builders = [
-                BuildbotLogViewArtifactBuilder(
-                    url=self.url,
-                    check_errors=check_errors,
-                    ),
-                BuildbotJobArtifactBuilder(self.url),
-                BuildbotPerformanceDataArtifactBuilder(self.url)
-            ]
+            self.builders = get_default_builders(self.url, check_errors)
 
     def get_log_handle(self, url):
         """Hook to get a handle to the log with this url"""
@@ -103,40 +190,14 @@ BuildbotPerformanceDataArtifactBuilder
         building the ``artifact`` as we go.
         """
         with closing(self.get_log_handle(self.url)) as lh:
-
-            def _parse_lines(f, readpos, end=False):
-                f.seek(readpos)
-                for line in f:
-                    if '\n' not in line and not end:
-                        return f.tell() - len(line)
+            if self.parallel:
+                self.parse_parallel(lh)
+            else:
+                for line in iter_gzip_lines(lh):
                     # run each parser on each line of the log
                     for builder in self.builders:
                         builder.parse_line(line)
 
-                return f.tell()
-
-            # decompress the gzip file and process lines while we're downloading
-            # We can't just use GzipFile, because that wants the
-            # methods seek() and tell(), which don't exist on a normal
-            # fileobj (at least in Python 2.x, apparently it does in Python 3.2).
-            # interesting write-up here:
-            # http://www.enricozini.org/2011/cazzeggio/python-gzip/
-
-            GZIP_WINDOW_SIZE = 16 + zlib.MAX_WBITS  # zlib window size for gzip
-            zipobj = zlib.decompressobj(GZIP_WINDOW_SIZE)
-            with closing(io.BytesIO()) as f:
-                readpos = 0
-                while True:
-                    bytes = lh.read(4096)
-                    if not bytes:
-                        f.write(zipobj.flush())
-                        _parse_lines(f, readpos, end=True)
-                        break
-                    else:
-                        f.write(zipobj.decompress(bytes))
-                        readpos = _parse_lines(f, readpos)
-                        f.seek(0, 2)
-
             # gather the artifacts from all builders
             for builder in self.builders:
                 artifact = builder.get_artifact()
@@ -145,3 +206,55 @@ BuildbotPerformanceDataArtifactBuilder
                         self.artifacts[builder.name] = artifact
                 else:
                     self.artifacts[builder.name] = artifact
+
+    def parse_parallel(self, lh):
+        """
+        Parse the log in chunks across a pool of ``processes`` processes.
+
+        Lines are collected until there are at least ``PARSER_CHUNK_LINES``
+        of them, and the chunk is then cut at the start of the next step,
+        so no step spans two chunks.  The partial artifacts of each chunk
+        are merged into ``builders`` in log order.
+
+        The pool is a billiard one: unlike multiprocessing, billiard lets
+        the daemonic celery prefork workers start processes.
+        """
+        def _merge(result):
+            chunk_artifacts = result.get()
+            for builder in self.builders:
+                builder.merge_artifact(chunk_artifacts[builder.name])
+
+        pool = billiard.Pool(self.processes)
+        try:
+            pending = collections.deque()
+            chunk = []
+            chunk_lineno = 0
+            in_step = False
+
+            for lineno, line in enumerate(iter_gzip_lines(lh)):
+                # follow the step state the same way StepParser does
+                trimmed_line = ArtifactBuilderBase.trim_line(line)
+                if in_step:
+                    in_step = not RE_STEP_FINISH.match(trimmed_line)
+                elif RE_STEP_START.match(trimmed_line):
+                    in_step = True
+                    if len(chunk) >= settings.PARSER_CHUNK_LINES:
+                        pending.append(pool.apply_async(
+                            parse_log_chunk, (self.url, chunk, chunk_lineno,
+                                              self.check_errors)))
+                        chunk = []
+                        chunk_lineno = lineno
+                        # don't read further ahead than the pool can keep up with
+                        while len(pending) > self.processes:
+                            _merge(pending.popleft())
+
+                chunk.append(line)
+
+            pending.append(pool.apply_async(
+                parse_log_chunk, (self.url, chunk, chunk_lineno,
+                                  self.check_errors)))
+            while pending:
+                _merge(pending.popleft())
+        finally:
+            pool.terminate()
+            pool.join()
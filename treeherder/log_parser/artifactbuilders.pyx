@@ -44,9 +44,8 @@ class ArtifactBuilderBase(object):
         self.parsers = []
         self.name = "Generic Artifact"
 
-    def parse_line(self, line):
-        """Parse a single line of the log."""
-
+    @classmethod
+    def trim_line(cls, line):
         """
         Talos data is stored in a json structure contained in
         a single line, if the MAX_LINE_LENGTH is applied the
@@ -54,7 +53,12 @@ class ArtifactBuilderBase(object):
         being ingested.
         """
         if "TALOSDATA" not in line and 'TalosResult' not in line:
-            line = line[:self.MAX_LINE_LENGTH]
+            line = line[:cls.MAX_LINE_LENGTH]
+        return line
+
+    def parse_line(self, line):
+        """Parse a single line of the log."""
+        line = self.trim_line(line)
 
         for parser in self.parsers:
             if not parser.complete:
@@ -68,6 +72,11 @@ class ArtifactBuilderBase(object):
             self.artifact[sp.name] = sp.get_artifact()
         return self.artifact
 
+    def merge_artifact(self, artifact):
+        """Merge the artifact built from a later chunk of the log."""
+        for sp in self.parsers:
+            sp.merge_artifact(artifact[sp.name])
+
 
 class BuildbotJobArtifactBuilder(ArtifactBuilderBase):
     """
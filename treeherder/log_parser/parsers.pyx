@@ -33,6 +33,14 @@ class ParserBase(object):
         """By default, just return the artifact as-is."""
         return self.artifact
 
+    def merge_artifact(self, artifact):
+        """
+        Merge the artifact parsed from a later chunk of the log.
+
+        By default, the artifact is a list which is appended to.
+        """
+        self.artifact.extend(artifact)
+
 
 RE_HEADER_VALUE = re.compile(r'^(?P<key>[a-z]+): (?P<value>.*)$')
 RE_HEADER_START = re.compile(r"={9} Started (.*)$")
@@ -69,6 +77,10 @@ class HeaderParser(ParserBase):
                 key, value = match.groups()
                 self.artifact[key] = value
 
+    def merge_artifact(self, artifact):
+        """Add the header values parsed from another chunk of the log."""
+        self.artifact.update(artifact)
+
 
 PATTERN = r' (?P<name>.*?) \(results: (?P<result>\d+), elapsed: .*?\) \(at (?P<timestamp>.*?)\)'
 RE_STEP_START = re.compile(r'={9} Started' + PATTERN)
@@ -166,6 +178,16 @@ class StepParser(ParserBase):
         if self.check_errors:
             self.sub_parser.parse_line(line, lineno)
 
+    def merge_artifact(self, artifact):
+        """Append the steps parsed from a later chunk of the log."""
+        for step in artifact["steps"]:
+            self.stepnum += 1
+            step["order"] = self.stepnum
+            self.steps.append(step)
+        self.artifact["all_errors"].extend(artifact["all_errors"])
+        if artifact["errors_truncated"]:
+            self.artifact["errors_truncated"] = True
+
     def parsetime(self, match):
         """Convert a string date into a datetime."""
         # DATE_FORMAT expects a decimal on the seconds.  If it's not
@@ -337,6 +359,64 @@ RE_ERR_1_MATCH = re.compile(r"^\d+:\d+:\d+ +(?:ERROR|CRITICAL|FATAL) - ")
 
 RE_MOZHARNESS_PREFIX = re.compile(r"^\d+:\d+:\d+ +(?:DEBUG|INFO|WARNING) - +")
 
+# Literals of which at least one is contained in every line that any of
+# ``IN_SEARCH_TERMS``, ``RE_ERR_1_MATCH``, ``RE_ERR_MATCH`` or
+# ``RE_ERR_SEARCH`` can match.  Lines containing none of them can't be
+# errors, so they skip the exclusion and error regexes altogether.
+# This must be kept in sync when adding new error patterns.
+ERROR_PREFILTER_TERMS = (
+    "TEST-UNEXPECTED-",
+    "rror",
+    "ERROR",
+    "CRITICAL",
+    "FATAL",
+    "PROCESS-CRASH",
+    "Assertion fail",
+    "ABORT:",
+    "E/GeckoLinker",
+    "Sanitizer",
+    "command timed out:",
+    "wget: unable ",
+    "make",
+    "Exception: ",
+    "remoteFailed:",
+    "rm: cannot ",
+    "abort:",
+    "Output exceeded ",
+    "stop build",
+)
+
+
+def literal_trie_pattern(terms):
+    """
+    Return a regex pattern matching any of the literal ``terms``.
+
+    The terms are merged into a trie so that terms sharing a prefix are
+    only tried once at each position of the searched string.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        # an empty key marks the end of a term
+        node[""] = {}
+
+    def _pattern(node):
+        if "" in node:
+            # a shorter term is enough for a match
+            return ""
+        alternatives = [re.escape(char) + _pattern(child)
+                        for char, child in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:{0})".format("|".join(alternatives))
+
+    return _pattern(trie)
+
+
+RE_ERR_PREFILTER = re.compile(literal_trie_pattern(ERROR_PREFILTER_TERMS))
+
 
 class ErrorParser(ParserBase):
     """A generic error detection sub-parser"""
@@ -353,22 +433,30 @@ class ErrorParser(ParserBase):
 
     def parse_line(self, line, lineno):
         """Check a single line for an error.  Keeps track of the linenumber"""
-        if RE_EXCLUDE_1_SEARCH.search(line):
+        # The vast majority of lines can't be errors, so reject them with a
+        # single scan before trying the more expensive regexes.
+        if not RE_ERR_PREFILTER.search(line):
             return
 
-        if RE_ERR_1_MATCH.match(line):
+        if self.is_error_line(line):
             self.add(line, lineno)
-            return
+
+    def is_error_line(self, line):
+        """Return True if ``line`` matches the error patterns"""
+        if RE_EXCLUDE_1_SEARCH.search(line):
+            return False
+
+        if RE_ERR_1_MATCH.match(line):
+            return True
 
         # Remove mozharness prefixes prior to matching
-        trimline = re.sub(RE_MOZHARNESS_PREFIX, "", line)
+        trimline = RE_MOZHARNESS_PREFIX.sub("", line)
 
         if RE_EXCLUDE_2_SEARCH.search(trimline):
-            return
+            return False
 
-        if any(term for term in IN_SEARCH_TERMS if term in trimline) or \
-                RE_ERR_MATCH.match(trimline) or RE_ERR_SEARCH.search(trimline):
-            self.add(line, lineno)
+        return bool(any(term for term in IN_SEARCH_TERMS if term in trimline) or
+                    RE_ERR_MATCH.match(trimline) or RE_ERR_SEARCH.search(trimline))
 
 
 class TalosParser(ParserBase):
@@ -393,3 +481,8 @@ class TalosParser(ParserBase):
                 self.artifact = json.loads(match.group(1))
             else:
                 raise ValueError('Invalid TALOSDATA: %s' % line)
+
+    def merge_artifact(self, artifact):
+        """The last TALOSDATA in the log wins."""
+        if artifact:
+            self.artifact = artifact
@@ -2,12 +2,17 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import hashlib
 import urllib2
 import logging
 
 import simplejson as json
 from django.conf import settings
+from django.core.cache import cache, caches
 
+from treeherder.log_parser import (artifactbuildercollection,
+                                   artifactbuilders,
+                                   parsers)
 from treeherder.log_parser.artifactbuildercollection import \
     ArtifactBuilderCollection
 from treeherder.log_parser.artifactbuilders import MozlogArtifactBuilder
@@ -18,6 +23,55 @@ from treeherder.etl.oauth_utils import OAuthCredentials
 
 logger = logging.getLogger(__name__)
 
+log_artifact_cache = caches['log_artifacts']
+
+LOG_ARTIFACT_CACHE_STATS = ("hits", "misses")
+
+
+def get_parser_version():
+    """
+    Return a hash of the log parser code.
+
+    Changing any of the parsers gives a new version, so artifacts cached
+    by an older version of the parsers are never used.
+    """
+    if not hasattr(get_parser_version, "version"):
+        sha = hashlib.sha1()
+        for module in (artifactbuildercollection, artifactbuilders, parsers):
+            with open(module.__file__, 'rb') as f:
+                sha.update(f.read())
+        get_parser_version.version = sha.hexdigest()
+    return get_parser_version.version
+
+
+def get_log_artifact_cache_key(log_url, check_errors):
+    """Return the key of the parsed artifacts of a log in the cache."""
+    return hashlib.sha1("{0}:{1}:{2}".format(
+        get_parser_version(), check_errors, log_url)).hexdigest()
+
+
+def get_log_artifact_cache_stat_key(stat):
+    return "log_artifact_cache:{0}".format(stat)
+
+
+def incr_log_artifact_cache_stat(stat):
+    """Increment a counter of the parsed artifact cache."""
+    key = get_log_artifact_cache_stat_key(stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # the counter doesn't exist yet
+        if not cache.add(key, 1):
+            cache.incr(key)
+
+
+def get_log_artifact_cache_stats():
+    """Return the counters of the parsed artifact cache."""
+    stats = cache.get_many([get_log_artifact_cache_stat_key(stat)
+                            for stat in LOG_ARTIFACT_CACHE_STATS])
+    return dict((stat, stats.get(get_log_artifact_cache_stat_key(stat), 0))
+                for stat in LOG_ARTIFACT_CACHE_STATS)
+
 
 def is_parsed(job_log_url):
     # if parse_status is not available, consider it pending
@@ -28,13 +82,27 @@ def is_parsed(job_log_url):
 def extract_text_log_artifacts(log_url, job_guid, check_errors):
     """Generate a summary artifact for the raw text log."""
 
-    # parse a log given its url
-    artifact_bc = ArtifactBuilderCollection(log_url,
-                                            check_errors=check_errors)
-    artifact_bc.parse()
+    # logs don't change once they are uploaded, so a log which has already
+    # been parsed by the same parser code (eg. on a retry) isn't
+    # downloaded and parsed again.
+    cache_key = get_log_artifact_cache_key(log_url, check_errors)
+    artifacts = log_artifact_cache.get(cache_key)
+
+    if artifacts is None:
+        incr_log_artifact_cache_stat("misses")
+
+        # parse a log given its url
+        artifact_bc = ArtifactBuilderCollection(log_url,
+                                                check_errors=check_errors)
+        artifact_bc.parse()
+        artifacts = artifact_bc.artifacts
+
+        log_artifact_cache.set(cache_key, artifacts)
+    else:
+        incr_log_artifact_cache_stat("hits")
 
     artifact_list = []
-    for name, artifact in artifact_bc.artifacts.items():
+    for name, artifact in artifacts.items():
         artifact_list.append({
             "job_guid": job_guid,
             "name": name,
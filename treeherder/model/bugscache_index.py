@@ -0,0 +1,164 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.encoding import force_text
+
+from treeherder.model.cache_journal import get_cache_epoch, reset_cache_epoch
+
+logger = logging.getLogger(__name__)
+
+BUGSCACHE_VERSION_CACHE_KEY = "bugscache-version"
+
+# the number of bug ids fetched with a single query when refreshing
+BUGSCACHE_INDEX_FETCH_SIZE = 1000
+
+# the length of the substrings of the bug summaries that are indexed
+NGRAM_SIZE = 3
+
+
+def get_bugscache_version():
+    """
+    Return the version of the bugscache table.
+
+    The version is shared by all the processes through the cache, and is
+    changed every time the content of the bugscache changes.
+    """
+    return get_cache_epoch(BUGSCACHE_VERSION_CACHE_KEY)
+
+
+def bump_bugscache_version():
+    """Mark the bugscache as changed, so every index gets refreshed."""
+    reset_cache_epoch(BUGSCACHE_VERSION_CACHE_KEY)
+
+
+def get_ngrams(text):
+    return set(text[i:i + NGRAM_SIZE]
+               for i in range(len(text) - NGRAM_SIZE + 1))
+
+
+class BugscacheIndex(object):
+    """
+    An in-process index of the bugscache summaries, finding the bugs to
+    suggest without scanning the whole bugscache.
+
+    Every summary is split in overlapping substrings of ``NGRAM_SIZE``
+    characters, mapped to the ids of the bugs containing them.  The bugs
+    matching a search term are the ones in the intersection of the sets of
+    the term's substrings whose summary actually contains the term, which
+    is the same case sensitive match as the ``LIKE`` of the bug suggestion
+    queries.  The suggestions are still ranked by the database, among
+    these bugs only.
+
+    Only the summary and the ``modified`` time of the bugs are kept, and
+    the index is emptied rather than grown past ``BUGSCACHE_INDEX_MAX_BUGS``
+    bugs, so its memory is bounded in every process.
+
+    The index is refreshed when the bugscache version changes: only the
+    bugs whose ``modified`` time changed since the last refresh are read
+    again from the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.enabled = False
+        self.bugs = {}
+        self.ngrams = {}
+
+    def refresh(self, rdm):
+        """
+        Bring the index up to date with the bugscache of ``rdm``.
+
+        Return whether the index can be used, which it can't if the
+        bugscache has more than ``BUGSCACHE_INDEX_MAX_BUGS`` bugs.
+        """
+        version = get_bugscache_version()
+        if version == self.version:
+            return self.enabled
+
+        with self.lock:
+            if version == self.version:
+                return self.enabled
+
+            modified = dict((bug['id'], bug['modified'])
+                            for bug in rdm.get_bug_modified_list())
+
+            if len(modified) > settings.BUGSCACHE_INDEX_MAX_BUGS:
+                logger.warning("The bugscache has %s bugs, more than the %s "
+                               "the bugscache index holds", len(modified),
+                               settings.BUGSCACHE_INDEX_MAX_BUGS)
+                self.bugs = {}
+                self.ngrams = {}
+                self.enabled = False
+                self.version = version
+                return False
+
+            for bug_id in set(self.bugs).difference(modified):
+                self._remove_bug(bug_id)
+
+            changed = [bug_id for bug_id, last_modified in modified.items()
+                       if bug_id not in self.bugs or
+                       self.bugs[bug_id][0] != last_modified]
+            for i in range(0, len(changed), BUGSCACHE_INDEX_FETCH_SIZE):
+                for bug in rdm.get_bugs(changed[i:i + BUGSCACHE_INDEX_FETCH_SIZE]):
+                    self._remove_bug(bug['id'])
+                    self._add_bug(bug)
+
+            self.enabled = True
+            self.version = version
+            return True
+
+    def _add_bug(self, bug):
+        summary = force_text(bug['summary'] or '')
+        self.bugs[bug['id']] = (bug['modified'], summary)
+        for ngram in get_ngrams(summary):
+            self.ngrams.setdefault(ngram, set()).add(bug['id'])
+
+    def _remove_bug(self, bug_id):
+        bug = self.bugs.pop(bug_id, None)
+        if bug is None:
+            return
+        for ngram in get_ngrams(bug[1]):
+            bug_ids = self.ngrams[ngram]
+            bug_ids.discard(bug_id)
+            if not bug_ids:
+                del self.ngrams[ngram]
+
+    def _get_candidates(self, search_term):
+        ngrams = get_ngrams(search_term)
+        if not ngrams:
+            # too short to be indexed
+            return self.bugs.keys()
+
+        postings = []
+        for ngram in ngrams:
+            bug_ids = self.ngrams.get(ngram)
+            if not bug_ids:
+                return []
+            postings.append(bug_ids)
+        postings.sort(key=len)
+        return set.intersection(*postings)
+
+    def get_matching_bugs(self, search_term, limit):
+        """
+        Return the sorted ids of the bugs whose summary contains
+        ``search_term``, or None if there are more than ``limit`` of them.
+        """
+        search_term = force_text(search_term)
+
+        with self.lock:
+            bug_ids = []
+            for bug_id in self._get_candidates(search_term):
+                if search_term in self.bugs[bug_id][1]:
+                    bug_ids.append(bug_id)
+                    if len(bug_ids) > limit:
+                        return None
+        return sorted(bug_ids)
+
+
+bugscache_index = BugscacheIndex()
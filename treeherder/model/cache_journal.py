@@ -0,0 +1,92 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import uuid
+
+from django.core.cache import cache
+
+
+def get_cache_epoch(key):
+    """
+    Return the epoch stored in the cache at ``key``, starting a new one if
+    there is none.
+
+    An epoch is shared by all the processes through the cache.  It is
+    changed with ``reset_cache_epoch`` when the data it covers changes, or
+    when it was lost from the cache, in which case nobody knows what the
+    processes missed.
+    """
+    epoch = cache.get(key)
+    if epoch is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        epoch = cache.get(key)
+    return epoch
+
+
+def reset_cache_epoch(key):
+    """Start a new epoch at ``key``."""
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+class CacheJournal(object):
+    """
+    A journal of entries appended to the cache by any process, and read
+    back in order by the others.
+
+    Every scope, usually a project, has its own journal.  Its entries are
+    numbered by a sequence, and the journal has an epoch which changes when
+    the sequence is lost from the cache: the readers must then start over
+    from what is stored in the database.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_seq_cache_key(self, scope):
+        return "{0}-seq:{1}".format(self.name, scope)
+
+    def get_epoch_cache_key(self, scope):
+        return "{0}-epoch:{1}".format(self.name, scope)
+
+    def get_entry_cache_key(self, scope, seq):
+        return "{0}:{1}:{2}".format(self.name, scope, seq)
+
+    def get_position(self, scope):
+        """Return the ``(epoch, seq)`` of the last entry of ``scope``."""
+        seq_key = self.get_seq_cache_key(scope)
+        epoch_key = self.get_epoch_cache_key(scope)
+        positions = cache.get_many([epoch_key, seq_key])
+        if epoch_key not in positions:
+            get_cache_epoch(epoch_key)
+            cache.add(seq_key, 0, None)
+            positions = cache.get_many([epoch_key, seq_key])
+        return positions.get(epoch_key), positions.get(seq_key, 0)
+
+    def publish(self, scope, entry, timeout):
+        """
+        Append ``entry`` to the journal of ``scope``, kept in the cache for
+        ``timeout`` seconds.
+        """
+        seq_key = self.get_seq_cache_key(scope)
+        try:
+            seq = cache.incr(seq_key)
+        except ValueError:
+            # the journal was lost, start a new one
+            reset_cache_epoch(self.get_epoch_cache_key(scope))
+            cache.add(seq_key, 0, None)
+            seq = cache.incr(seq_key)
+        cache.set(self.get_entry_cache_key(scope, seq), entry, timeout)
+
+    def read(self, scope, first_seq, last_seq):
+        """
+        Return the entries of ``scope`` from ``first_seq`` to ``last_seq``
+        found in the cache, keyed by their sequence number.
+
+        An entry is missing when it expired, or when it is still being
+        written by ``publish``.
+        """
+        keys = dict((self.get_entry_cache_key(scope, seq), seq)
+                    for seq in range(first_seq, last_seq + 1))
+        return dict((keys[key], entry)
+                    for key, entry in cache.get_many(keys.keys()).items())
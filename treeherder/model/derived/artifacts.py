@@ -6,9 +6,12 @@ import simplejson as json
 import logging
 import zlib
 
+from django.conf import settings
+
 from treeherder.model import utils
+from treeherder.model.perf_signature_index import publish_signatures
 
-from .base import TreeherderModelBase
+from .base import TreeherderModelBase, ObjectNotFoundException
 
 from treeherder.etl.perf_data_adapters import (PerformanceDataAdapter,
                                                TalosDataAdapter)
@@ -146,7 +149,30 @@ class ArtifactsModel(TreeherderModelBase):
     def store_job_artifact(self, artifact_placeholders):
         """
         Store a list of job_artifacts given a list of placeholders
+
+        The artifacts are stored with the submit timestamp of their job,
+        which job_artifact is partitioned on.  Raises
+        ``ObjectNotFoundException`` if a job doesn't exist.
         """
+        job_ids = list(set(artifact[0] for artifact in artifact_placeholders))
+        submit_timestamps = self.jobs_execute(
+            proc='jobs.selects.get_job_submit_timestamps',
+            placeholders=job_ids,
+            replace=[','.join(['%s'] * len(job_ids))],
+            key_column='id',
+            return_type='dict',
+            debug_show=self.DEBUG)
+
+        missing_job_ids = set(job_ids).difference(submit_timestamps)
+        if missing_job_ids:
+            raise ObjectNotFoundException("job", id=sorted(missing_job_ids))
+
+        artifact_placeholders = [
+            list(artifact[:4]) +
+            [submit_timestamps[artifact[0]]['submit_timestamp']] +
+            list(artifact[4:])
+            for artifact in artifact_placeholders]
+
         self.jobs_execute(
             proc='jobs.inserts.set_job_artifact',
             debug_show=self.DEBUG,
@@ -174,7 +200,8 @@ class ArtifactsModel(TreeherderModelBase):
         reference_data = self.refdata_model.get_reference_data(
             list(job_ref_data_signatures))
 
-        tda = TalosDataAdapter()
+        tda = TalosDataAdapter(
+            trusted=self.project in settings.PERF_DATA_TRUSTED_PROJECTS)
 
         for perf_data in performance_artifact_placeholders:
             job_guid = perf_data["job_guid"]
@@ -199,6 +226,8 @@ class ArtifactsModel(TreeherderModelBase):
             placeholders=tda.signature_property_placeholders,
             executemany=True)
 
+        publish_signatures(self.project, tda.signature_properties)
+
         tda.submit_tasks(self.project)
 
     def load_job_artifacts(self, artifact_data, job_id_lookup):
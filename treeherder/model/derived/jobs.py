@@ -6,12 +6,11 @@ import simplejson as json
 import MySQLdb
 import time
 import logging
+import uuid
 import zlib
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime
-from hashlib import sha1
-
-from operator import itemgetter
 
 from _mysql_exceptions import IntegrityError
 
@@ -23,7 +22,12 @@ from django.core.exceptions import ObjectDoesNotExist
 from treeherder.model.models import (Datasource,
                                      ExclusionProfile)
 
-from treeherder.model import utils, error_summary
+from treeherder.model import utils, error_summary, eta
+from treeherder.model.job_change_feed import publish_job_changes
+from treeherder.model.job_state_cache import (forget_job_states,
+                                              get_job_state_cache)
+from treeherder.model.perf_signature_index import (get_perf_signature_index,
+                                                   publish_signatures)
 from treeherder.model.tasks import (publish_resultset,
                                     publish_job_action,
                                     populate_error_summary)
@@ -59,6 +63,7 @@ class JobsModel(TreeherderModelBase):
 
     # indexes of specific items in the ``job_placeholder`` objects
     JOB_PH_JOB_GUID = 0
+    JOB_PH_SIGNATURE = 1
     JOB_PH_COALESCED_TO_GUID = 2
     JOB_PH_RESULT_SET_ID = 3
     JOB_PH_BUILD_PLATFORM_KEY = 4
@@ -72,6 +77,7 @@ class JobsModel(TreeherderModelBase):
     JOB_PH_REASON = 12
     JOB_PH_RESULT = 13
     JOB_PH_STATE = 14
+    JOB_PH_SUBMIT_TIMESTAMP = 15
     JOB_PH_START_TIMESTAMP = 16
     JOB_PH_END_TIMESTAMP = 17
     JOB_PH_PENDING_AVG = 18
@@ -127,15 +133,42 @@ class JobsModel(TreeherderModelBase):
     JOBS_CYCLE_TARGETS = [
         "jobs.deletes.cycle_job_artifact",
         "jobs.deletes.cycle_performance_artifact",
+        "jobs.deletes.cycle_performance_point",
         "jobs.deletes.cycle_job_log_url",
         "jobs.deletes.cycle_job_note",
         "jobs.deletes.cycle_bug_job_map",
         "jobs.deletes.cycle_job",
         "jobs.deletes.cycle_revision",
         "jobs.deletes.cycle_revision_map",
+        "jobs.deletes.cycle_result_set_job_count",
+        "jobs.deletes.cycle_result_set_revision_hash",
         "jobs.deletes.cycle_result_set"
     ]
 
+    # the jobs tables partitioned by time, and the column they're
+    # partitioned on.  They're cycled by dropping their old partitions
+    # instead of running the cycle targets.
+    JOBS_PARTITIONED_TABLES = [
+        ("job", "submit_timestamp"),
+        ("job_artifact", "submit_timestamp"),
+        ("job_log_url", "submit_timestamp"),
+        ("performance_point", "push_timestamp"),
+        ("result_set", "push_timestamp")
+    ]
+
+    # the unique keys of the partitioned jobs tables, which must include
+    # the partitioning column
+    JOBS_PARTITIONED_UNIQUE_KEYS = [
+        ("result_set", "idx_revision_hash",
+         "`revision_hash`,`push_timestamp`"),
+        ("performance_point", "uni_series_job",
+         "`series_signature`,`job_id`,`push_timestamp`")
+    ]
+
+    # how long to wait for the lock serializing the job counts updates,
+    # in seconds
+    JOB_COUNTS_LOCK_TIMEOUT = 60
+
     @classmethod
     def create(cls, project, host=None, read_only_host=None):
         """
@@ -227,27 +260,11 @@ class JobsModel(TreeherderModelBase):
         )
 
         if exclusion_profile:
-            try:
-                if exclusion_profile is "default":
-                    profile = ExclusionProfile.objects.get(
-                        is_default=True
-                    )
-                else:
-                    profile = ExclusionProfile.objects.get(
-                        name=exclusion_profile
-                    )
-                signatures = profile.flat_exclusion[self.project]
-                replace_str += " AND j.signature NOT IN ({0})".format(
-                    ",".join(["%s"] * len(signatures))
-                )
-                placeholders += signatures
-            except KeyError:
-                # this repo/project has no hidden signatures
-                pass
-            except ExclusionProfile.DoesNotExist:
-                # Either there's no default profile setup or the profile
-                # specified is not availble
-                pass
+            exclusion_str, exclusion_placeholders = \
+                self._get_exclusion_profile_condition(exclusion_profile,
+                                                      "j.signature")
+            replace_str += exclusion_str
+            placeholders += exclusion_placeholders
 
         repl = [self.refdata_model.get_db_name(), replace_str]
         data = self.jobs_execute(
@@ -261,11 +278,13 @@ class JobsModel(TreeherderModelBase):
 
     def set_state(self, job_id, state):
         """Update the state of an existing job"""
-        self.jobs_execute(
-            proc='jobs.updates.set_state',
-            placeholders=[state, job_id],
-            debug_show=self.DEBUG
-        )
+        with self._count_job_changes(job_ids=[job_id]):
+            self.jobs_execute(
+                proc='jobs.updates.set_state',
+                placeholders=[state, job_id],
+                debug_show=self.DEBUG
+            )
+        publish_job_changes(self.project, [job_id])
 
     def get_incomplete_job_guids(self, resultset_id):
         """Get list of ids for jobs of resultset that are not in complete state."""
@@ -283,11 +302,13 @@ class JobsModel(TreeherderModelBase):
         jobs = self.get_job_ids_by_guid(job_guids).values()
 
         # Cancel all the jobs in the database...
-        self.jobs_execute(
-            proc='jobs.updates.cancel_all',
-            placeholders=[resultset_id],
-            debug_show=self.DEBUG
-        )
+        with self._count_job_changes(incomplete_result_set_id=resultset_id):
+            self.jobs_execute(
+                proc='jobs.updates.cancel_all',
+                placeholders=[resultset_id],
+                debug_show=self.DEBUG
+            )
+        publish_job_changes(self.project, [job['id'] for job in jobs])
 
         # Notify the build systems which created these jobs...
         for job in jobs:
@@ -336,11 +357,13 @@ class JobsModel(TreeherderModelBase):
 
         self._job_action_event(job, 'cancel', requester)
 
-        self.jobs_execute(
-            proc='jobs.updates.cancel_job',
-            placeholders=[job['job_guid']],
-            debug_show=self.DEBUG
-        )
+        with self._count_job_changes(job_guids=[job['job_guid']]):
+            self.jobs_execute(
+                proc='jobs.updates.cancel_job',
+                placeholders=[job['job_guid']],
+                debug_show=self.DEBUG
+            )
+        publish_job_changes(self.project, [job['id']])
         status_publisher = JobStatusPublisher(settings.BROKER_URL)
         try:
             status_publisher.publish([job['job_guid']], self.project, 'processed')
@@ -397,42 +420,249 @@ class JobsModel(TreeherderModelBase):
         This data structure can be used to build a comprehensive set of
         options to browse all available performance data in a repository.
         """
+        summary = self._get_cached_performance_series_summary(interval_seconds)
+        if summary is None:
+            summary = self._build_performance_series_summary(interval_seconds)
+
+        return summary['summary']
+
+    def get_performance_series_summary_changes(self, interval_seconds, since):
+        """
+        Return the signatures added to and removed from the performance
+        series summary since the version ``since``, the ETag of a previous
+        summary.
+
+        {
+            'version': 'the ETag of the current summary',
+            'full': False,
+            'signatures': {'signature1': {'property1': 'value1', ...}, ...},
+            'removed': ['signature2', ...]
+        }
+
+        If the changes since that version aren't known anymore, ``full`` is
+        True and ``signatures`` is the whole summary.
+        """
+        summary = self._get_cached_performance_series_summary(interval_seconds)
+        if summary is None:
+            summary = self._build_performance_series_summary(interval_seconds)
+
+        changes = {
+            'version': self._get_performance_series_summary_etag(summary),
+            'full': False,
+            'signatures': {},
+            'removed': []
+        }
 
+        try:
+            epoch, since_version = since.rsplit('-', 1)
+            since_version = int(since_version)
+        except ValueError:
+            epoch, since_version = None, 0
+
+        deltas = [delta for delta in summary['deltas']
+                  if delta[0] > since_version]
+        if (epoch != summary['epoch'] or since_version > summary['version'] or
+                len(deltas) < summary['version'] - since_version):
+            changes['full'] = True
+            changes['signatures'] = summary['summary']
+            return changes
+
+        added = set()
+        removed = set()
+        for version, delta_added, delta_removed in deltas:
+            added.update(delta_added)
+            removed.difference_update(delta_added)
+            removed.update(delta_removed)
+            added.difference_update(delta_removed)
+
+        changes['signatures'] = dict((signature, summary['summary'][signature])
+                                     for signature in added)
+        changes['removed'] = sorted(removed)
+        return changes
+
+    def update_performance_series_summaries(self, last_pushes):
+        """
+        Update the cached performance series summaries with the signatures
+        of ``last_pushes``, a dict of signature to the push timestamp of its
+        latest point.
+
+        The signatures which got points in the interval of a summary are
+        added to it, and the signatures without points in the interval
+        anymore are removed.  Each change makes a new version of the
+        summary, and the last ``PERF_SERIES_SUMMARY_MAX_DELTAS`` changes
+        are kept so the clients can fetch only what changed.
+        """
+        now = utils.get_now_timestamp()
+        properties = {}
+
+        for t_range in settings.TREEHERDER_PERF_SERIES_TIME_RANGES:
+            interval_seconds = t_range['seconds']
+            push_timestamp_limit = now - interval_seconds
+            with self._performance_series_summary_lock(
+                    interval_seconds) as locked:
+                if not locked:
+                    # the summary would be out of date, build it again next time
+                    cache.delete_many([
+                        self.get_performance_series_cache_key(
+                            self.project, interval_seconds),
+                        self.get_performance_series_cache_key(
+                            self.project, interval_seconds, hash=True)])
+                    continue
+
+                summary = self._get_cached_performance_series_summary(
+                    interval_seconds)
+                if summary is None:
+                    continue
+
+                last_push = summary['last_push']
+                changed = False
+                added = []
+                for signature, push_timestamp in last_pushes.items():
+                    if push_timestamp < push_timestamp_limit:
+                        continue
+                    if push_timestamp > last_push.get(signature, 0):
+                        last_push[signature] = push_timestamp
+                        changed = True
+                    if signature not in summary['summary']:
+                        added.append(signature)
+
+                removed = [signature for signature, push_timestamp
+                           in last_push.items()
+                           if push_timestamp < push_timestamp_limit]
+                for signature in removed:
+                    del last_push[signature]
+                    summary['summary'].pop(signature, None)
+
+                missing = [signature for signature in added
+                           if signature not in properties]
+                if missing:
+                    properties.update(self._get_signature_property_dicts(missing))
+                for signature in added:
+                    summary['summary'][signature] = properties.get(signature, {})
+
+                if added or removed:
+                    summary['version'] += 1
+                    deltas = summary['deltas']
+                    deltas.append(
+                        [summary['version'], sorted(added), sorted(removed)])
+                    del deltas[:-settings.PERF_SERIES_SUMMARY_MAX_DELTAS]
+                    # the clients further behind get the whole summary, so
+                    # the deltas never hold more signatures than it does
+                    num_changes = sum(len(delta[1]) + len(delta[2])
+                                      for delta in deltas)
+                    while deltas and num_changes > len(summary['summary']):
+                        num_changes -= len(deltas[0][1]) + len(deltas[0][2])
+                        del deltas[0]
+                elif not changed:
+                    continue
+
+                self._set_cached_performance_series_summary(
+                    interval_seconds, summary)
+
+    def _performance_series_summary_lock(self, interval_seconds):
+        """
+        Hold the lock of the cached performance series summary of
+        ``interval_seconds``, yielding whether it was acquired in time.
+        """
+        return utils.cache_lock(
+            self.get_performance_series_cache_key(
+                self.project, interval_seconds) + '-lock',
+            tries=20)
+
+    def _get_signature_property_dicts(self, signatures):
+        properties = self.jobs_execute(
+            proc="jobs.selects.get_all_properties_of_signatures",
+            debug_show=self.DEBUG,
+            placeholders=signatures,
+            replace=[','.join(['%s'] * len(signatures))])
+
+        sigdict = defaultdict(dict)
+        for datum in properties:
+            key, val = datum['property'], datum['value']
+            if key == 'subtest_signatures':
+                val = json.loads(val)
+            sigdict[datum['signature']][key] = val
+        return sigdict
+
+    def _build_performance_series_summary(self, interval_seconds):
+        """
+        Build the performance series summary of ``interval_seconds`` from
+        the database, and cache it.
+
+        It's built holding the lock of the summary, so the points stored
+        meanwhile are added to it once it's cached.  If the lock can't be
+        acquired, the summary is returned without being cached.
+        """
+        with self._performance_series_summary_lock(interval_seconds) as locked:
+            if locked:
+                # another process may have built it while we waited
+                summary = self._get_cached_performance_series_summary(
+                    interval_seconds)
+                if summary is not None:
+                    return summary
+
+            summary = self._query_performance_series_summary(interval_seconds)
+            if locked:
+                self._set_cached_performance_series_summary(interval_seconds,
+                                                            summary)
+            return summary
+
+    def _query_performance_series_summary(self, interval_seconds):
         # Only retrieve signatures with property/values that have
-        # received data for the time interval requested
-        last_updated_limit = utils.get_now_timestamp() - interval_seconds
+        # data pushed in the time interval requested
+        push_timestamp_limit = utils.get_now_timestamp() - interval_seconds
 
+        data = self.get_jobs_dhub().execute(
+            proc="jobs.selects.get_perf_series_properties",
+            placeholders=[push_timestamp_limit],
+            debug_show=self.DEBUG,
+        )
+
+        series_summary = defaultdict(dict)
+        last_push = {}
+        for datum in data:
+            key, val = datum['property'], datum['value']
+            if key == 'subtest_signatures':
+                val = json.loads(val)
+            series_summary[datum['signature']][key] = val
+            last_push[datum['signature']] = datum['last_push']
+
+        # the epoch tells apart the versions of the summaries built
+        # separately
+        summary = {
+            'epoch': uuid.uuid4().hex,
+            'version': 0,
+            'summary': series_summary,
+            'last_push': last_push,
+            'deltas': []
+        }
+        return summary
+
+    @staticmethod
+    def _get_performance_series_summary_etag(summary):
+        return "{0}-{1}".format(summary['epoch'], summary['version'])
+
+    def _get_cached_performance_series_summary(self, interval_seconds):
         cache_key = self.get_performance_series_cache_key(self.project,
                                                           interval_seconds)
+        summary = cache.get(cache_key, None)
+        if summary:
+            return json.loads(zlib.decompress(summary))
+        return None
 
-        series_summary = cache.get(cache_key, None)
-        if series_summary:
-            series_summary = json.loads(zlib.decompress(series_summary))
-        else:
-            data = self.get_jobs_dhub().execute(
-                proc="jobs.selects.get_perf_series_properties",
-                placeholders=[last_updated_limit, interval_seconds],
-                debug_show=self.DEBUG,
-            )
+    def _set_cached_performance_series_summary(self, interval_seconds,
+                                               summary):
+        cache_key = self.get_performance_series_cache_key(self.project,
+                                                          interval_seconds)
+        # HACK: take this out when we're using pylibmc and can use
+        # compression automatically
+        summary_json = zlib.compress(json.dumps(summary, sort_keys=True))
+        cache.set(cache_key, summary_json)
 
-            series_summary = defaultdict(dict)
-            for datum in data:
-                key, val = datum['property'], datum['value']
-                if key == 'subtest_signatures':
-                    val = json.loads(val)
-                series_summary[datum['signature']][key] = val
-
-            # HACK: take this out when we're using pylibmc and can use
-            # compression automatically
-            series_summary_json = json.dumps(series_summary, sort_keys=True)
-            cache.set(cache_key, zlib.compress(series_summary_json))
-            sha = sha1()
-            sha.update(series_summary_json)
-            hash_cache_key = self.get_performance_series_cache_key(
-                self.project, interval_seconds, hash=True)
-            cache.set(hash_cache_key, sha.hexdigest())
-
-        return series_summary
+        hash_cache_key = self.get_performance_series_cache_key(
+            self.project, interval_seconds, hash=True)
+        cache.set(hash_cache_key,
+                  self._get_performance_series_summary_etag(summary))
 
     def get_job_note(self, id):
         """Return the job note by id."""
@@ -466,6 +696,7 @@ class JobsModel(TreeherderModelBase):
             ],
             debug_show=self.DEBUG
         )
+        publish_job_changes(self.project, [job_id])
 
     def insert_job_note(self, job_id, failure_classification_id, who, note):
         """insert a new note for a job and updates its failure classification"""
@@ -516,6 +747,8 @@ class JobsModel(TreeherderModelBase):
         except IntegrityError as e:
             raise JobDataIntegrityError(e)
 
+        publish_job_changes(self.project, [job_id])
+
         if settings.MIRROR_CLASSIFICATIONS:
             job = self.get_job(job_id)[0]
             if job["state"] == "completed":
@@ -555,195 +788,456 @@ class JobsModel(TreeherderModelBase):
             ],
             debug_show=self.DEBUG
         )
+        publish_job_changes(self.project, [job_id])
 
-    def calculate_eta(self, sample_window_seconds, debug):
-
-        # Get the most recent timestamp from jobs
-        max_timestamp = self.jobs_execute(
-            proc='jobs.selects.get_max_job_submit_timestamp',
-            return_type='iter',
-            debug_show=self.DEBUG
-        ).get_column_data('submit_timestamp')
+    def calculate_eta(self, sample_window_seconds=None, debug=None):
+        """
+        Store the ETA stats of the signatures of the jobs completed since
+        the last call in the ``job_eta`` table.
 
-        if max_timestamp:
+        The stats are updated by ``load_job_data`` as the jobs complete,
+        and cover at most the last ``sample_window_seconds``.  They are
+        only computed from the jobs when they were lost from the cache.
+        """
+        if sample_window_seconds is None:
+            sample_window_seconds = int(
+                settings.JOB_ETA_SAMPLE_WINDOW.total_seconds())
 
-            time_window = int(max_timestamp) - sample_window_seconds
+        placeholders = eta.get_eta_stats(
+            self.project, utils.get_now_timestamp(), sample_window_seconds,
+            self._get_eta_samples)
 
-            eta_groups = self.jobs_execute(
-                proc='jobs.selects.get_eta_groups',
-                placeholders=[time_window],
-                key_column='signature',
-                return_type='dict',
+        if placeholders:
+            self.jobs_execute(
+                proc='jobs.inserts.set_job_eta',
+                placeholders=placeholders,
+                executemany=True,
                 debug_show=self.DEBUG
             )
 
-            placeholders = []
-            submit_timestamp = int(time.time())
-            for signature in eta_groups:
+    def _get_eta_samples(self, since):
+        """
+        Return the pending and running times of the jobs completed and
+        submitted since ``since``, in the format of ``eta.add_eta_samples``.
+        """
+        samples = []
+        for job in self.jobs_execute(
+                proc='jobs.selects.get_eta_samples',
+                placeholders=[since],
+                debug_show=self.DEBUG):
+            samples.append((job['signature'], 'pending',
+                            int(job['pending_sec'])))
+            samples.append((job['signature'], 'running',
+                            int(job['running_sec'])))
+        return samples
+
+    def _add_eta_samples(self, job_placeholders):
+        """
+        Add the pending and running times of the completed jobs among
+        ``job_placeholders`` to the ETA stats of their signatures.
+        """
+        samples = []
+        for job in job_placeholders:
+            if job[self.JOB_PH_STATE] != 'completed':
+                continue
+            submit_timestamp = job[self.JOB_PH_SUBMIT_TIMESTAMP]
+            start_timestamp = job[self.JOB_PH_START_TIMESTAMP]
+            end_timestamp = job[self.JOB_PH_END_TIMESTAMP]
+            # same conditions the samples used to be selected with
+            if (start_timestamp > 0 and end_timestamp > 0 and
+                    start_timestamp >= submit_timestamp and
+                    end_timestamp >= start_timestamp):
+                signature = job[self.JOB_PH_SIGNATURE]
+                samples.append((signature, 'pending',
+                                start_timestamp - submit_timestamp))
+                samples.append((signature, 'running',
+                                end_timestamp - start_timestamp))
+
+        eta.add_eta_samples(self.project, samples, utils.get_now_timestamp())
 
-                pending_samples = map(
-                    lambda x: int(x or 0),
-                    eta_groups[signature]['pending_samples'].split(','))
+    def cycle_data(self, os_cycle_interval, cycle_interval, os_chunk_size, chunk_size, sleep_time):
+        """Delete data older than cycle_interval, splitting the target data
+into chunks of chunk_size size. Returns the number of result sets deleted"""
 
-                pending_median = self.get_median_from_sorted_list(
-                    sorted(pending_samples))
+        os_max_timestamp = self._get_max_timestamp(os_cycle_interval)
+        if self.get_objectstore_partitions():
+            os_deletes = self.cycle_objectstore_partitions(os_max_timestamp)
+        else:
+            os_deletes = 0
+            while True:
+                self.os_execute(
+                    proc='objectstore.deletes.cycle_objectstore',
+                    placeholders=[os_max_timestamp, os_chunk_size],
+                    debug_show=self.DEBUG
+                )
+                rows_deleted = self.get_os_dhub().connection['master_host']['cursor'].rowcount
+                os_deletes += rows_deleted
+                if rows_deleted < os_chunk_size:
+                    break
+                if sleep_time:
+                    # Allow some time for other queries to get through
+                    time.sleep(sleep_time)
 
-                running_samples = map(
-                    lambda x: int(x or 0),
-                    eta_groups[signature]['running_samples'].split(','))
+        jobs_max_timestamp = self._get_max_timestamp(cycle_interval)
+        if self.get_partitions(self.CT_JOBS, 'job'):
+            rs_deletes = self.cycle_jobs_partitions(
+                jobs_max_timestamp, chunk_size, sleep_time)
+        else:
+            rs_deletes = self._cycle_result_sets(
+                jobs_max_timestamp, chunk_size, sleep_time)
 
-                running_median = self.get_median_from_sorted_list(
-                    sorted(running_samples))
+        if rs_deletes:
+            # the deleted jobs must not be skipped if they are submitted again
+            forget_job_states(self.project)
 
-                placeholders.append(
-                    [
-                        signature,
-                        'pending',
-                        eta_groups[signature]['pending_avg_sec'],
-                        pending_median,
-                        eta_groups[signature]['pending_min_sec'],
-                        eta_groups[signature]['pending_max_sec'],
-                        eta_groups[signature]['pending_std'],
-                        len(pending_samples),
-                        submit_timestamp
-                    ])
+        return (os_deletes, rs_deletes)
 
-                placeholders.append(
-                    [
-                        signature,
-                        'running',
-                        eta_groups[signature]['running_avg_sec'],
-                        running_median,
-                        eta_groups[signature]['running_min_sec'],
-                        eta_groups[signature]['running_max_sec'],
-                        eta_groups[signature]['running_std'],
-                        len(running_samples),
-                        submit_timestamp
-                    ])
+    def _cycle_result_sets(self, max_timestamp, chunk_size, sleep_time):
+        """
+        Delete the result sets pushed before ``max_timestamp`` and their
+        jobs from the unpartitioned jobs tables, in chunks of ``chunk_size``
+        result sets.  Returns the number of result sets deleted.
+        """
+        result_set_ids = [rs['id'] for rs in self.jobs_execute(
+            proc='jobs.selects.get_result_sets_to_cycle',
+            placeholders=[max_timestamp],
+            debug_show=self.DEBUG
+        )]
 
-            self.jobs_execute(
-                proc='jobs.inserts.set_job_eta',
-                placeholders=placeholders,
-                executemany=True,
+        for offset in range(0, len(result_set_ids), chunk_size):
+            rs_chunk = result_set_ids[offset:offset + chunk_size]
+            job_data = self.jobs_execute(
+                proc='jobs.selects.get_jobs_to_cycle',
+                placeholders=rs_chunk,
+                replace=[','.join(['%s'] * len(rs_chunk))],
                 debug_show=self.DEBUG
             )
+            jobs_targets = self._get_jobs_cycle_targets(
+                rs_chunk, [j['id'] for j in job_data])
 
-    def get_median_from_sorted_list(self, sorted_list):
+            # remove data from specified jobs tables that is older than max_timestamp
+            self._execute_table_deletes(jobs_targets, 'jobs', sleep_time)
 
-        length = len(sorted_list)
+        return len(result_set_ids)
 
-        if length == 0:
-            return 0
+    def _get_jobs_cycle_targets(self, result_set_ids, job_ids,
+                                exclude_tables=()):
+        """
+        Return the deletes of ``JOBS_CYCLE_TARGETS`` for ``result_set_ids``
+        and ``job_ids``, skipping the targets of ``exclude_tables``.
+        """
+        rs_where_in_clause = [','.join(['%s'] * len(result_set_ids))]
+        job_where_in_clause = [','.join(['%s'] * len(job_ids))]
 
-        # Cannot take the median with only on sample,
-        # return it
-        elif length == 1:
-            return sorted_list[0]
+        # Retrieve list of revisions associated with result sets
+        rev_placeholders = []
+        if result_set_ids:
+            rev_placeholders = [x['revision_id'] for x in self.jobs_execute(
+                proc='jobs.selects.get_revision_ids_to_cycle',
+                placeholders=result_set_ids,
+                replace=rs_where_in_clause,
+                debug_show=self.DEBUG
+            )]
+        rev_where_in_clause = [','.join(['%s'] * len(rev_placeholders))]
+
+        # Associate placeholders and replace data with sql
+        jobs_targets = []
+        for proc in self.JOBS_CYCLE_TARGETS:
+            query_name = proc.split('.')[-1]
+            if query_name[len('cycle_'):] in exclude_tables:
+                continue
 
-        elif not length % 2:
-            return round(
-                (sorted_list[length / 2] + sorted_list[length / 2 - 1]) / 2, 0
-            )
+            if query_name == 'cycle_revision':
+                jobs_targets.append({
+                    "proc": proc,
+                    "placeholders": rev_placeholders,
+                    "replace": rev_where_in_clause
+                })
 
-        return round(sorted_list[length / 2], 0)
+            elif query_name in ('cycle_revision_map',
+                                'cycle_result_set_job_count',
+                                'cycle_result_set_revision_hash',
+                                'cycle_result_set'):
+                jobs_targets.append({
+                    "proc": proc,
+                    "placeholders": result_set_ids,
+                    "replace": rs_where_in_clause
+                })
 
-    def cycle_data(self, os_cycle_interval, cycle_interval, os_chunk_size, chunk_size, sleep_time):
-        """Delete data older than cycle_interval, splitting the target data
-into chunks of chunk_size size. Returns the number of result sets deleted"""
+            else:
+                jobs_targets.append({
+                    "proc": proc,
+                    "placeholders": job_ids,
+                    "replace": job_where_in_clause
+                })
 
-        os_max_timestamp = self._get_max_timestamp(os_cycle_interval)
-        os_deletes = 0
-        while True:
-            self.os_execute(
-                proc='objectstore.deletes.cycle_objectstore',
-                placeholders=[os_max_timestamp, os_chunk_size],
-                debug_show=self.DEBUG
-            )
-            rows_deleted = self.get_os_dhub().connection['master_host']['cursor'].rowcount
-            os_deletes += rows_deleted
-            if rows_deleted < os_chunk_size:
-                break
-            if sleep_time:
-                # Allow some time for other queries to get through
-                time.sleep(sleep_time)
+        return jobs_targets
 
-        jobs_max_timestamp = self._get_max_timestamp(cycle_interval)
-        # Retrieve list of result sets to delete
-        result_set_data = self.jobs_execute(
+    def cycle_jobs_partitions(self, max_timestamp, chunk_size, sleep_time):
+        """
+        Drop the partitions of the ``JOBS_PARTITIONED_TABLES`` only holding
+        data older than ``max_timestamp``, and delete the rows of the other
+        jobs tables referencing their result sets and jobs.
+
+        Only whole partitions are dropped, so the data is kept up to one
+        ``JOBS_PARTITION_INTERVAL`` longer than the cycle interval.  A job
+        is dropped with the partition of its submit timestamp, so the jobs
+        retriggered on an old push outlive the push.  Returns the number of
+        result sets deleted.
+        """
+        interval = int(settings.JOBS_PARTITION_INTERVAL.total_seconds())
+
+        expired = {}
+        for table, _ in self.JOBS_PARTITIONED_TABLES:
+            # the partitions are added first, so the rows of a table still
+            # only holding pmax get split into a partition which can be
+            # dropped
+            self.add_partitions(
+                self.CT_JOBS, table, self.get_partitions(self.CT_JOBS, table),
+                interval, settings.JOBS_PARTITIONS_AHEAD,
+                first_bound=max_timestamp)
+            expired[table] = self._get_expired_partitions(
+                self.get_partitions(self.CT_JOBS, table), max_timestamp)
+
+        def get_cutoff(table):
+            return max([int(p['less_than']) for p in expired[table]] or [0])
+
+        # the other tables reference the rows of the dropped partitions, so
+        # they are looked up before dropping them
+        result_set_ids = [rs['id'] for rs in self.jobs_execute(
             proc='jobs.selects.get_result_sets_to_cycle',
-            placeholders=[jobs_max_timestamp],
+            placeholders=[get_cutoff('result_set')],
             debug_show=self.DEBUG
-        )
-        if not result_set_data:
-            return (os_deletes, 0)
+        )]
+        job_ids = [j['id'] for j in self.jobs_execute(
+            proc='jobs.selects.get_jobs_submitted_before',
+            placeholders=[get_cutoff('job')],
+            debug_show=self.DEBUG
+        )]
+
+        partitioned_tables = [table for table, _ in self.JOBS_PARTITIONED_TABLES]
+        for offset in range(0, max(len(result_set_ids), len(job_ids)),
+                            chunk_size):
+            jobs_targets = self._get_jobs_cycle_targets(
+                result_set_ids[offset:offset + chunk_size],
+                job_ids[offset:offset + chunk_size],
+                exclude_tables=partitioned_tables)
+            self._execute_table_deletes(jobs_targets, 'jobs', sleep_time)
 
-        # group the result_set data in chunks
-        result_set_chunk_list = zip(*[iter(result_set_data)] * chunk_size)
-        # append the remaining result_set not fitting in a complete chunk
-        result_set_chunk_list.append(
-            result_set_data[-(len(result_set_data) % chunk_size):])
+        for table in partitioned_tables:
+            if expired[table]:
+                self.drop_partitions(self.CT_JOBS, table, expired[table])
 
-        for result_set_chunks in result_set_chunk_list:
+        return len(result_set_ids)
 
-            # Retrieve list of revisions associated with result sets
-            rs_placeholders = [x['id'] for x in result_set_chunks]
-            rs_where_in_clause = [','.join(['%s'] * len(rs_placeholders))]
-            revision_data = self.jobs_execute(
-                proc='jobs.selects.get_revision_ids_to_cycle',
-                placeholders=rs_placeholders,
-                replace=rs_where_in_clause,
+    def partition_jobs_tables(self):
+        """
+        Partition the ``JOBS_PARTITIONED_TABLES`` by time.
+
+        MySQL doesn't support foreign keys from or to partitioned tables, so
+        they are dropped, and the revision hashes of the result sets are
+        kept unique by ``result_set_revision_hash``.  This rebuilds the
+        tables, so it's meant to be run once on the jobs databases created
+        before the schema was partitioned.
+        """
+        self.jobs_execute(
+            proc='jobs.updates.create_result_set_revision_hash',
+            debug_show=self.DEBUG
+        )
+        self.jobs_execute(
+            proc='jobs.inserts.copy_result_set_revision_hashes',
+            debug_show=self.DEBUG
+        )
+
+        tables = [table for table, _ in self.JOBS_PARTITIONED_TABLES]
+        table_where_in_clause = ','.join(['%s'] * len(tables))
+        foreign_keys = self.jobs_execute(
+            proc='generic.partitions.get_foreign_keys',
+            placeholders=tables + tables,
+            replace=[table_where_in_clause, table_where_in_clause],
+            debug_show=self.DEBUG
+        )
+        for foreign_key in foreign_keys:
+            self.jobs_execute(
+                proc='generic.partitions.drop_foreign_key',
+                replace=[foreign_key['table_name'], foreign_key['name']],
                 debug_show=self.DEBUG
             )
 
-            # Retrieve list of jobs associated with result sets
-            rev_placeholders = [x['revision_id'] for x in revision_data]
-            rev_where_in_clause = [','.join(['%s'] * len(rev_placeholders))]
-            job_data = self.jobs_execute(
-                proc='jobs.selects.get_jobs_to_cycle',
-                placeholders=rs_placeholders,
-                replace=rs_where_in_clause,
+        # the artifacts and log urls are partitioned on the submit timestamp
+        # of their job
+        for table in ('job_artifact', 'job_log_url'):
+            self.jobs_execute(
+                proc='jobs.updates.add_job_submit_timestamp',
+                replace=[table],
+                debug_show=self.DEBUG
+            )
+            self.jobs_execute(
+                proc='jobs.updates.set_job_submit_timestamp',
+                replace=[table],
                 debug_show=self.DEBUG
             )
 
-            job_guid_dict = dict((d['id'], d['job_guid']) for d in job_data)
-            job_where_in_clause = [','.join(['%s'] * len(job_guid_dict))]
-
-            # Associate placeholders and replace data with sql
-            jobs_targets = []
-            for proc in self.JOBS_CYCLE_TARGETS:
-                query_name = proc.split('.')[-1]
-                if query_name == 'cycle_revision':
-                    jobs_targets.append({
-                        "proc": proc,
-                        "placeholders": rev_placeholders,
-                        "replace": rev_where_in_clause
-                    })
+        for table, name, columns in self.JOBS_PARTITIONED_UNIQUE_KEYS:
+            self.jobs_execute(
+                proc='generic.partitions.replace_unique_key',
+                replace=[table, name, columns],
+                debug_show=self.DEBUG
+            )
 
-                elif query_name == 'cycle_revision_map':
-                    jobs_targets.append({
-                        "proc": proc,
-                        "placeholders": rs_placeholders,
-                        "replace": rs_where_in_clause
-                    })
+        for table, column in self.JOBS_PARTITIONED_TABLES:
+            self._partition_table(
+                self.CT_JOBS, table, column,
+                settings.JOBS_PARTITION_INTERVAL,
+                settings.JOBS_PARTITIONS_AHEAD)
 
-                elif query_name == 'cycle_result_set':
-                    jobs_targets.append({
-                        "proc": proc,
-                        "placeholders": rs_placeholders,
-                        "replace": rs_where_in_clause
-                    })
+    def get_partitions(self, data_type, table):
+        """
+        Return the name, upper bound, approximate number of rows and size
+        of each partition of ``table``, or an empty list if the table isn't
+        partitioned.
+        """
+        return self.execute(
+            data_type,
+            proc='generic.partitions.get_partitions',
+            placeholders=[table],
+            debug_show=self.DEBUG
+        )
 
-                else:
-                    jobs_targets.append({
-                        "proc": proc,
-                        "placeholders": job_guid_dict.keys(),
-                        "replace": job_where_in_clause
-                    })
+    def add_partitions(self, data_type, table, partitions, interval, ahead,
+                       first_bound=None):
+        """
+        Split the ``pmax`` partition of ``table`` so there are always
+        ``ahead`` partitions of ``interval`` seconds ready for the new rows.
 
-            # remove data from specified jobs tables that is older than max_timestamp
-            self._execute_table_deletes(jobs_targets, 'jobs', sleep_time)
+        When ``table`` only holds ``pmax``, its rows older than
+        ``first_bound`` are split into a ``pinitial`` partition, which can
+        be dropped as soon as they expire.
+        """
+        now = utils.get_now_timestamp()
+
+        bounds = [int(p['less_than']) for p in partitions
+                  if p['less_than'] != 'MAXVALUE']
+        if bounds:
+            new_partitions = utils.get_range_partitions(
+                max(bounds), now + interval * ahead, interval)
+        elif first_bound is not None:
+            new_partitions = [("pinitial", first_bound)]
+            new_partitions.extend(utils.get_range_partitions(
+                first_bound, now + interval * ahead, interval))
+        else:
+            # a freshly created table only has the pmax partition
+            new_partitions = utils.get_range_partitions(
+                now, now + interval * ahead, interval)
+        if not new_partitions:
+            return
+
+        self.execute(
+            data_type,
+            proc='generic.partitions.split_last_partition',
+            replace=[table, utils.get_range_partitions_sql(new_partitions)],
+            debug_show=self.DEBUG
+        )
+
+    def drop_partitions(self, data_type, table, partitions):
+        """Drop ``partitions`` of ``table``."""
+        self.execute(
+            data_type,
+            proc='generic.partitions.drop_partitions',
+            replace=[table, ",".join(p['name'] for p in partitions)],
+            debug_show=self.DEBUG
+        )
+
+    def _get_expired_partitions(self, partitions, max_timestamp):
+        """Return the ``partitions`` only holding rows older than ``max_timestamp``."""
+        return [p for p in partitions
+                if p['less_than'] != 'MAXVALUE' and
+                int(p['less_than']) <= max_timestamp]
 
-        return (os_deletes, len(result_set_data))
+    def _partition_table(self, data_type, table, column, interval, ahead):
+        """
+        Partition ``table`` by range of ``column``, with partitions of
+        ``interval`` from its oldest row to ``ahead`` partitions past now.
+        """
+        oldest = self.execute(
+            data_type,
+            proc='generic.partitions.get_min_value',
+            replace=[table, column],
+            debug_show=self.DEBUG
+        )[0]['min_value']
+
+        interval = int(interval.total_seconds())
+        now = utils.get_now_timestamp()
+        partitions = utils.get_range_partitions(
+            oldest or now, now + interval * ahead, interval)
+
+        self.execute(
+            data_type,
+            proc='generic.partitions.partition_by_range',
+            replace=[table, column, utils.get_range_partitions_sql(partitions)],
+            debug_show=self.DEBUG
+        )
+
+    def get_objectstore_partitions(self):
+        """
+        Return the name, upper bound, approximate number of rows and size
+        of each objectstore partition, or an empty list if the objectstore
+        isn't partitioned.
+        """
+        return self.get_partitions(self.CT_OBJECTSTORE, 'objectstore')
+
+    def partition_objectstore(self):
+        """
+        Partition the objectstore by ``loaded_timestamp``.
+
+        This rebuilds the whole table, so it's meant to be run once on the
+        objectstores created before the schema was partitioned.
+        """
+        self._partition_table(
+            self.CT_OBJECTSTORE, 'objectstore', 'loaded_timestamp',
+            settings.OBJECTSTORE_PARTITION_INTERVAL,
+            settings.OBJECTSTORE_PARTITIONS_AHEAD)
+
+    def cycle_objectstore_partitions(self, max_timestamp):
+        """
+        Drop the objectstore partitions only holding blobs older than
+        ``max_timestamp``, then add the partitions for the coming blobs.
+
+        The partitions still holding blobs which weren't loaded, errored
+        or not, are kept until the blobs are loaded, or for
+        ``OBJECTSTORE_PARTITION_GRACE_PERIOD`` at most.  Returns the
+        approximate number of rows deleted.
+        """
+        partitions = self.get_objectstore_partitions()
+        grace_max_timestamp = max_timestamp - int(
+            settings.OBJECTSTORE_PARTITION_GRACE_PERIOD.total_seconds())
+
+        expired = []
+        for partition in self._get_expired_partitions(partitions,
+                                                      max_timestamp):
+            unfinished = self.os_execute(
+                proc='objectstore.selects.get_num_unfinished_in_partitions',
+                replace=[partition['name']],
+                debug_show=self.DEBUG
+            )[0]['count']
+            if not unfinished:
+                expired.append(partition)
+            elif int(partition['less_than']) <= grace_max_timestamp:
+                logger.warning(
+                    "Dropping objectstore partition %s of %s with %s blobs "
+                    "which weren't loaded", partition['name'], self.project,
+                    unfinished)
+                expired.append(partition)
+
+        if expired:
+            self.drop_partitions(self.CT_OBJECTSTORE, 'objectstore', expired)
+
+        self.add_partitions(
+            self.CT_OBJECTSTORE, 'objectstore', partitions,
+            int(settings.OBJECTSTORE_PARTITION_INTERVAL.total_seconds()),
+            settings.OBJECTSTORE_PARTITIONS_AHEAD)
+
+        return sum(p['table_rows'] or 0 for p in expired)
 
     def _get_max_timestamp(self, cycle_interval):
         max_date = datetime.now() - cycle_interval
@@ -1204,7 +1698,7 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
             # without raising an exception
             try:
                 if 'json_blob' in datum:
-                    job_struct = JobData.from_json(datum['json_blob'])
+                    job_struct = self._get_job_struct(datum)
                     revision_hash = job_struct['revision_hash']
                     job = job_struct['job']
                     coalesced = job_struct.get('coalesced', [])
@@ -1304,32 +1798,68 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
                 push_timestamps
             )
 
-        job_id_lookup = self._load_jobs(
-            job_placeholders, job_guid_where_in_list, job_guid_list
-        )
+        # the jobs stored, updated and coalesced are counted in the job
+        # counts of their result sets
+        counted_job_guids = set(job_guid_list)
+        counted_job_guids.update(
+            guid for _, guid in coalesced_job_guid_placeholders)
+        with self._count_job_changes(job_guids=counted_job_guids):
+            job_id_lookup = self._load_jobs(
+                job_placeholders, job_guid_where_in_list, job_guid_list
+            )
 
-        # For each of these ``retry_job_guids`` the job_id_lookup will
-        # either contain the retry guid, or the root guid (based on whether we
-        # inserted, or skipped insertion to do an update).  So add in
-        # whichever is missing.
-        for retry_guid in retry_job_guids:
-            retry_guid_root = get_guid_root(retry_guid)
-            lookup_keys = job_id_lookup.keys()
-
-            if retry_guid in lookup_keys:
-                # this retry was inserted in the db at some point
-                if retry_guid_root not in lookup_keys:
-                    # the root isn't there because there was, for some reason,
-                    # never a pending/running version of this job
-                    retry_job = job_id_lookup[retry_guid]
-                    job_id_lookup[retry_guid_root] = retry_job
-
-            elif retry_guid_root in lookup_keys:
-                # if job_id_lookup contains the root, then the insert
-                # will have skipped, so we want to find that job
-                # when looking for the retry_guid for update later.
-                retry_job = job_id_lookup[retry_guid_root]
-                job_id_lookup[retry_guid] = retry_job
+            # For each of these ``retry_job_guids`` the job_id_lookup will
+            # either contain the retry guid, or the root guid (based on whether we
+            # inserted, or skipped insertion to do an update).  So add in
+            # whichever is missing.
+            for retry_guid in retry_job_guids:
+                retry_guid_root = get_guid_root(retry_guid)
+                lookup_keys = job_id_lookup.keys()
+
+                if retry_guid in lookup_keys:
+                    # this retry was inserted in the db at some point
+                    if retry_guid_root not in lookup_keys:
+                        # the root isn't there because there was, for some reason,
+                        # never a pending/running version of this job
+                        retry_job = job_id_lookup[retry_guid]
+                        job_id_lookup[retry_guid_root] = retry_job
+
+                elif retry_guid_root in lookup_keys:
+                    # if job_id_lookup contains the root, then the insert
+                    # will have skipped, so we want to find that job
+                    # when looking for the retry_guid for update later.
+                    retry_job = job_id_lookup[retry_guid_root]
+                    job_id_lookup[retry_guid] = retry_job
+
+            # If there is already a job_id stored with pending/running status
+            # we need to update the information for the complete job
+            if job_update_placeholders:
+                # replace job_guid with job_id
+                for row in job_update_placeholders:
+                    row[-1] = job_id_lookup[
+                        get_guid_root(row[-1])
+                    ]['id']
+
+                self.jobs_execute(
+                    proc='jobs.updates.update_job_data',
+                    debug_show=self.DEBUG,
+                    placeholders=job_update_placeholders,
+                    executemany=True)
+
+            # set the job_coalesced_to_guid column for any coalesced
+            # job found
+            changed_jobs = job_id_lookup.values()
+            if coalesced_job_guid_placeholders:
+                self.jobs_execute(
+                    proc='jobs.updates.update_coalesced_guids',
+                    debug_show=self.DEBUG,
+                    placeholders=coalesced_job_guid_placeholders,
+                    executemany=True)
+                changed_jobs.extend(self.get_job_ids_by_guid(
+                    [guid for _, guid in coalesced_job_guid_placeholders]
+                ).values())
+
+        self._add_eta_samples(job_placeholders)
 
         # Need to iterate over log references separately since they could
         # be a different length. Replace job_guid with id in log url
@@ -1352,41 +1882,40 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
                 routing_key='error_summary'
             )
 
-        # If there is already a job_id stored with pending/running status
-        # we need to update the information for the complete job
-        if job_update_placeholders:
-            # replace job_guid with job_id
-            for row in job_update_placeholders:
-                row[-1] = job_id_lookup[
-                    get_guid_root(row[-1])
-                ]['id']
-
-            self.jobs_execute(
-                proc='jobs.updates.update_job_data',
-                debug_show=self.DEBUG,
-                placeholders=job_update_placeholders,
-                executemany=True)
-
         # Mark job status
         self.mark_objects_complete(object_placeholders)
 
-        # set the job_coalesced_to_guid column for any coalesced
-        # job found
-        if coalesced_job_guid_placeholders:
-            self.jobs_execute(
-                proc='jobs.updates.update_coalesced_guids',
-                debug_show=self.DEBUG,
-                placeholders=coalesced_job_guid_placeholders,
-                executemany=True)
+        publish_job_changes(self.project,
+                            set(job['id'] for job in changed_jobs))
+
+    @staticmethod
+    def _get_job_struct(datum):
+        """
+        Return the ``JobData`` of the json blob of an objectstore row.
+
+        The blob is decoded only once, the result, or the error, is kept in
+        the row for the next calls.
+        """
+        if 'job_struct' not in datum:
+            try:
+                datum['job_struct'] = JobData.from_json(datum['json_blob'])
+            except Exception as e:
+                datum['job_struct'] = e
+
+        if isinstance(datum['job_struct'], Exception):
+            raise datum['job_struct']
+        return datum['job_struct']
 
     def _remove_existing_jobs(self, data):
         """
         Remove jobs from data where we already have them in the same state.
 
         1. split the incoming jobs into pending, running and complete.
-        2. fetch the ``job_guids`` from the db that are in the same state as they
-           are in ``data``.
-        3. build a new list of jobs in ``new_data`` that are not already in
+        2. drop the jobs the job state cache knows are stored in the same
+           state.
+        3. fetch the ``job_guids`` from the db that are in the same state as
+           the other jobs in ``data``, and add them to the job state cache.
+        4. build a new list of jobs in ``new_data`` that are not already in
            the db and pass that back.  It could end up empty at that point.
 
         """
@@ -1404,16 +1933,17 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
 
             try:
                 if 'json_blob' in datum:
-                    job_struct = JobData.from_json(datum['json_blob'])
+                    job_struct = self._get_job_struct(datum)
                     job = job_struct['job']
                 else:
                     job = datum['job']
 
                 job_guid = str(job['job_guid'])
-                states[str(job['state'])].append(job_guid)
+                state = str(job['state'])
+                states[state].append(job_guid)
 
                 # index this place in the ``data`` object
-                data_idx.append(job_guid)
+                data_idx.append((job_guid, state))
 
             except Exception:
                 data_idx.append("skipped")
@@ -1424,7 +1954,16 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
                 # to ``new_data`` so that the error can be handled
                 # in ``load_job_data``.
 
+        job_state_cache = None
+        existing_jobs = set()
+        if settings.JOB_STATE_CACHE_SIZE:
+            job_state_cache = get_job_state_cache(self.project)
+            existing_jobs = job_state_cache.get_known(
+                job for job in data_idx if job != "skipped")
+
         for state, guids in states.items():
+            guids = [guid for guid in guids
+                     if (guid, state) not in existing_jobs]
             if guids:
                 placeholders.append(state)
                 placeholders.extend(guids)
@@ -1434,22 +1973,24 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
                     )
                 )
 
-        replacement = ' OR '.join(state_clauses)
-
         if placeholders:
-            existing_guids = self.jobs_execute(
-                proc='jobs.selects.get_job_guids_in_states',
-                placeholders=placeholders,
-                replace=[replacement],
-                key_column='job_guid',
-                return_type='set',
-                debug_show=self.DEBUG,
+            replacement = ' OR '.join(state_clauses)
+            stored_jobs = set(
+                (job['job_guid'], job['state']) for job in self.jobs_execute(
+                    proc='jobs.selects.get_job_guids_in_states',
+                    placeholders=placeholders,
+                    replace=[replacement],
+                    debug_show=self.DEBUG,
+                )
             )
+            if job_state_cache is not None:
+                job_state_cache.add(stored_jobs)
+            existing_jobs.update(stored_jobs)
 
-            # build a new list of jobs without those we already have loaded
-            for i, guid in enumerate(data_idx):
-                if guid not in existing_guids:
-                    new_data.append(data[i])
+        # build a new list of jobs without those we already have loaded
+        for i, job in enumerate(data_idx):
+            if job not in existing_jobs:
+                new_data.append(data[i])
 
         return new_data
 
@@ -1827,6 +2368,9 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
                 # Replace job_guid with id
                 log_placeholders[index][0] = job_id
                 log_placeholders[index].append(time_now)
+                # job_log_url is partitioned on the submit timestamp of the job
+                log_placeholders[index].append(
+                    job_id_lookup[job_guid]['submit_timestamp'])
                 task = dict()
 
                 # a log can be submitted already parsed.  So only schedule
@@ -1925,23 +2469,46 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
             placeholders=[parse_status, parse_timestamp, job_log_url_id])
 
     def get_performance_series_from_signatures(self, signatures, interval_seconds):
-
+        """
+        Return the points of the series of ``signatures`` pushed in the
+        last ``interval_seconds``, most recent result set first.
+        """
         repl = [','.join(['%s'] * len(signatures))]
-        placeholders = signatures
-        placeholders.append(str(interval_seconds))
+        placeholders = list(signatures)
+        placeholders.append(utils.get_now_timestamp() - interval_seconds)
 
-        data = self.jobs_execute(
+        points = self.jobs_execute(
             proc="jobs.selects.get_performance_series_from_signatures",
             debug_show=self.DEBUG,
             placeholders=placeholders,
             replace=repl)
 
-        data = [{"series_signature": x["series_signature"],
-                 "blob": json.loads(x["blob"])} for x in data]
+        data = []
+        for point in points:
+            signature = point.pop('series_signature')
+            if not data or data[-1]['series_signature'] != signature:
+                data.append({"series_signature": signature, "blob": []})
+            # the summary series only have a geomean, the test series
+            # everything else
+            data[-1]['blob'].append(dict(
+                (key, value) for key, value in point.items()
+                if value is not None))
 
         return data
 
     def get_signatures_from_properties(self, props):
+        """
+        Return the properties of the signatures having all the ``props``
+        property/value pairs.
+
+        With ``PERF_SIGNATURE_INDEX_ENABLED`` the signatures are looked up
+        in the in-process signature index instead of the database.
+        """
+        if settings.PERF_SIGNATURE_INDEX_ENABLED:
+            index = get_perf_signature_index(self.project)
+            index.refresh(self)
+            return (index.get_signatures_from_properties(props) or
+                    {"success": False})
 
         props_where_repl = [
             ' OR '.join(['(`property`=%s AND `value`=%s)'] * len(props)),
@@ -1980,6 +2547,20 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
         return ret
 
     def get_signature_properties(self, signatures):
+        if settings.PERF_SIGNATURE_INDEX_ENABLED:
+            index = get_perf_signature_index(self.project)
+            index.refresh(self)
+            ret = []
+            for signature in signatures:
+                properties = index.get_signature_properties(signature)
+                if not properties:
+                    return ObjectNotFoundException("signature", id=signature)
+                if 'subtest_signatures' in properties:
+                    properties['subtest_signatures'] = json.loads(
+                        properties['subtest_signatures'])
+                ret.append(properties)
+            return ret
+
         signatures_repl = [','.join(['%s'] * len(signatures))]
 
         properties = self.jobs_execute(
@@ -2010,9 +2591,11 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
 
     def set_series_signature(self, signature_hash, signature_props):
         signature_property_placeholders = []
+        stored_props = {}
         for (k, v) in signature_props.iteritems():
             if k == 'subtest_signatures':
                 v = json.dumps(v)
+            stored_props[str(k)] = str(v)
             signature_property_placeholders.append([
                 str(signature_hash), str(k), str(v),
                 str(signature_hash), str(k), str(v),
@@ -2024,99 +2607,40 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
             placeholders=signature_property_placeholders,
             executemany=True)
 
-    def store_performance_series(
-            self, t_range, series_type, signature, series_data):
+        publish_signatures(self.project, {str(signature_hash): stored_props})
 
-        lock_string = "sps_{0}_{1}_{2}".format(
-            t_range, series_type, signature)
-
-        # Use MySQL GETLOCK function to gaurd against concurrent celery tasks
-        # overwriting each other's blobs. The lock incorporates the time
-        # interval and signature combination and is specific to a single
-        # json blob.
-        lock = self.jobs_execute(
-            proc='generic.locks.get_lock',
-            debug_show=self.DEBUG,
-            placeholders=[lock_string, 60])
+    def store_performance_points(self, series_data):
+        """
+        Append the points of ``series_data``, a dict of signature to list
+        of points, to the series of each signature.
 
-        if lock[0]['lock'] != 1:
-            logger.error(
-                'store_performance_series lock_string, '
-                '{0}, timed out!'.format(lock_string)
-            )
+        There is a single point per series and job, so the points already
+        stored are ignored.  The series of every time interval are read
+        from the same points.
+        """
+        point_placeholders = []
+        last_pushes = {}
+        for signature, points in series_data.items():
+            for datum in points:
+                push_timestamp = int(datum['push_timestamp'])
+                point_placeholders.append([
+                    signature, datum['job_id'], datum['result_set_id'],
+                    push_timestamp, datum.get('total_replicates'),
+                    datum.get('min'), datum.get('max'), datum.get('mean'),
+                    datum.get('std'), datum.get('median'), datum.get('geomean')])
+                last_pushes[signature] = max(last_pushes.get(signature, 0),
+                                             push_timestamp)
+
+        if not point_placeholders:
             return
 
-        try:
-            now_timestamp = int(time.time())
-
-            # If we don't have this t_range/signature combination create it
-            series_data_json = json.dumps(series_data)
-            insert_placeholders = [
-                t_range, signature, series_type, now_timestamp,
-                series_data_json, t_range, signature
-            ]
-
-            self.jobs_execute(
-                proc='jobs.inserts.set_performance_series',
-                debug_show=self.DEBUG,
-                placeholders=insert_placeholders)
-
-            # delete any previous instance of the cached copy of the perf
-            # series summary, since it's now out of date
-            cache.delete(self.get_performance_series_cache_key(self.project,
-                                                               t_range))
-
-            # Retrieve and update the series
-            performance_series = self.jobs_execute(
-                proc='jobs.selects.get_performance_series',
-                debug_show=self.DEBUG,
-                placeholders=[t_range, signature])
-
-            db_series_json = performance_series[0]['blob']
-
-            # If they're equal this was the first time the t_range
-            # and signature combination was stored, so there's nothing to
-            # do
-            if series_data_json != db_series_json:
-
-                series = json.loads(db_series_json)
-                push_timestamp_limit = now_timestamp - int(t_range)
-
-                series.extend(series_data)
-
-                sorted_series = sorted(
-                    series, key=itemgetter('result_set_id'), reverse=True
-                )
-
-                filtered_series = filter(
-                    lambda d: d['push_timestamp'] >= push_timestamp_limit,
-                    sorted_series
-                )
-
-                if filtered_series:
-
-                    filtered_series_json = json.dumps(filtered_series)
-                    update_placeholders = [
-                        now_timestamp, filtered_series_json,
-                        t_range, signature
-                    ]
-
-                    self.jobs_execute(
-                        proc='jobs.updates.update_performance_series',
-                        debug_show=self.DEBUG,
-                        placeholders=update_placeholders)
-
-        except Exception as e:
-
-            raise e
+        self.jobs_execute(
+            proc='jobs.inserts.set_performance_point',
+            debug_show=self.DEBUG,
+            placeholders=point_placeholders,
+            executemany=True)
 
-        finally:
-            # Make sure we release the lock no matter what errors
-            # are generated
-            self.jobs_execute(
-                proc='generic.locks.release_lock',
-                debug_show=self.DEBUG,
-                placeholders=[lock_string])
+        self.update_performance_series_summaries(last_pushes)
 
     def _get_last_insert_id(self, contenttype="jobs"):
         """Return last-inserted ID."""
@@ -2199,6 +2723,64 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
 
         return json_blobs
 
+    def get_objectstore_connection_id(self):
+        """Return the id of the connection to the objectstore."""
+        return self.os_execute(
+            proc='objectstore.selects.get_connection_id',
+            debug_show=self.DEBUG
+        )[0]['connection_id']
+
+    def claim_objects_for_worker(self, limit, worker_id):
+        """
+        Claim & return up to ``limit`` unprocessed blobs from the objectstore
+        on behalf of the objectstore connection ``worker_id``.
+
+        Only that connection can then mark the blobs as complete or errored,
+        so the blobs can be claimed and loaded over two connections.  As
+        with ``claim_objects``, all the blobs claimed for ``worker_id`` that
+        aren't complete yet are returned.
+        """
+        filterwarnings('ignore', category=MySQLdb.Warning)
+
+        self.os_execute(
+            proc='objectstore.updates.mark_loading_for_worker',
+            placeholders=[worker_id, limit],
+            debug_show=self.DEBUG,
+        )
+
+        resetwarnings()
+
+        return self.os_execute(
+            proc='objectstore.selects.get_claimed_by_worker',
+            placeholders=[worker_id],
+            debug_show=self.DEBUG,
+            return_type='tuple'
+        )
+
+    def release_objects(self, worker_id):
+        """
+        Mark the blobs claimed for ``worker_id`` that weren't loaded as
+        ready again.
+        """
+        self.os_execute(
+            proc='objectstore.updates.release_claimed',
+            placeholders=[worker_id],
+            debug_show=self.DEBUG
+        )
+
+    def get_objectstore_lag(self):
+        """
+        Return how many seconds the oldest unprocessed blob has been
+        waiting in the objectstore.
+        """
+        oldest = self.os_execute(
+            proc='objectstore.selects.get_oldest_unprocessed_timestamp',
+            debug_show=self.DEBUG
+        )[0]['loaded_timestamp']
+        if oldest is None:
+            return 0
+        return max(0, utils.get_now_timestamp() - oldest)
+
     def mark_objects_complete(self, object_placeholders):
         """ Call to database to mark the task completed
 
@@ -2300,11 +2882,8 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
 
             revision_hash_placeholders.append(
                 [
-                    result.get('author', 'unknown@somewhere.com'),
                     result['revision_hash'],
-                    result['push_timestamp'],
-                    result.get('active_status', 'active'),
-                    result['revision_hash']
+                    result['push_timestamp']
                 ]
             )
             where_in_list.append('%s')
@@ -2365,15 +2944,45 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
             debug_show=self.DEBUG
         )
 
-        # Insert new result sets
+        # Allocate the ids of the new result sets.  result_set is
+        # partitioned, so it can't keep the revision hashes unique itself
         self.jobs_execute(
-            proc='jobs.inserts.set_result_set',
+            proc='jobs.inserts.set_result_set_revision_hash',
             placeholders=revision_hash_placeholders,
             executemany=True,
             debug_show=self.DEBUG
         )
+        revision_hash_ids = self.jobs_execute(
+            proc='jobs.selects.get_result_set_revision_hash_ids',
+            placeholders=unique_revision_hashes,
+            replace=[where_in_clause],
+            key_column='revision_hash',
+            return_type='dict',
+            debug_show=self.DEBUG
+        )
 
-        lastrowid = self.get_jobs_dhub().connection['master_host']['cursor'].lastrowid
+        # Insert new result sets, a result set inserted concurrently with
+        # the same id is ignored
+        result_set_placeholders = []
+        for result in result_sets:
+            revision_hash = revision_hash_ids[result['revision_hash']]
+            result_set_placeholders.append(
+                [
+                    revision_hash['id'],
+                    result.get('author', 'unknown@somewhere.com'),
+                    result['revision_hash'],
+                    revision_hash['push_timestamp'],
+                    result.get('active_status', 'active')
+                ]
+            )
+        self.jobs_execute(
+            proc='jobs.inserts.set_result_set',
+            placeholders=result_set_placeholders,
+            executemany=True,
+            debug_show=self.DEBUG
+        )
+
+        rowcount = self.get_jobs_dhub().connection['master_host']['cursor'].rowcount
 
         # Retrieve new and already existing result set ids
         result_set_id_lookup = self.jobs_execute(
@@ -2393,10 +3002,10 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
 
         inserted_result_set_ids = []
 
-        # If cursor.lastrowid is > 0 rows were inserted on this
+        # If cursor.rowcount is > 0 rows were inserted on this
         # cursor. When new rows are inserted, determine the new
         # result_set ids and submit publish to pulse tasks.
-        if inserted_result_sets and lastrowid > 0:
+        if inserted_result_sets and rowcount > 0:
 
             for revision_hash in inserted_result_sets:
                 inserted_result_set_ids.append(
@@ -2464,50 +3073,397 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
             "push_timestamp"
         ]
 
-    def get_exclusion_profile_signatures(self, exclusion_profile):
-        """Retrieve the reference data signatures associates to an exclusion profile"""
-        signatures = []
+    def _get_exclusion_profile_condition(self, exclusion_profile,
+                                         signature_column):
+        """
+        Return the sql condition filtering out the jobs hidden by
+        ``exclusion_profile``, and its placeholders.
+
+        The signatures of the profile are looked up in the
+        ``exclusion_profile_signature`` table, refreshed every time the
+        profile changes.  No job is hidden if the profile doesn't exist.
+        """
+        if exclusion_profile == "default":
+            profile_condition = "ep.is_default = 1"
+            placeholders = []
+        else:
+            profile_condition = "ep.name = %s"
+            placeholders = [exclusion_profile]
+
+        condition = """ AND NOT EXISTS (
+            SELECT 1 FROM `{0}`.`exclusion_profile_signature` as eps
+            JOIN `{0}`.`exclusion_profile` as ep
+              ON ep.id = eps.exclusion_profile_id
+            WHERE {1}
+            AND eps.repository = %s
+            AND eps.signature = {2})""".format(
+            self.refdata_model.get_db_name(), profile_condition,
+            signature_column)
+
+        return condition, placeholders + [self.project]
+
+    def _get_exclusion_profile_versions(self):
+        """
+        Return the exclusion profiles with the version of their signatures
+        for this project.
+
+        The version is the highest id of the ``exclusion_profile_signature``
+        rows of the profile: they are all replaced when the profile
+        changes, so a new version means the counts computed with the old
+        signatures are stale.
+        """
+        return self.jobs_execute(
+            proc='jobs.selects.get_exclusion_profile_versions',
+            placeholders=[self.project],
+            replace=[self.refdata_model.get_db_name()],
+            debug_show=self.DEBUG)
+
+    @contextmanager
+    def _result_set_job_counts_lock(self, timeout=None):
+        """
+        Hold the named lock serializing the changes to the job counts of
+        this project.
+
+        Raise ``JobCountsLockError`` if the lock is not acquired within
+        ``timeout`` seconds, ``JOB_COUNTS_LOCK_TIMEOUT`` by default, so the
+        changes are retried rather than counted twice.
+        """
+        if timeout is None:
+            timeout = self.JOB_COUNTS_LOCK_TIMEOUT
+        lock_name = "{0}_result_set_job_count".format(self.project)
+        locked = self.jobs_execute(
+            proc='generic.locks.get_lock',
+            placeholders=[lock_name, timeout],
+            debug_show=self.DEBUG)[0]['lock']
+        if not locked:
+            raise JobCountsLockError(
+                "Timed out waiting for the job counts lock of {0}".format(
+                    self.project))
         try:
-            if exclusion_profile == "default":
-                profile = ExclusionProfile.objects.get(
-                    is_default=True
-                )
-            else:
-                profile = ExclusionProfile.objects.get(
-                    name=exclusion_profile
-                )
-            signatures = profile.flat_exclusion[self.project]
-        except KeyError:
-            # this repo/project has no hidden signatures
-            pass
-        except ExclusionProfile.DoesNotExist:
-            # Either there's no default profile setup or the profile
-            # specified is not availble
-            pass
-        return signatures
+            yield
+        finally:
+            self.jobs_execute(
+                proc='generic.locks.release_lock',
+                placeholders=[lock_name],
+                debug_show=self.DEBUG)
+
+    def _get_job_count_states(self, job_guids=(), job_ids=(),
+                              incomplete_result_set_id=None):
+        """
+        Return the result set, signature, state, result and coalescing of
+        the given jobs, keyed by job id.
+        """
+        rows = []
+        job_guids = list(job_guids)
+        if job_guids:
+            rows.extend(self.jobs_execute(
+                proc='jobs.selects.get_job_count_states_by_guids',
+                placeholders=job_guids,
+                replace=[','.join(['%s'] * len(job_guids))],
+                debug_show=self.DEBUG))
+        job_ids = list(job_ids)
+        if job_ids:
+            rows.extend(self.jobs_execute(
+                proc='jobs.selects.get_job_count_states_by_ids',
+                placeholders=job_ids,
+                replace=[','.join(['%s'] * len(job_ids))],
+                debug_show=self.DEBUG))
+        if incomplete_result_set_id is not None:
+            rows.extend(self.jobs_execute(
+                proc='jobs.selects.get_incomplete_job_count_states',
+                placeholders=[incomplete_result_set_id],
+                debug_show=self.DEBUG))
+        return dict((row['id'], row) for row in rows)
+
+    @contextmanager
+    def _count_job_changes(self, job_guids=(), job_ids=(),
+                           incomplete_result_set_id=None):
+        """
+        Add the changes made in the block to the given jobs, or to the
+        incomplete jobs of ``incomplete_result_set_id``, to the job counts
+        of their result sets.
+
+        The jobs are read before and after the block, under the job counts
+        lock, so the changes made concurrently to the same jobs are only
+        counted once.  If the lock can't be acquired, the block is not run
+        and ``JobCountsLockError`` is raised.
+        """
+        if not (job_guids or job_ids or incomplete_result_set_id is not None):
+            yield
+            return
+
+        with self._result_set_job_counts_lock():
+            before = self._get_job_count_states(job_guids, job_ids,
+                                                incomplete_result_set_id)
+            try:
+                yield
+            finally:
+                # the jobs read before are read again by id, since an
+                # update can change the guid of a retried job
+                after = self._get_job_count_states(
+                    job_guids, list(before) + list(job_ids))
+                self._add_job_count_changes(before, after)
+
+    def _add_job_count_changes(self, before, after):
+        """
+        Add the difference between the job states ``before`` and ``after``
+        to the stored job counts, for all the jobs and for every exclusion
+        profile.
+
+        The counts of the result sets which don't have any stored for a
+        profile, like new pushes, or an edited profile, are computed from
+        the jobs instead.
+        """
+        changes = defaultdict(lambda: [0, 0])
+        for job_id in set(before) | set(after):
+            for job, sign in ((before.get(job_id), -1),
+                              (after.get(job_id), 1)):
+                if not job:
+                    continue
+                key = (job['result_set_id'], job['signature'], job['state'],
+                       job['result'] or '')
+                changes[key][0] += sign
+                changes[key][1] += sign if job['job_coalesced_to_guid'] else 0
+        changes = dict((key, change) for key, change in changes.items()
+                       if change != [0, 0])
+        if not changes:
+            return
+
+        result_set_ids = list(set(key[0] for key in changes))
+        signatures = list(set(key[1] for key in changes if key[1]))
+        profiles = [{'id': 0, 'version': 0}]
+        profiles.extend(self._get_exclusion_profile_versions())
+
+        excluded = set()
+        if signatures:
+            excluded = set(
+                (row['exclusion_profile_id'], row['signature'])
+                for row in self.jobs_execute(
+                    proc='jobs.selects.get_excluded_signatures',
+                    placeholders=[self.project] + signatures,
+                    replace=[self.refdata_model.get_db_name(),
+                             ','.join(['%s'] * len(signatures))],
+                    debug_show=self.DEBUG))
+        stored = set(
+            (row['result_set_id'], row['exclusion_profile_id'],
+             row['exclusion_profile_version'])
+            for row in self.jobs_execute(
+                proc='jobs.selects.get_stored_resultset_job_count_keys',
+                placeholders=result_set_ids,
+                replace=[','.join(['%s'] * len(result_set_ids))],
+                debug_show=self.DEBUG))
+
+        counted = defaultdict(lambda: [0, 0])
+        missing = defaultdict(set)
+        for profile in profiles:
+            for (result_set_id, signature, state, result), (total, num_coalesced) in changes.items():
+                if (result_set_id, profile['id'], profile['version']) not in stored:
+                    missing[profile['id']].add(result_set_id)
+                    continue
+                if (profile['id'], signature) in excluded:
+                    continue
+                count = counted[(result_set_id, profile['id'],
+                                 profile['version'], state, result)]
+                count[0] += total
+                count[1] += num_coalesced
+
+        placeholders = [
+            list(count_key) + [total, num_coalesced, total, num_coalesced]
+            for count_key, (total, num_coalesced) in counted.items()
+            if total or num_coalesced]
+        if placeholders:
+            self.jobs_execute(
+                proc='jobs.inserts.add_result_set_job_count',
+                placeholders=placeholders,
+                executemany=True,
+                debug_show=self.DEBUG)
+
+        for profile in profiles:
+            if profile['id'] in missing:
+                self._store_resultset_job_counts(self._get_resultset_job_counts(
+                    list(missing[profile['id']]), [profile]))
+
+    def _store_resultset_job_counts(self, counts):
+        """Store the job ``counts``, replacing the counts already stored."""
+        placeholders = [
+            [key[0], key[1], key[2], row['state'], row['result'],
+             row['total'], row['num_coalesced']]
+            for key, rows in counts.items() for row in rows]
+        if placeholders:
+            self.jobs_execute(
+                proc='jobs.inserts.set_result_set_job_count',
+                placeholders=placeholders,
+                executemany=True,
+                debug_show=self.DEBUG)
+
+    def update_resultset_job_counts(self, result_set_ids):
+        """
+        Recompute the job counts of the given result sets, for all the jobs
+        and for every exclusion profile, and store them in the
+        ``result_set_job_count`` table.
+
+        Return the rows stored, keyed by ``(result_set_id,
+        exclusion_profile_id, exclusion_profile_version)``.
+        """
+        result_set_ids = list(set(result_set_ids))
+        if not result_set_ids:
+            return {}
+
+        with self._result_set_job_counts_lock():
+            counts = self._get_resultset_job_counts(result_set_ids)
+
+            # the counts which are gone are zeroed, the others replaced
+            self.jobs_execute(
+                proc='jobs.updates.reset_result_set_job_counts',
+                placeholders=result_set_ids,
+                replace=[','.join(['%s'] * len(result_set_ids))],
+                debug_show=self.DEBUG)
+            self._store_resultset_job_counts(counts)
+
+        return counts
+
+    def _get_resultset_job_counts(self, result_set_ids, profiles=None):
+        """
+        Count the jobs of the given result sets from the ``job`` table, the
+        same way they are stored, for all the jobs and for every exclusion
+        profile, or only for ``profiles``.
+        """
+        if profiles is None:
+            profiles = [{'id': 0, 'version': 0}]
+            profiles.extend(self._get_exclusion_profile_versions())
+
+        rs_where_in_clause = ','.join(['%s'] * len(result_set_ids))
+        counts = {}
+        for profile in profiles:
+            condition, condition_placeholders = "", []
+            if profile['id']:
+                condition, condition_placeholders = \
+                    self._get_exclusion_profile_condition(profile['name'],
+                                                          "job.signature")
+            rows = self.jobs_execute(
+                proc='jobs.selects.get_resultset_job_counts',
+                placeholders=result_set_ids + condition_placeholders,
+                replace=[rs_where_in_clause, condition],
+                debug_show=self.DEBUG)
+            for row in rows:
+                counts.setdefault(
+                    (row['result_set_id'], profile['id'], profile['version']),
+                    []).append({
+                        'state': row['state'],
+                        'result': row['result'] or '',
+                        'total': int(row['total']),
+                        'num_coalesced': int(row['num_coalesced'] or 0)
+                    })
+        return counts
+
+    def get_resultset_job_count_diffs(self, result_set_ids):
+        """
+        Compare the stored job counts of the given result sets with the
+        counts computed from the ``job`` table.
+
+        Return a list of ``(result_set_id, exclusion_profile_id, stored,
+        expected)`` for every count that differs, where ``stored`` and
+        ``expected`` map ``(state, result)`` to ``(total, num_coalesced)``.
+        The counts stored for an older version of a profile are left out,
+        they are recomputed the next time the jobs of the result set change.
+        """
+        result_set_ids = list(set(result_set_ids))
+        if not result_set_ids:
+            return []
+
+        rs_where_in_clause = ','.join(['%s'] * len(result_set_ids))
+        stored = {}
+        for row in self.jobs_execute(
+                proc='jobs.selects.get_stored_resultset_job_counts',
+                placeholders=result_set_ids,
+                replace=[rs_where_in_clause],
+                debug_show=self.DEBUG):
+            if not row['total']:
+                continue
+            key = (row['result_set_id'], row['exclusion_profile_id'],
+                   row['exclusion_profile_version'])
+            stored.setdefault(key, {})[(row['state'], row['result'])] = (
+                int(row['total']), int(row['num_coalesced']))
+
+        expected = {}
+        for key, rows in self._get_resultset_job_counts(result_set_ids).items():
+            expected[key] = dict(
+                ((row['state'], row['result']),
+                 (row['total'], row['num_coalesced'])) for row in rows)
+
+        versions = dict((profile['id'], profile['version'])
+                        for profile in self._get_exclusion_profile_versions())
+        versions[0] = 0
+
+        diffs = []
+        for key in sorted(set(stored) | set(expected)):
+            result_set_id, profile_id, version = key
+            if versions.get(profile_id) != version:
+                continue
+            if stored.get(key, {}) != expected.get(key, {}):
+                diffs.append((result_set_id, profile_id, stored.get(key, {}),
+                              expected.get(key, {})))
+        return diffs
+
+    def get_counted_result_set_ids(self):
+        """Return the ids of the result sets having stored job counts."""
+        return [row['result_set_id'] for row in self.jobs_execute(
+            proc='jobs.selects.get_counted_result_set_ids',
+            debug_show=self.DEBUG)]
+
+    def _store_missing_resultset_job_counts(self, result_set_id, profile):
+        """
+        Compute the job counts of ``result_set_id`` for ``profile`` from
+        the jobs, and store them if the job counts lock is free.
+
+        The counts are computed under the lock, so they can't overwrite the
+        changes counted meanwhile; if it is held, they are only returned.
+        """
+        key = (result_set_id, profile['id'], profile['version'])
+        try:
+            with self._result_set_job_counts_lock(timeout=0):
+                counts = self._get_resultset_job_counts([result_set_id],
+                                                        [profile])
+                # an empty result set is stored as no jobs pending, so it
+                # isn't counted again on every read
+                counts.setdefault(key, [{'state': 'pending', 'result': '',
+                                         'total': 0, 'num_coalesced': 0}])
+                self._store_resultset_job_counts(counts)
+        except JobCountsLockError:
+            counts = self._get_resultset_job_counts([result_set_id], [profile])
+        return counts.get(key, [])
 
     def get_resultset_status(self, resultset_id, exclusion_profile="default"):
         """Retrieve an aggregated job count for the given resultset.
-        If an exclusion profile is provided, the job counted will be filtered accordingly"""
-        replace = []
-        placeholders = [resultset_id]
+        If an exclusion profile is provided, the job counted will be filtered accordingly
+
+        The counts are read from the ``result_set_job_count`` table.  The
+        counts missing there, because they are stale or not stored yet, are
+        computed from the jobs and stored, unless the job counts are being
+        changed concurrently."""
+        profile = {'id': 0, 'version': 0}
         if exclusion_profile:
-            signature_list = self.get_exclusion_profile_signatures(exclusion_profile)
-            if signature_list:
-                signatures_replacement = ",".join(["%s"] * len(signature_list))
-                replace.append(
-                    "AND signature NOT IN ({0})".format(signatures_replacement)
-                )
-                placeholders += signature_list
+            for candidate in self._get_exclusion_profile_versions():
+                if (candidate['is_default'] if exclusion_profile == "default"
+                        else candidate['name'] == exclusion_profile):
+                    profile = candidate
+                    break
+        key = (resultset_id, profile['id'], profile['version'])
 
         resulset_status_list = self.jobs_execute(
             proc='jobs.selects.get_resultset_status',
-            placeholders=placeholders,
-            replace=replace,
+            placeholders=list(key),
             debug_show=self.DEBUG)
+        if not resulset_status_list:
+            resulset_status_list = self._store_missing_resultset_job_counts(
+                resultset_id, profile)
+
         num_coalesced = 0
         resultset_status_dict = {}
         for rs in resulset_status_list:
+            # the counts zeroed by a recount are kept to mark them stored
+            if not rs['total']:
+                continue
             num_coalesced += rs['num_coalesced'] if rs['num_coalesced'] else 0
             if rs['state'] == 'completed':
                 resultset_status_dict[rs['result']] = int(rs['total']) - rs['num_coalesced']
@@ -2518,6 +3474,10 @@ into chunks of chunk_size size. Returns the number of result sets deleted"""
         return resultset_status_dict
 
 
+class JobCountsLockError(Exception):
+    pass
+
+
 class JobDataError(ValueError):
     pass
 
@@ -2547,7 +3507,7 @@ class JobData(dict):
     def from_json(cls, json_blob):
         """Create ``JobData`` from a JSON string."""
         try:
-            data = json.loads(json_blob)
+            data = utils.json_loads(json_blob)
         except ValueError as e:
             raise JobDataError("Malformed JSON: {0}".format(e))
 
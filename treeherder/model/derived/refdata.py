@@ -9,13 +9,26 @@ import time
 from datetime import timedelta, datetime
 import urllib2
 from django.conf import settings
+from django.core.cache import caches
+from django.utils.encoding import force_bytes
 from datasource.bases.BaseHub import BaseHub
 from datasource.DataHub import DataHub
 
 from treeherder.model import utils
+from treeherder.model.bugscache_index import (bugscache_index,
+                                              bump_bugscache_version)
 
 logger = logging.getLogger(__name__)
 
+# The reference data rows are never updated once stored, so their ids are
+# cached in each process and only the values not seen recently are
+# inserted and selected.
+refdata_id_cache = caches['refdata']
+
+
+def get_refdata_cache_key(table, key):
+    return "{0}:{1}".format(table, sha1(force_bytes(key)).hexdigest())
+
 
 class RefDataManager(object):
 
@@ -134,6 +147,20 @@ class RefDataManager(object):
     def execute(self, **kwargs):
         return utils.retry_execute(self.dhub, logger, **kwargs)
 
+    def get_cached_rows(self, table, keys):
+        """Return the cached rows of ``table`` for ``keys``, by key."""
+        cache_keys = dict((get_refdata_cache_key(table, key), key)
+                          for key in keys)
+        cached = refdata_id_cache.get_many(cache_keys.keys())
+        return dict((cache_keys[cache_key], row)
+                    for cache_key, row in cached.items())
+
+    def cache_rows(self, table, rows):
+        """Cache the ``rows`` of ``table``, a dict of key to row."""
+        refdata_id_cache.set_many(dict(
+            (get_refdata_cache_key(table, key), row)
+            for key, row in rows.items()))
+
     def set_all_reference_data(self):
         """This method executes SQL to store data in all loaded reference
            data structures. It returns lookup dictionaries where the key is
@@ -583,11 +610,21 @@ class RefDataManager(object):
 
         insert_proc = 'reference.inserts.create_reference_data_signature'
 
-        self.execute(
-            proc=insert_proc,
-            placeholders=self.build_signature_placeholders,
-            executemany=True,
-            debug_show=self.DEBUG)
+        cached = self.get_cached_rows('reference_data_signatures',
+                                      self.reference_data_signature_lookup)
+        # the signature is the second placeholder
+        placeholders = [p for p in self.build_signature_placeholders
+                        if p[1] not in cached]
+
+        if placeholders:
+            self.execute(
+                proc=insert_proc,
+                placeholders=placeholders,
+                executemany=True,
+                debug_show=self.DEBUG)
+
+            self.cache_rows('reference_data_signatures',
+                            dict((p[1], True) for p in placeholders))
 
         return self.reference_data_signature_lookup.keys()
 
@@ -600,7 +637,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_build_platforms'
 
         return self._process_platforms(
-            insert_proc, select_proc,
+            'build_platform', insert_proc, select_proc,
             self.build_platform_lookup,
             self.build_platform_placeholders,
             self.build_unique_platforms,
@@ -616,7 +653,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_machine_platforms'
 
         return self._process_platforms(
-            insert_proc, select_proc,
+            'machine_platform', insert_proc, select_proc,
             self.machine_platform_lookup,
             self.machine_platform_placeholders,
             self.machine_unique_platforms,
@@ -632,7 +669,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_job_groups'
 
         return self._process_names_and_symbols(
-            insert_proc, select_proc,
+            'job_group', insert_proc, select_proc,
             self.job_group_lookup,
             self.job_group_placeholders,
             self.job_group_names_and_symbols,
@@ -648,7 +685,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_job_types'
 
         job_type_lookup = self._process_names_and_symbols(
-            insert_proc, select_proc,
+            'job_type', insert_proc, select_proc,
             self.job_type_lookup,
             self.job_type_placeholders,
             self.job_type_names_and_symbols,
@@ -686,7 +723,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_products'
 
         return self._process_names(
-            insert_proc, select_proc,
+            'product', insert_proc, select_proc,
             self.product_where_in_list,
             self.product_placeholders,
             self.unique_products
@@ -701,7 +738,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_devices'
 
         return self._process_names(
-            insert_proc, select_proc,
+            'device', insert_proc, select_proc,
             self.device_where_in_list,
             self.device_placeholders,
             self.unique_devices
@@ -715,6 +752,24 @@ class RefDataManager(object):
         if not self.machine_name_placeholders:
             return {}
 
+        # The last_timestamp of the cached machines is only updated once
+        # their cache entry expires.
+        cached = self.get_cached_rows('machine', self.machine_unique_names)
+        if cached:
+            self.machine_name_placeholders = [
+                p for p in self.machine_name_placeholders
+                if p[0] not in cached]
+            self.machine_unique_names = [
+                name for name in self.machine_unique_names
+                if name not in cached]
+            self.machine_where_in_list = ['%s'] * len(self.machine_unique_names)
+            self.machine_timestamp_update_placeholders = [
+                p for p in self.machine_timestamp_update_placeholders
+                if p[1] not in cached]
+
+            if not self.machine_name_placeholders:
+                return cached
+
         # Convert WHERE filters to string
         where_in_clause = ",".join(self.machine_where_in_list)
 
@@ -762,6 +817,9 @@ class RefDataManager(object):
             executemany=True,
             debug_show=self.DEBUG)
 
+        self.cache_rows('machine', name_lookup)
+        name_lookup.update(cached)
+
         return name_lookup
 
     def process_option_collections(self):
@@ -769,33 +827,57 @@ class RefDataManager(object):
         Process option collection data
         """
 
+        if not self.oc_hash_lookup:
+            return {}
+
+        # Only the options of the collections not seen recently are needed
+        cached_collections = self.get_cached_rows('option_collection',
+                                                  self.oc_hash_lookup)
+        new_collections = dict(
+            (oc_hash, options) for oc_hash, options in self.oc_hash_lookup.items()
+            if oc_hash not in cached_collections)
+        if not new_collections:
+            return self.oc_hash_lookup
+
+        needed_options = set()
+        for options in new_collections.values():
+            needed_options.update(options)
+        option_id_lookup = self.get_cached_rows('option', needed_options)
+
         # Store options not seen yet
-        o_where_in_clause = ",".join(self.o_where_in_list)
-        option_id_lookup = self._get_or_create_options(
+        self.o_unique_options = [o for o in self.o_unique_options
+                                 if o in needed_options and
+                                 o not in option_id_lookup]
+        self.o_placeholders = [[o, o] for o in self.o_unique_options]
+        o_where_in_clause = ",".join(['%s'] * len(self.o_unique_options))
+        new_options = self._get_or_create_options(
             self.o_placeholders, self.o_unique_options, o_where_in_clause
         )
+        self.cache_rows('option', new_options)
+        option_id_lookup.update(new_options)
 
         # Get the list of option collection placeholders
-        for oc_hash in self.oc_hash_lookup:
-            for o in self.oc_hash_lookup[oc_hash]:
+        for oc_hash in new_collections:
+            for o in new_collections[oc_hash]:
                 self.oc_placeholders.append([
                     oc_hash, option_id_lookup[o]['id'], oc_hash,
                     option_id_lookup[o]['id']
                 ])
 
-        if not self.oc_placeholders:
-            return {}
+        if self.oc_placeholders:
+            self.execute(
+                proc='reference.inserts.create_option_collection',
+                placeholders=self.oc_placeholders,
+                executemany=True,
+                debug_show=self.DEBUG)
 
-        self.execute(
-            proc='reference.inserts.create_option_collection',
-            placeholders=self.oc_placeholders,
-            executemany=True,
-            debug_show=self.DEBUG)
+        self.cache_rows('option_collection',
+                        dict((oc_hash, True) for oc_hash in new_collections))
 
         return self.oc_hash_lookup
 
     def _process_platforms(
-            self, insert_proc, select_proc, platform_lookup,
+            self, table, insert_proc, select_proc, platform_lookup,
             platform_placeholders, unique_platforms, where_filters):
         """
         Internal method for processing either build or machine platforms.
@@ -803,6 +885,23 @@ class RefDataManager(object):
         depending on what type of platform is being processed.
         """
 
+        cached = self.get_cached_rows(table, platform_lookup)
+        if cached:
+            for key, platform_id in cached.items():
+                platform_lookup[key]['id'] = platform_id
+
+            # only store and select the platforms not seen recently
+            new_platforms = [platform for key, platform in platform_lookup.items()
+                             if key not in cached]
+            platform_placeholders[:] = [
+                [p['os_name'], p['platform'], p['architecture']] * 2
+                for p in new_platforms]
+            unique_platforms[:] = [
+                value for p in new_platforms
+                for value in (p['os_name'], p['platform'], p['architecture'])]
+            # the filters are all the same
+            where_filters[:] = where_filters[:len(new_platforms)]
+
         if where_filters:
 
             self.execute(
@@ -831,11 +930,15 @@ class RefDataManager(object):
 
                 platform_lookup[key]['id'] = int(data['id'])
 
+            self.cache_rows(table, dict(
+                (key, platform_lookup[key]['id'])
+                for key in platform_lookup if key not in cached))
+
         return platform_lookup
 
     def _process_names(
-            self, insert_proc, select_proc, where_in_list, name_placeholders,
-            unique_names):
+            self, table, insert_proc, select_proc, where_in_list,
+            name_placeholders, unique_names):
         """
         Internal method for processing reference data names. The caller is
         required to provide the appropriate data structures for the target
@@ -845,6 +948,17 @@ class RefDataManager(object):
         if not name_placeholders:
             return {}
 
+        cached = self.get_cached_rows(table, unique_names)
+        if cached:
+            # only store and select the names not seen recently
+            unique_names[:] = [name for name in unique_names
+                               if name not in cached]
+            name_placeholders[:] = [[name, name] for name in unique_names]
+            where_in_list[:] = ['%s'] * len(unique_names)
+
+            if not unique_names:
+                return cached
+
         # Convert WHERE filters to string
         where_in_clause = ",".join(where_in_list)
 
@@ -862,16 +976,34 @@ class RefDataManager(object):
             return_type='dict',
             debug_show=self.DEBUG)
 
+        self.cache_rows(table, name_lookup)
+        name_lookup.update(cached)
+
         return name_lookup
 
     def _process_names_and_symbols(
-            self, insert_proc, select_proc, name_symbol_lookup,
+            self, table, insert_proc, select_proc, name_symbol_lookup,
             name_symbol_placeholders, names_and_symbols, where_filters):
         """
         Internal method for processing reference data names and their associated
         symbols. The caller is required to provide the appropriate data
         structures for the target reference data type.
         """
+        cached = self.get_cached_rows(table, name_symbol_lookup)
+        if cached:
+            name_symbol_lookup.update(cached)
+
+            # only store and select the names not seen recently
+            new_names = [data for key, data in name_symbol_lookup.items()
+                         if key not in cached]
+            name_symbol_placeholders[:] = [
+                [data['name'], data['symbol']] * 2 for data in new_names]
+            names_and_symbols[:] = [
+                value for data in new_names
+                for value in (data['name'], data['symbol'])]
+            # the filters are all the same
+            where_filters[:] = where_filters[:len(new_names)]
+
         if where_filters:
 
             self.execute(
@@ -898,6 +1030,12 @@ class RefDataManager(object):
                 name_symbol_lookup[key] = data
                 name_symbol_lookup[key]['id'] = int(data['id'])
 
+            # job types without a group are updated by process_job_types,
+            # so they're selected again next time
+            self.cache_rows(table, dict(
+                (key, data) for key, data in name_symbol_lookup.items()
+                if key not in cached and data.get('job_group_id', True)))
+
         return name_symbol_lookup
 
     def get_or_create_build_platforms(self, platform_data):
@@ -910,7 +1048,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_build_platforms'
 
         return self._get_or_create_platforms(
-            platform_data, insert_proc, select_proc,
+            'build_platform', platform_data, insert_proc, select_proc,
             self.build_platform_lookup,
             self.build_platform_placeholders,
             self.build_unique_platforms,
@@ -927,7 +1065,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_machine_platforms'
 
         return self._get_or_create_platforms(
-            platform_data, insert_proc, select_proc,
+            'machine_platform', platform_data, insert_proc, select_proc,
             self.machine_platform_lookup,
             self.machine_platform_placeholders,
             self.machine_unique_platforms,
@@ -935,7 +1073,7 @@ class RefDataManager(object):
         )
 
     def _get_or_create_platforms(
-            self, platform_data, insert_proc, select_proc,
+            self, table, platform_data, insert_proc, select_proc,
             platform_lookup, platform_placeholders, unique_platforms,
             where_filters):
         """
@@ -976,7 +1114,7 @@ class RefDataManager(object):
             )
 
         return self._process_platforms(
-            insert_proc, select_proc,
+            table, insert_proc, select_proc,
             platform_lookup,
             platform_placeholders,
             unique_platforms,
@@ -1001,7 +1139,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_job_groups'
 
         return self._get_or_create_names_and_symbols(
-            names, insert_proc, select_proc,
+            'job_group', names, insert_proc, select_proc,
             self.job_group_names_and_symbols,
             self.job_group_placeholders,
             self.job_group_lookup,
@@ -1017,7 +1155,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_job_types'
 
         return self._get_or_create_names_and_symbols(
-            names, insert_proc, select_proc,
+            'job_type', names, insert_proc, select_proc,
             self.job_type_names_and_symbols,
             self.job_type_placeholders,
             self.job_type_lookup,
@@ -1033,7 +1171,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_products'
 
         return self._get_or_create_names(
-            names, insert_proc, select_proc,
+            'product', names, insert_proc, select_proc,
             self.product_lookup, self.product_placeholders,
             self.unique_products, self.product_where_in_list)
 
@@ -1047,7 +1185,7 @@ class RefDataManager(object):
         select_proc = 'reference.selects.get_devices'
 
         return self._get_or_create_names(
-            names, insert_proc, select_proc,
+            'device', names, insert_proc, select_proc,
             self.device_lookup, self.device_placeholders,
             self.unique_devices, self.device_where_in_list)
 
@@ -1077,7 +1215,7 @@ class RefDataManager(object):
 
         return self.process_machines()
 
-    def _get_or_create_names(self,
+    def _get_or_create_names(self, table,
                              names, insert_proc, select_proc,
                              name_lookup, where_in_list, name_placeholders, unique_names):
         """
@@ -1097,12 +1235,12 @@ class RefDataManager(object):
             )
 
         return self._process_names(
-            insert_proc, select_proc, where_in_list, name_placeholders,
+            table, insert_proc, select_proc, where_in_list, name_placeholders,
             unique_names
         )
 
     def _get_or_create_names_and_symbols(
-            self, data, insert_proc, select_proc, names_and_symbols, placeholders,
+            self, table, data, insert_proc, select_proc, names_and_symbols, placeholders,
             name_symbol_lookup, where_filters):
         """
         Takes a list of names and returns a dictionary to be used as a
@@ -1126,7 +1264,7 @@ class RefDataManager(object):
             )
 
         return self._process_names_and_symbols(
-            insert_proc, select_proc, name_symbol_lookup, placeholders,
+            table, insert_proc, select_proc, name_symbol_lookup, placeholders,
             names_and_symbols, where_filters
         )
 
@@ -1321,6 +1459,23 @@ class RefDataManager(object):
             debug_show=self.DEBUG,
             return_type='iter')
 
+    def get_bug_modified_list(self):
+        return self.execute(
+            proc='reference.selects.get_all_bug_modified_times',
+            debug_show=self.DEBUG,
+            return_type='iter')
+
+    def get_bugs(self, bug_ids):
+        """retrieve the bugscache rows of a list of bug ids"""
+        if not bug_ids:
+            return []
+
+        return self.execute(
+            proc='reference.selects.get_bugs',
+            debug_show=self.DEBUG,
+            replace=[",".join(["%s"] * len(bug_ids))],
+            placeholders=list(bug_ids))
+
     def delete_bugs(self, bug_ids):
         """delete a list of bugs given the ids"""
 
@@ -1330,50 +1485,74 @@ class RefDataManager(object):
             replace=[",".join(["%s"] * len(bug_ids))],
             placeholders=list(bug_ids))
 
-    def update_bugscache(self, bug_list):
+        bump_bugscache_version()
+
+    def get_bugscache_last_modified(self):
         """
-        Add content to the bugscache, updating/deleting/inserting
-        when necessary.
+        Return the most recent ``last_change_time`` stored in the bugscache,
+        or None if it's empty.
         """
-        bugs_stored = set(bug["id"] for bug in self.get_bug_numbers_list())
-        old_bugs = bugs_stored.difference(set(bug['id']
-                                              for bug in bug_list))
-        if old_bugs:
-            self.delete_bugs(old_bugs)
+        rows = self.execute(
+            proc='reference.selects.get_bugscache_last_modified',
+            debug_show=self.DEBUG)
+        return rows[0]['last_modified'] if rows else None
+
+    def upsert_bugs(self, bug_list):
+        """
+        Insert the bugs of ``bug_list`` in the bugscache, updating the
+        ones already stored.
+        """
+        if not bug_list:
+            return
 
         placeholders = []
         for bug in bug_list:
-            # keywords come as a list of values, we need a string instead
-            bug['keywords'] = ",".join(bug['keywords'])
             placeholders.append([bug.get(field, None) for field in (
                 'id', 'status', 'resolution', 'summary',
-                'cf_crash_signature', 'keywords', 'op_sys', 'last_change_time', 'id')])
+                'cf_crash_signature')] + [
+                # keywords come as a list of values, we need a string instead
+                ",".join(bug.get('keywords', [])),
+                bug.get('op_sys', None),
+                bug.get('last_change_time', None)])
 
         self.execute(
-            proc='reference.inserts.create_bugscache',
+            proc='reference.inserts.upsert_bugscache',
             placeholders=placeholders,
             executemany=True,
             debug_show=self.DEBUG)
 
-        # removing the first placeholder because is not used in the update query
-        del placeholders[0]
+        bump_bugscache_version()
 
-        self.execute(
-            proc='reference.updates.update_bugscache',
-            placeholders=placeholders,
-            executemany=True,
-            debug_show=self.DEBUG)
+    def update_bugscache(self, bug_list):
+        """
+        Replace the content of the bugscache with ``bug_list``, deleting
+        the bugs not in the list anymore.
+        """
+        bugs_stored = set(bug["id"] for bug in self.get_bug_numbers_list())
+        old_bugs = bugs_stored.difference(set(bug['id']
+                                              for bug in bug_list))
+        if old_bugs:
+            self.delete_bugs(old_bugs)
+
+        self.upsert_bugs(bug_list)
 
     def get_bug_suggestions(self, search_term):
         """
         Retrieves two groups of bugs:
         1) "Open recent bugs" (ie bug is not resolved & was modified in last 3 months)
         2) "All other bugs" (ie all closed bugs + open bugs that were not modified in the last 3 months).
+
+        With ``BUGSCACHE_INDEX_ENABLED`` the bugs matching the search term
+        are looked up in the in-process ``bugscache_index``, and only these
+        are ranked by the database.
         """
+        if settings.BUGSCACHE_INDEX_ENABLED:
+            return self.get_bug_suggestions_for_terms([search_term])[search_term]
 
         max_size = 50
         # 90 days ago
         time_limit = datetime.now() - timedelta(days=90)
+
         # Wrap search term so it is used as a phrase in the full-text search.
         search_term_fulltext = search_term.join('""')
         # Substitute escape and wildcard characters, so the search term is used
@@ -1392,6 +1571,54 @@ class RefDataManager(object):
 
         return dict(open_recent=open_recent, all_others=all_others)
 
+    def get_bug_suggestions_for_terms(self, search_terms):
+        """
+        Retrieves the bug suggestions of several search terms at once.
+
+        Returns a dict of search term to the same two groups of bugs as
+        ``get_bug_suggestions``.  The searches of each batch of
+        ``BUG_SUGGESTIONS_BATCH_SIZE`` terms are combined into a single
+        query.
+
+        With ``BUGSCACHE_INDEX_ENABLED`` the queries only rank the bugs
+        the ``bugscache_index`` found for their search term, unless it
+        found more than ``BUGSCACHE_INDEX_MAX_MATCHES``.
+        """
+        max_size = 50
+        # 90 days ago
+        time_limit = datetime.now() - timedelta(days=90)
+        search_terms = list(set(search_terms))
+
+        suggestions = dict(
+            (search_term, dict(open_recent=[], all_others=[]))
+            for search_term in search_terms)
+
+        bug_ids = {}
+        if settings.BUGSCACHE_INDEX_ENABLED and bugscache_index.refresh(self):
+            for search_term in search_terms:
+                bug_ids[search_term] = bugscache_index.get_matching_bugs(
+                    search_term, settings.BUGSCACHE_INDEX_MAX_MATCHES)
+            # the search terms matching no bug don't need a query
+            search_terms = [search_term for search_term in search_terms
+                            if bug_ids[search_term] != []]
+
+        for i in range(0, len(search_terms), settings.BUG_SUGGESTIONS_BATCH_SIZE):
+            batch = search_terms[i:i + settings.BUG_SUGGESTIONS_BATCH_SIZE]
+
+            union_sql, placeholders = utils.bug_suggestions_union(
+                batch, time_limit, max_size + 1, bug_ids)
+            rows = self.execute(
+                proc='reference.selects.get_bug_suggestions_for_terms',
+                placeholders=placeholders,
+                replace=[union_sql],
+                debug_show=self.DEBUG)
+
+            for row in rows:
+                search_term = batch[row.pop('search_index')]
+                suggestions[search_term][row.pop('bucket')].append(row)
+
+        return suggestions
+
     def get_reference_data_signature(self, signature_properties):
 
         sh = sha1()
@@ -13,6 +13,9 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
+# stay well below the request line limit of gunicorn (4094 bytes)
+MAX_QUERY_STRING_LENGTH = 3000
+
 LEAK_RE = re.compile(r'\d+ bytes leaked \((.+)\)$')
 CRASH_RE = re.compile(r'.+ application crashed \[@ (.+)\]$')
 MOZHARNESS_RE = re.compile(
@@ -29,46 +32,48 @@ def get_error_summary(all_errors):
     error_summary = []
     bugscache_uri = '{0}{1}'.format(
         settings.API_HOSTNAME,
-        reverse("bugscache-list")
+        reverse("bugscache-batch")
+    )
+
+    # remove the mozharness prefix
+    clean_lines = [get_mozharness_substring(err['line']) for err in all_errors]
+    # get a meaningful search term out of each error line
+    line_search_terms = [get_error_search_term(clean_line)
+                         for clean_line in clean_lines]
+
+    # retrieve the suggestions of all the search terms at once
+    terms_requested = get_bugs_for_search_terms(
+        [search_term for search_term in line_search_terms if search_term],
+        bugscache_uri
     )
-    terms_requested = {}
 
-    for err in all_errors:
-        # remove the mozharness prefix
-        clean_line = get_mozharness_substring(err['line'])
+    # for lines without suggestions, try to use the crash signature as
+    # search term
+    crash_signatures = []
+    for clean_line, search_term in zip(clean_lines, line_search_terms):
+        if not has_suggestions(terms_requested.get(search_term)):
+            crash_signature = get_crash_signature(clean_line)
+            if crash_signature and crash_signature not in terms_requested:
+                crash_signatures.append(crash_signature)
+    terms_requested.update(get_bugs_for_search_terms(crash_signatures,
+                                                     bugscache_uri))
+
+    for clean_line, search_term in zip(clean_lines, line_search_terms):
         search_terms = []
-        # get a meaningful search term out of the error line
-        search_term = get_error_search_term(clean_line)
         bugs = dict(open_recent=[], all_others=[])
 
         # collect open recent and all other bugs suggestions
         if search_term:
             search_terms.append(search_term)
-            if search_term not in terms_requested:
-                # retrieve the list of suggestions from the api
-                bugs = get_bugs_for_search_term(
-                    search_term,
-                    bugscache_uri
-                )
-                terms_requested[search_term] = bugs
-            else:
-                bugs = terms_requested[search_term]
-
-        if not bugs or not (bugs['open_recent'] or
-                            bugs['all_others']):
+            bugs = terms_requested.get(search_term)
+
+        if not has_suggestions(bugs):
             # no suggestions, try to use
             # the crash signature as search term
             crash_signature = get_crash_signature(clean_line)
             if crash_signature:
                 search_terms.append(crash_signature)
-                if crash_signature not in terms_requested:
-                    bugs = get_bugs_for_search_term(
-                        crash_signature,
-                        bugscache_uri
-                    )
-                    terms_requested[crash_signature] = bugs
-                else:
-                    bugs = terms_requested[crash_signature]
+                bugs = terms_requested.get(crash_signature)
 
         # TODO: Rename 'search' to 'error_text' or similar, since that's
         # closer to what it actually represents (bug 1091060).
@@ -81,6 +86,10 @@ def get_error_summary(all_errors):
     return error_summary
 
 
+def has_suggestions(bugs):
+    return bool(bugs and (bugs['open_recent'] or bugs['all_others']))
+
+
 def get_mozharness_substring(line):
     return MOZHARNESS_RE.sub('', line).strip()
 
@@ -179,22 +188,40 @@ def is_helpful_search_term(search_term):
     return len(search_term) > 4 and not (search_term in blacklist)
 
 
-def get_bugs_for_search_term(search, base_uri):
+def get_bugs_for_search_terms(search_terms, base_uri):
     """
-    Fetch the base_uri endpoint filtering on search and status.
-    Status must be either 'open' or 'closed'
+    Fetch the suggestions of all ``search_terms`` from the base_uri endpoint.
+
+    The terms are requested in as few requests as the maximum url length
+    allows.  Returns a dict of search term to its suggestions.
     """
     from treeherder.etl.common import get_remote_content
 
-    params = {
-        'search': search
-    }
-    query_string = urllib.urlencode(params)
-    url = '{0}?{1}'.format(
-        base_uri,
-        query_string
-    )
-    return get_remote_content(url)
+    suggestions = {}
+
+    def _fetch(params):
+        url = '{0}?{1}'.format(
+            base_uri,
+            urllib.urlencode(params)
+        )
+        suggestions.update(get_remote_content(url) or {})
+
+    params = []
+    query_length = 0
+    for search_term in sorted(set(search_terms)):
+        param = ('search', search_term)
+        param_length = len(urllib.urlencode([param])) + 1
+        if params and query_length + param_length > MAX_QUERY_STRING_LENGTH:
+            _fetch(params)
+            params = []
+            query_length = 0
+        params.append(param)
+        query_length += param_length
+
+    if params:
+        _fetch(params)
+
+    return suggestions
 
 
 def get_artifacts_that_need_bug_suggestions(artifact_list):
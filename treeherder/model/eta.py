@@ -0,0 +1,295 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import math
+
+from django.core.cache import cache
+
+from treeherder.model.cache_journal import CacheJournal
+from treeherder.model.utils import cache_lock
+
+ETA_STATES = ('pending', 'running')
+
+# how long the samples are kept in the cache for the stats to pick them up;
+# stats falling further behind are computed again from the jobs
+ETA_SAMPLES_TIMEOUT = 24 * 60 * 60
+
+# stats missing more samples than this are computed again from the jobs
+ETA_SAMPLES_MAX_READ = 1000
+
+# a sample entry missing from the cache is considered lost, rather than
+# being written, once this many entries were published after it
+ETA_SAMPLES_MAX_IN_FLIGHT = 50
+
+# the samples of the completed jobs, in a journal per project
+eta_samples_journal = CacheJournal("job-eta-samples")
+
+
+def get_eta_stats_cache_key(project, signature):
+    return "job-eta-stats:{0}:{1}".format(project, signature)
+
+
+def get_eta_position_cache_key(project):
+    return "job-eta-position:{0}".format(project)
+
+
+def get_eta_lock_cache_key(project):
+    return "job-eta-lock:{0}".format(project)
+
+
+class StreamingMedian(object):
+    """
+    Estimate the median of a stream of values in constant space.
+
+    This is the P-square algorithm of Jain and Chlamtac: five markers track
+    the minimum, the maximum, the median and the two quartiles, and their
+    heights are adjusted with a piecewise parabolic interpolation as the
+    values come in.  The median is exact up to five values.
+    """
+
+    # how far each marker should move, relative to the number of values
+    INCREMENTS = (0, 0.25, 0.5, 0.75, 1)
+
+    def __init__(self, heights=None, positions=None, desired=None):
+        self.heights = heights or []
+        self.positions = positions or [1, 2, 3, 4, 5]
+        self.desired = desired or [1, 2, 3, 4, 5]
+
+    def add(self, value):
+        heights = self.heights
+        positions = self.positions
+
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.INCREMENTS[i]
+
+        for i in (1, 2, 3):
+            delta = self.desired[i] - positions[i]
+            if ((delta >= 1 and positions[i + 1] - positions[i] > 1) or
+                    (delta <= -1 and positions[i - 1] - positions[i] < -1)):
+                step = 1 if delta > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        q = self.heights
+        n = self.positions
+        return q[i] + float(step) / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / float(n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / float(n[i] - n[i - 1]))
+
+    def _linear(self, i, step):
+        q = self.heights
+        n = self.positions
+        return q[i] + step * (q[i + step] - q[i]) / float(n[i + step] - n[i])
+
+    @property
+    def median(self):
+        heights = self.heights
+        length = len(heights)
+        if length == 0:
+            return 0
+        if length < 5 and not length % 2:
+            return (heights[length / 2] + heights[length / 2 - 1]) / 2.0
+        return heights[length / 2]
+
+
+class RunningStats(object):
+    """
+    The count, mean, variance, min, max and median of a stream of values.
+
+    The mean and variance are updated with Welford's method, so no sample
+    is kept.  ``started`` is the time the first value was added, used to
+    start over once the sample window is over.
+    """
+
+    def __init__(self, started, count=0, mean=0.0, m2=0.0, min_value=None,
+                 max_value=None, median=None):
+        self.started = started
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min_value = min_value
+        self.max_value = max_value
+        self.median = median or StreamingMedian()
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / float(self.count)
+        self.m2 += delta * (value - self.mean)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        self.median.add(value)
+
+    @property
+    def std(self):
+        """The population standard deviation, like MySQL's ``STD``."""
+        if not self.count:
+            return 0
+        return math.sqrt(self.m2 / self.count)
+
+    def to_dict(self):
+        return {
+            'started': self.started,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'median': (self.median.heights, self.median.positions,
+                       self.median.desired),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['median'] = StreamingMedian(*data['median'])
+        return cls(**data)
+
+
+def add_eta_samples(project, samples, now):
+    """
+    Add the pending and running times of completed jobs to the ETA stats
+    of their signatures.
+
+    ``samples`` is a list of ``(signature, state, seconds)``.  They are
+    published in a journal kept in the cache, without waiting for any
+    lock, and added to the stats by ``get_eta_stats``.
+    """
+    if samples:
+        eta_samples_journal.publish(project, (now, samples),
+                                    ETA_SAMPLES_TIMEOUT)
+
+
+def get_eta_stats(project, now, sample_window_seconds, get_samples):
+    """
+    Return the rows for the ``job_eta`` table of every signature whose
+    stats changed since the last call.
+
+    The samples published since the last call are added to the stats kept
+    in the cache.  If some of them, or some stats, were lost from the
+    cache, or on the first call, the stats are computed again from
+    ``get_samples(since)``, which returns the samples of the jobs submitted
+    since ``since``.
+
+    The stats older than ``sample_window_seconds`` are removed from the
+    cache once returned, so the next samples start a new window.  If the
+    stats are being updated by another call, nothing is returned: the
+    samples are added by the next call.
+    """
+    with cache_lock(get_eta_lock_cache_key(project)) as locked:
+        if not locked:
+            return []
+        return _get_eta_stats(project, now, sample_window_seconds,
+                              get_samples)
+
+
+def _read_samples(project, position):
+    """
+    Return the position of the samples journal of ``project``, and the
+    entries published since ``position``, or None if some were lost or if
+    there is no ``position`` to start from.
+    """
+    epoch, seq = eta_samples_journal.get_position(project)
+    if position is None:
+        return (epoch, seq), None
+
+    last_epoch, last_seq = position
+    if (last_epoch != epoch or last_seq > seq or
+            seq - last_seq > ETA_SAMPLES_MAX_READ):
+        return (epoch, seq), None
+
+    entries = eta_samples_journal.read(project, last_seq + 1, seq)
+    read = []
+    for entry_seq in range(last_seq + 1, seq + 1):
+        if entry_seq not in entries:
+            if seq - entry_seq >= ETA_SAMPLES_MAX_IN_FLIGHT:
+                return (epoch, seq), None
+            # still being written, read it at the next call
+            seq = entry_seq - 1
+            break
+        read.append(entries[entry_seq])
+    return (epoch, seq), read
+
+
+def _get_eta_stats(project, now, sample_window_seconds, get_samples):
+    position_key = get_eta_position_cache_key(project)
+    last_position = cache.get(position_key) or {}
+    position, entries = _read_samples(project, last_position.get('position'))
+
+    keys = dict((get_eta_stats_cache_key(project, signature), signature)
+                for signature in last_position.get('signatures', ()))
+    cached = cache.get_many(keys.keys())
+
+    stats = {}
+    if entries is None or len(cached) < len(keys):
+        # the samples published since the position read are in the jobs
+        # too, a few of them may be counted twice
+        entries = [(now, get_samples(now - sample_window_seconds))]
+    else:
+        for key, states in cached.items():
+            stats[keys[key]] = dict(
+                (state, RunningStats.from_dict(states[state]))
+                for state in ETA_STATES)
+
+    changed = set()
+    for started, samples in entries:
+        for signature, state, seconds in samples:
+            if signature not in stats:
+                stats[signature] = dict((s, RunningStats(started))
+                                        for s in ETA_STATES)
+            stats[signature][state].add(seconds)
+            changed.add(signature)
+
+    rows = []
+    expired = set()
+    for signature in sorted(changed):
+        states = stats[signature]
+        for state in ETA_STATES:
+            state_stats = states[state]
+            if state_stats.count:
+                rows.append([
+                    signature,
+                    state,
+                    int(round(state_stats.mean)),
+                    int(round(state_stats.median.median)),
+                    state_stats.min_value,
+                    state_stats.max_value,
+                    int(round(state_stats.std)),
+                    state_stats.count,
+                    now
+                ])
+        if now - states[ETA_STATES[0]].started >= sample_window_seconds:
+            expired.add(signature)
+
+    cache.set_many(dict(
+        (get_eta_stats_cache_key(project, signature),
+         dict((state, s.to_dict()) for state, s in stats[signature].items()))
+        for signature in changed - expired), None)
+    cache.delete_many([get_eta_stats_cache_key(project, signature)
+                       for signature in expired])
+    cache.set(position_key, {'position': position,
+                             'signatures': set(stats) - expired}, None)
+    return rows
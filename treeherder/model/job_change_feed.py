@@ -0,0 +1,75 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.conf import settings
+
+from treeherder.model.cache_journal import CacheJournal
+
+# a feed entry missing from the cache is considered lost, rather than
+# being written, once this many entries were published after it
+JOB_CHANGE_FEED_MAX_IN_FLIGHT = 50
+
+# the ids of the jobs changed, in a journal per project
+job_change_feed = CacheJournal("job-change-feed")
+
+
+def format_cursor(epoch, seq):
+    return "{0}:{1}".format(epoch, seq)
+
+
+def parse_cursor(cursor):
+    """Return the ``(epoch, seq)`` of ``cursor``, or raise ValueError."""
+    epoch, sep, seq = (cursor or "").rpartition(":")
+    if not epoch:
+        raise ValueError("invalid cursor: {0}".format(cursor))
+    return epoch, int(seq)
+
+
+def publish_job_changes(project, job_ids):
+    """
+    Add the ids of the jobs of ``project`` that were inserted or changed
+    to its change feed.
+
+    This must be called once the changes are stored in the database.
+    """
+    job_ids = set(job_ids)
+    if not job_ids:
+        return
+
+    job_change_feed.publish(project, job_ids,
+                            settings.JOB_CHANGE_FEED_TIMEOUT)
+
+
+def get_job_changes(project, cursor):
+    """
+    Return the cursor of the current position of the change feed of
+    ``project``, and the ids of the jobs changed since ``cursor``.
+
+    The ids are None when the changes since ``cursor`` are unknown, because
+    the cursor is invalid, too old or from another epoch: the client must
+    then reload all its jobs.  An entry still being written is left for
+    the next call.
+    """
+    epoch, seq = job_change_feed.get_position(project)
+    try:
+        cursor_epoch, cursor_seq = parse_cursor(cursor)
+    except ValueError:
+        return format_cursor(epoch, seq), None
+
+    if (cursor_epoch != epoch or cursor_seq > seq or
+            seq - cursor_seq > settings.JOB_CHANGE_FEED_MAX_ENTRIES):
+        return format_cursor(epoch, seq), None
+
+    entries = job_change_feed.read(project, cursor_seq + 1, seq)
+
+    job_ids = set()
+    for entry_seq in range(cursor_seq + 1, seq + 1):
+        if entry_seq not in entries:
+            if seq - entry_seq >= JOB_CHANGE_FEED_MAX_IN_FLIGHT:
+                return format_cursor(epoch, seq), None
+            seq = entry_seq - 1
+            break
+        job_ids.update(entries[entry_seq])
+
+    return format_cursor(epoch, seq), job_ids
@@ -0,0 +1,91 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from treeherder.model.cache_journal import get_cache_epoch, reset_cache_epoch
+
+
+def get_job_states_epoch_cache_key(project):
+    return "job-states-epoch:{0}".format(project)
+
+
+def get_job_states_epoch(project):
+    """
+    Return the epoch of the job state caches of ``project``.
+
+    The epoch is shared by all the processes through the cache, and is
+    changed when jobs are deleted, so no cache skips them once they are
+    submitted again.
+    """
+    return get_cache_epoch(get_job_states_epoch_cache_key(project))
+
+
+def forget_job_states(project):
+    """Empty the job state caches of ``project`` in every process."""
+    reset_cache_epoch(get_job_states_epoch_cache_key(project))
+
+
+class JobStateCache(object):
+    """
+    An in-process, least recently used set of the ``(job_guid, state)``
+    pairs known to be stored in the jobs table of a project.
+
+    The buildapi feeds submit the same pending and running jobs every
+    minute, so once a pair was found in the database its next submissions
+    can be dropped without querying it again.  Only the pairs read from
+    the database are added, and at most ``max_size`` of them are kept.
+    """
+
+    def __init__(self, project, max_size):
+        self.project = project
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.epoch = None
+        self.pairs = OrderedDict()
+
+    def _check_epoch(self):
+        epoch = get_job_states_epoch(self.project)
+        if epoch != self.epoch:
+            self.pairs.clear()
+            self.epoch = epoch
+
+    def get_known(self, pairs):
+        """Return the ``(job_guid, state)`` of ``pairs`` known to be stored."""
+        with self.lock:
+            self._check_epoch()
+            known = set()
+            for pair in pairs:
+                if pair in self.pairs:
+                    # mark it as the most recently used
+                    self.pairs[pair] = self.pairs.pop(pair)
+                    known.add(pair)
+            return known
+
+    def add(self, pairs):
+        """Remember that ``pairs`` are stored."""
+        with self.lock:
+            for pair in pairs:
+                self.pairs.pop(pair, None)
+                self.pairs[pair] = True
+            while len(self.pairs) > self.max_size:
+                self.pairs.popitem(last=False)
+
+
+job_state_caches = {}
+job_state_caches_lock = threading.Lock()
+
+
+def get_job_state_cache(project):
+    """Return the job state cache of ``project`` for this process."""
+    job_state_cache = job_state_caches.get(project)
+    if job_state_cache is None:
+        with job_state_caches_lock:
+            job_state_cache = job_state_caches.setdefault(
+                project,
+                JobStateCache(project, settings.JOB_STATE_CACHE_SIZE))
+    return job_state_cache
@@ -8,7 +8,7 @@ from treeherder.model.tasks import calculate_eta
 
 
 class Command(BaseCommand):
-    help = """Cycle data that exceeds the time constraint limit"""
+    help = """Store the job ETA stats updated since the last run"""
 
     option_list = BaseCommand.option_list + (
 
@@ -21,15 +21,16 @@ class Command(BaseCommand):
         make_option('--sample_window_size',
                     action='store',
                     dest='sample_window_size',
-                    default=12,
-                    help='Number of hours to include in the sample window, defaults to 12'),
+                    default=None,
+                    help=('Number of hours of samples after which the ETAs '
+                          'start over, defaults to JOB_ETA_SAMPLE_WINDOW')),
     )
 
     def handle(self, *args, **options):
 
         debug = options.get("debug", None)
-        sample_window_size = int(options.get("sample_window_size"))
-
-        sample_window_seconds = 60 * 60 * sample_window_size
+        sample_window_seconds = None
+        if options.get("sample_window_size"):
+            sample_window_seconds = 60 * 60 * int(options["sample_window_size"])
 
         calculate_eta(sample_window_seconds, debug)
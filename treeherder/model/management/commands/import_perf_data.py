@@ -11,7 +11,7 @@ from urlparse import urlparse
 import concurrent.futures
 
 
-def _add_series(server_params, project, time_intervals, signature_hash,
+def _add_series(server_params, project, time_interval, signature_hash,
                 signature_props, mysql_debug, verbose):
     with JobsModel(project) as jm:
         jm.DEBUG = mysql_debug
@@ -19,14 +19,11 @@ def _add_series(server_params, project, time_intervals, signature_hash,
             print(signature_hash)
 
         jm.set_series_signature(signature_hash, signature_props)
-        for time_interval in time_intervals:
-            pc = PerfherderClient(protocol=server_params.scheme,
-                                  host=server_params.netloc)
-            series = pc.get_performance_series(project, signature_hash,
-                                               time_interval=time_interval)
-            jm.store_performance_series(time_interval, 'talos_data',
-                                        str(signature_hash),
-                                        series)
+        pc = PerfherderClient(protocol=server_params.scheme,
+                              host=server_params.netloc)
+        series = pc.get_performance_series(project, signature_hash,
+                                           time_interval=time_interval)
+        jm.store_performance_points({str(signature_hash): series})
 
 
 class Command(BaseCommand):
@@ -56,7 +53,7 @@ class Command(BaseCommand):
                     action='store',
                     default=None,
                     type='int',
-                    help="Time interval to fetch (defaults to all)"),
+                    help="Time interval to fetch (defaults to the longest)"),
         make_option('--filter-props',
                     action='append',
                     dest="filter_props",
@@ -87,10 +84,9 @@ class Command(BaseCommand):
                 k, v = kv.split(':')
                 signatures = signatures.filter((k, v))
 
-        if options['time_interval'] is None:
-            time_intervals = PerformanceTimeInterval.all_valid_time_intervals()
-        else:
-            time_intervals = [options['time_interval']]
+        # the series of the shorter intervals are part of the longest one
+        time_interval = options['time_interval'] or max(
+            PerformanceTimeInterval.all_valid_time_intervals())
 
         with concurrent.futures.ProcessPoolExecutor(
                 options['num_workers']) as executor:
@@ -99,7 +95,7 @@ class Command(BaseCommand):
             for signature_hash in signatures.get_signature_hashes():
                 futures.append(executor.submit(_add_series, server_params,
                                                project,
-                                               time_intervals,
+                                               time_interval,
                                                signature_hash,
                                                signatures[signature_hash],
                                                options['mysql_debug'],
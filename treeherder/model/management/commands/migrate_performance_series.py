@@ -0,0 +1,34 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import simplejson as json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from treeherder.model.derived import JobsModel
+from treeherder.model.models import Datasource
+
+
+class Command(BaseCommand):
+    help = """Copy the points of the performance_series blobs of the longest
+time interval to the performance_point table.  The performance_point table
+must be created first, and performance_series can be dropped afterwards."""
+    args = "<project> <project> ..."
+
+    def handle(self, *args, **options):
+        interval_seconds = max(t_range['seconds'] for t_range in
+                               settings.TREEHERDER_PERF_SERIES_TIME_RANGES)
+        projects = args or Datasource.objects\
+            .filter(contenttype='jobs')\
+            .values_list('project', flat=True)
+        for project in projects:
+            with JobsModel(project) as jm:
+                series = jm.jobs_execute(
+                    proc='jobs.selects.get_performance_series_blobs',
+                    placeholders=[interval_seconds])
+                for row in series:
+                    jm.store_performance_points(
+                        {row['series_signature']: json.loads(row['blob'])})
+                self.stdout.write("{0}: {1} series migrated".format(
+                    project, len(series)))
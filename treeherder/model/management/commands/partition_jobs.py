@@ -0,0 +1,29 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.core.management.base import BaseCommand
+from treeherder.model.derived import JobsModel
+from treeherder.model.models import Datasource
+
+
+class Command(BaseCommand):
+    help = """Partition the jobs tables of the databases created before the
+schema was partitioned by submit and push timestamp, so cycle_data can drop
+whole partitions of old jobs instead of deleting them in chunks.  This drops
+the foreign keys from and to these tables and rebuilds them, so it should be
+run while the project is quiet.  It also adds the result_set_revision_hash
+table, which the result sets are stored with."""
+    args = "<project> <project> ..."
+
+    def handle(self, *args, **options):
+        projects = args or Datasource.objects\
+            .filter(contenttype='jobs')\
+            .values_list('project', flat=True)
+        for project in projects:
+            with JobsModel(project) as jm:
+                if jm.get_partitions(jm.CT_JOBS, 'job'):
+                    self.stdout.write("{0}: already partitioned".format(project))
+                    continue
+                jm.partition_jobs_tables()
+                self.stdout.write("{0}: partitioned".format(project))
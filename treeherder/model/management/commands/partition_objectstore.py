@@ -0,0 +1,27 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.core.management.base import BaseCommand
+from treeherder.model.derived import JobsModel
+from treeherder.model.models import Datasource
+
+
+class Command(BaseCommand):
+    help = """Partition the objectstores created before the schema was
+partitioned by loaded_timestamp, so cycle_data can drop whole partitions
+of old blobs instead of deleting them in chunks.  This rebuilds each
+objectstore table, so it should be run while the objectstore is quiet."""
+    args = "<project> <project> ..."
+
+    def handle(self, *args, **options):
+        projects = args or Datasource.objects\
+            .filter(contenttype='objectstore')\
+            .values_list('project', flat=True)
+        for project in projects:
+            with JobsModel(project) as jm:
+                if jm.get_objectstore_partitions():
+                    self.stdout.write("{0}: already partitioned".format(project))
+                    continue
+                jm.partition_objectstore()
+                self.stdout.write("{0}: partitioned".format(project))
@@ -0,0 +1,44 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from treeherder.model.derived import JobsModel
+from treeherder.model.models import Datasource
+
+
+class Command(BaseCommand):
+    help = """Report the approximate number of rows and the size of each
+partition of the partitioned tables of the project databases."""
+    args = "<project> <project> ..."
+
+    def handle(self, *args, **options):
+        projects = args or Datasource.objects\
+            .filter(contenttype='jobs')\
+            .values_list('project', flat=True)
+        for project in projects:
+            with JobsModel(project) as jm:
+                for data_type in ('objectstore', 'jobs'):
+                    partitions = jm.execute(
+                        data_type,
+                        proc='generic.partitions.get_all_partitions')
+                    if not partitions:
+                        self.stdout.write("{0} {1}: not partitioned".format(
+                            project, data_type))
+                        continue
+                    for partition in partitions:
+                        self.stdout.write(
+                            "{0} {1}.{2} {3} (before {4}): {5} rows, "
+                            "{6:.2f} MB".format(
+                                project, data_type, partition['table_name'],
+                                partition['name'],
+                                self.format_bound(partition['less_than']),
+                                partition['table_rows'],
+                                (partition['size'] or 0) / 1024.0 / 1024.0))
+
+    def format_bound(self, less_than):
+        if less_than == 'MAXVALUE':
+            return less_than
+        return datetime.utcfromtimestamp(int(less_than)).isoformat()
@@ -0,0 +1,77 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from optparse import make_option
+from django.core.management.base import BaseCommand
+from treeherder.model.derived import JobsModel
+from treeherder.model.models import Datasource
+
+
+class Command(BaseCommand):
+    help = """
+    Recompute the stored job counts of the result sets from the jobs, and
+    report the ones that differ.  If no projects are given, the counts of
+    every project are verified.
+    """
+    args = "<project> <project> ..."
+
+    option_list = BaseCommand.option_list + (
+
+        make_option(
+            '--fix',
+            action='store_true',
+            dest='fix',
+            default=False,
+            help='Store the recomputed counts of the result sets that differ'),
+
+        make_option(
+            '--limit',
+            action='store',
+            dest='limit',
+            default=0,
+            type='int',
+            help='Only verify the most recent result sets'),
+
+        make_option(
+            '--chunk-size',
+            action='store',
+            dest='chunk_size',
+            default=100,
+            type='int',
+            help='Number of result sets verified with a single query'),
+    )
+
+    def handle(self, *args, **options):
+        projects = args or Datasource.objects\
+            .filter(contenttype='jobs')\
+            .values_list('project', flat=True)
+
+        for project in projects:
+            with JobsModel(project) as jm:
+                result_set_ids = jm.get_counted_result_set_ids()
+                if options['limit']:
+                    result_set_ids = result_set_ids[:options['limit']]
+
+                chunk_size = options['chunk_size']
+                num_diffs = 0
+                for i in range(0, len(result_set_ids), chunk_size):
+                    diffs = jm.get_resultset_job_count_diffs(
+                        result_set_ids[i:i + chunk_size])
+                    for result_set_id, profile_id, stored, expected in diffs:
+                        self.stdout.write(
+                            "{0}: result set {1}, exclusion profile {2}: "
+                            "stored {3}, expected {4}".format(
+                                project, result_set_id, profile_id,
+                                sorted(stored.items()),
+                                sorted(expected.items())))
+                    num_diffs += len(diffs)
+                    if options['fix'] and diffs:
+                        jm.update_resultset_job_counts(
+                            result_set_id for result_set_id, _, _, _ in diffs)
+
+                self.stdout.write("{0}: {1} result sets verified, {2} "
+                                  "counts differ{3}".format(
+                                      project, len(result_set_ids), num_diffs,
+                                      ", fixed" if options['fix'] and num_diffs
+                                      else ""))
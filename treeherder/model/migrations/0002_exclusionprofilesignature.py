@@ -0,0 +1,54 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def add_excluded_signatures(apps, schema_editor):
+    ExclusionProfile = apps.get_model('model', 'ExclusionProfile')
+    ExclusionProfileSignature = apps.get_model('model', 'ExclusionProfileSignature')
+    for profile in ExclusionProfile.objects.all():
+        ExclusionProfileSignature.objects.bulk_create([
+            ExclusionProfileSignature(exclusion_profile=profile,
+                                      repository=repository,
+                                      signature=signature)
+            for repository, signatures in profile.flat_exclusion.items()
+            for signature in set(signatures)
+        ])
+
+
+def remove_excluded_signatures(apps, schema_editor):
+    # the table is dropped anyway
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('model', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExclusionProfileSignature',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('repository', models.CharField(max_length=50L)),
+                ('signature', models.CharField(max_length=50L)),
+                ('exclusion_profile', models.ForeignKey(related_name='excluded_signatures', to='model.ExclusionProfile')),
+            ],
+            options={
+                'db_table': 'exclusion_profile_signature',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='exclusionprofilesignature',
+            unique_together=set([('exclusion_profile', 'repository', 'signature')]),
+        ),
+        migrations.RunPython(add_excluded_signatures, remove_excluded_signatures),
+    ]
@@ -13,7 +13,7 @@ from datasource.bases.BaseHub import BaseHub
 from datasource.hubs.MySQL import MySQL
 from django.conf import settings
 from django.core.cache import cache
-from django.db import models, connection
+from django.db import models, connection, transaction
 from django.db.models import Max, Q
 from django.contrib.auth.models import User
 from django.utils.encoding import python_2_unicode_compatible
@@ -600,15 +600,47 @@ class ExclusionProfile(models.Model):
             for repo, sig in signatures:
                 self.flat_exclusion[repo].append(sig)
 
-        super(ExclusionProfile, self).save(
-            force_insert=False,
-            force_update=True
-        )
+        with transaction.atomic():
+            super(ExclusionProfile, self).save(
+                force_insert=False,
+                force_update=True
+            )
+            self.update_excluded_signatures()
+
+    def update_excluded_signatures(self):
+        """
+        Store the ``flat_exclusion`` signatures one per row, so the job
+        queries exclude them with an indexed join instead of an ``IN``
+        list of every signature.
+        """
+        self.excluded_signatures.all().delete()
+        ExclusionProfileSignature.objects.bulk_create([
+            ExclusionProfileSignature(exclusion_profile=self,
+                                      repository=repository,
+                                      signature=signature)
+            for repository, signatures in self.flat_exclusion.items()
+            for signature in set(signatures)
+        ])
 
     class Meta:
         db_table = 'exclusion_profile'
 
 
+class ExclusionProfileSignature(models.Model):
+
+    """
+    A reference data signature hidden by an exclusion profile.
+    """
+    exclusion_profile = models.ForeignKey(ExclusionProfile,
+                                          related_name="excluded_signatures")
+    repository = models.CharField(max_length=50L)
+    signature = models.CharField(max_length=50L)
+
+    class Meta:
+        db_table = 'exclusion_profile_signature'
+        unique_together = ('exclusion_profile', 'repository', 'signature')
+
+
 class UserExclusionProfile(models.Model):
 
     """
@@ -0,0 +1,147 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import logging
+import Queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from treeherder.model.derived.jobs import JobsModel, JobData
+
+logger = logging.getLogger(__name__)
+
+
+def get_loader_stats_cache_key(project):
+    return "objectstore-loader-stats:{0}".format(project)
+
+
+def get_objectstore_loader_stats(projects):
+    """Return the stats of the last loader run of each of ``projects``."""
+    keys = dict((get_loader_stats_cache_key(project), project)
+                for project in projects)
+    return dict((keys[key], stats)
+                for key, stats in cache.get_many(keys.keys()).items())
+
+
+def decode_objects(rows):
+    """
+    Decode the json blobs of the objectstore ``rows`` into the job
+    structures ``load_job_data`` accepts.
+
+    The rows which can't be decoded are left as they are, so
+    ``load_job_data`` marks them as errored.
+    """
+    batch = []
+    for row in rows:
+        try:
+            job_struct = JobData.from_json(row['json_blob'])
+            batch.append({
+                'id': row['id'],
+                'revision_hash': job_struct['revision_hash'],
+                'job': job_struct['job'],
+                'coalesced': job_struct.get('coalesced', []),
+            })
+        except Exception:
+            batch.append(row)
+    return batch
+
+
+class ObjectstoreLoader(object):
+    """
+    Load the objectstore blobs of a project into its jobs store.
+
+    The next batches of blobs are claimed and decoded by a separate thread,
+    over a separate objectstore connection, while the current batch is
+    being loaded.  The blobs are claimed on behalf of the loading
+    connection, so it can mark them as complete.
+
+    The loader runs until the objectstore is empty, or for at most
+    ``OBJECTSTORE_LOADER_MAX_SECONDS``, then records its batches/sec and
+    the objectstore lag in the cache.
+    """
+
+    def __init__(self, project, batch_size=100, max_seconds=None):
+        self.project = project
+        self.batch_size = batch_size
+        self.max_seconds = max_seconds or settings.OBJECTSTORE_LOADER_MAX_SECONDS
+
+    def put(self, batches, batch, stop):
+        """Queue ``batch`` unless the loader stopped in the meantime."""
+        while not stop.is_set():
+            try:
+                batches.put(batch, timeout=1)
+                return
+            except Queue.Full:
+                pass
+
+    def claim_batches(self, worker_id, batches, stop, deadline):
+        claimed = set()
+        try:
+            with JobsModel(self.project) as jm:
+                while not stop.is_set() and time.time() < deadline:
+                    # the blobs still being loaded are returned again
+                    rows = [row for row in
+                            jm.claim_objects_for_worker(self.batch_size, worker_id)
+                            if row['id'] not in claimed]
+                    if not rows:
+                        break
+                    claimed.update(row['id'] for row in rows)
+                    self.put(batches, decode_objects(rows), stop)
+        except Exception:
+            logger.exception("Error claiming objects for %s", self.project)
+        finally:
+            self.put(batches, None, stop)
+            connection.close()
+
+    def run(self):
+        start = time.time()
+        num_batches = 0
+        num_objects = 0
+
+        batches = Queue.Queue(maxsize=settings.OBJECTSTORE_LOADER_QUEUE_SIZE)
+        stop = threading.Event()
+
+        with JobsModel(self.project) as jm:
+            worker_id = jm.get_objectstore_connection_id()
+
+            claimer = threading.Thread(
+                target=self.claim_batches,
+                args=(worker_id, batches, stop, start + self.max_seconds))
+            claimer.daemon = True
+            claimer.start()
+
+            try:
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+                    jm.load_job_data(batch)
+                    num_batches += 1
+                    num_objects += len(batch)
+            finally:
+                stop.set()
+                claimer.join()
+                # hand back the blobs claimed but not loaded
+                jm.release_objects(worker_id)
+
+            lag = jm.get_objectstore_lag()
+
+        elapsed = time.time() - start
+        stats = {
+            'batches': num_batches,
+            'objects': num_objects,
+            'seconds': elapsed,
+            'batches_per_second': num_batches / elapsed if elapsed else 0,
+            'lag': lag,
+            'last_run': int(start),
+        }
+        cache.set(get_loader_stats_cache_key(self.project), stats, None)
+        logger.info("Loaded %s objects in %s batches for %s in %.2fs, "
+                    "lag %ss", num_objects, num_batches, self.project,
+                    elapsed, lag)
+        return stats
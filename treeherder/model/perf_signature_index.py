@@ -0,0 +1,139 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+import threading
+
+from django.utils.encoding import force_text
+
+from treeherder.model.cache_journal import CacheJournal
+
+# how long the new signatures are kept in the cache for the indexes to
+# pick them up; an index that falls further behind is reloaded
+PERF_SIGNATURE_JOURNAL_TIMEOUT = 24 * 60 * 60
+
+# an index that missed more journal entries than this is reloaded
+PERF_SIGNATURE_JOURNAL_MAX_READ = 1000
+
+# the properties of the new signatures, in a journal per project
+perf_signature_journal = CacheJournal("perf-signature-journal")
+
+
+def publish_signatures(project, signatures):
+    """
+    Add the new ``signatures``, a dict of signature to properties, to the
+    journal the indexes of ``project`` are updated from.
+
+    This must be called once the signatures are stored in the database.
+    """
+    if not signatures:
+        return
+
+    perf_signature_journal.publish(project, signatures,
+                                   PERF_SIGNATURE_JOURNAL_TIMEOUT)
+
+
+class PerfSignatureIndex(object):
+    """
+    An in-process inverted index of the performance series signatures of
+    a project.
+
+    Every ``(property, value)`` pair is mapped to the set of signatures
+    having it, so the signatures matching some properties are the
+    intersection of their sets.  The properties of every signature are
+    kept too.
+
+    The index is loaded from the ``series_signature`` table the first time
+    it's used, then updated with the signatures published in the journal
+    by ``publish_signatures``.  If some journal entries expired before
+    being read, the index is loaded again.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.lock = threading.RLock()
+        self.epoch = None
+        self.seq = None
+        self.properties = {}
+        self.postings = {}
+
+    def refresh(self, jm):
+        """Bring the index up to date with the signatures of ``jm``."""
+        epoch, seq = perf_signature_journal.get_position(self.project)
+        if (epoch, seq) == (self.epoch, self.seq):
+            return
+
+        with self.lock:
+            if (epoch, seq) == (self.epoch, self.seq):
+                return
+
+            if (epoch != self.epoch or seq < self.seq or
+                    seq - self.seq > PERF_SIGNATURE_JOURNAL_MAX_READ):
+                self._load(jm)
+            else:
+                entries = perf_signature_journal.read(self.project,
+                                                      self.seq + 1, seq)
+                if len(entries) < seq - self.seq:
+                    self._load(jm)
+                else:
+                    for signatures in entries.values():
+                        for signature, properties in signatures.items():
+                            self._add_signature(signature, properties)
+
+            self.epoch = epoch
+            self.seq = seq
+
+    def _load(self, jm):
+        self.properties = {}
+        self.postings = {}
+        rows = jm.jobs_execute(
+            proc='jobs.selects.get_all_signature_properties',
+            debug_show=jm.DEBUG)
+        for row in rows:
+            self._add_signature(row['signature'],
+                                {row['property']: row['value']})
+
+    def _add_signature(self, signature, properties):
+        signature = force_text(signature)
+        signature_properties = self.properties.setdefault(signature, {})
+        for prop, value in properties.items():
+            prop = force_text(prop)
+            value = force_text(value)
+            signature_properties[prop] = value
+            self.postings.setdefault((prop, value), set()).add(signature)
+
+    def get_signatures_from_properties(self, props):
+        """
+        Return the properties of the signatures having all the ``props``
+        property/value pairs.
+        """
+        with self.lock:
+            postings = [self.postings.get((force_text(prop), force_text(value)),
+                                          set())
+                        for prop, value in props.items()]
+            if not postings:
+                return {}
+            postings.sort(key=len)
+            signatures = set.intersection(*postings)
+            return dict((signature, dict(self.properties[signature]))
+                        for signature in signatures)
+
+    def get_signature_properties(self, signature):
+        """Return the properties of ``signature``, or None if unknown."""
+        with self.lock:
+            properties = self.properties.get(force_text(signature))
+            return dict(properties) if properties is not None else None
+
+
+perf_signature_indexes = {}
+perf_signature_indexes_lock = threading.Lock()
+
+
+def get_perf_signature_index(project):
+    """Return the signature index of ``project`` for this process."""
+    index = perf_signature_indexes.get(project)
+    if index is None:
+        with perf_signature_indexes_lock:
+            index = perf_signature_indexes.setdefault(
+                project, PerfSignatureIndex(project))
+    return index
@@ -11,6 +11,7 @@ from treeherder.model.models import Datasource, Repository
 from treeherder.model.exchanges import TreeherderPublisher
 from treeherder.model.pulse_publisher import load_schemas
 from treeherder.model.error_summary import load_error_summary
+from treeherder.model.utils import cache_lock
 
 
 # Load schemas for validation of messages published on pulse
@@ -47,23 +48,27 @@ pulse_connection = LazyPublisher()
 @task(name='process-objects')
 def process_objects(limit=None, project=None):
     """
-    Process a number of objects from the objectstore
-    and load them to the jobs store
+    Process the objects of the objectstore and load them to the jobs
+    store, with a separate task for each project.
     """
-    from treeherder.model.derived.jobs import JobsModel
-
-    # default limit to 100
-    limit = limit or 100
-
-    if project:
-        projects_to_process = [project]
-    else:
+    if project is None:
         projects_to_process = Datasource.objects.values_list(
             'project', flat=True).distinct()
+        for project in projects_to_process:
+            process_objects.apply_async(
+                kwargs={'limit': limit, 'project': project},
+                routing_key='process_objects'
+            )
+        return
 
-    for project in projects_to_process:
-        with JobsModel(project) as jm:
-            jm.process_objects(limit)
+    from treeherder.model.objectstore_loader import ObjectstoreLoader
+
+    # only run one loader at a time for each project
+    with cache_lock("objectstore-loader-lock:{0}".format(project),
+                    timeout=settings.OBJECTSTORE_LOADER_MAX_SECONDS * 2) as locked:
+        if locked:
+            # default limit to 100
+            ObjectstoreLoader(project, limit or 100).run()
 
 
 # Run a maximum of 1 per hour
@@ -72,8 +77,8 @@ def cycle_data():
     call_command('cycle_data')
 
 
-@task(name='calculate-eta', rate_limit='1/h')
-def calculate_eta(sample_window_seconds=21600, debug=False):
+@task(name='calculate-eta', rate_limit='6/h')
+def calculate_eta(sample_window_seconds=None, debug=False):
     from treeherder.model.derived.jobs import JobsModel
 
     projects = Repository.objects.filter(active_status='active').values_list('name', flat=True)
@@ -89,12 +94,7 @@ def populate_performance_series(project, series_type, series_data):
     from treeherder.model.derived.jobs import JobsModel
 
     with JobsModel(project) as jm:
-        for t_range in settings.TREEHERDER_PERF_SERIES_TIME_RANGES:
-            for signature in series_data:
-                jm.store_performance_series(
-                    t_range['seconds'], series_type, signature,
-                    series_data[signature]
-                )
+        jm.store_performance_points(series_data)
 
 
 @task(name='publish-job-action')
@@ -5,7 +5,20 @@
 import time
 import simplejson as json
 import random
+from contextlib import contextmanager
+from datetime import datetime
 from _mysql_exceptions import OperationalError
+from django.core.cache import cache
+
+# ujson is used to decode the objectstore blobs when it's installed, since
+# it's several times faster than simplejson.
+try:
+    import ujson
+
+    def json_loads(s):
+        return ujson.loads(s, precise_float=True)
+except ImportError:
+    json_loads = json.loads
 
 
 def get_now_timestamp():
@@ -63,6 +76,88 @@ def where_wolf(project, flat_exclusions):
     return " AND ({0})".format(condition_list), values_list
 
 
+def bug_suggestions_union(search_terms, time_limit, limit, bug_ids=None):
+    """
+    Return the UNION of the bug suggestion queries of ``search_terms``.
+
+    Each search term gets one query for its "open recent" bugs and one for
+    "all other" bugs, the same as ``get_open_recent_bugs`` and
+    ``get_all_others_bugs``.  The rows are tagged with the index of their
+    search term and the name of their group.  ``bug_ids`` optionally maps
+    search terms to the only bug ids their queries look at.  Returns the
+    SQL and its placeholders.
+    """
+    query = (
+        "(SELECT %s AS search_index, %s AS bucket, id, summary, crash_signature, "
+        "keywords, os, resolution, "
+        "MATCH (`summary`) AGAINST (%s IN BOOLEAN MODE) AS relevance "
+        "FROM bugscache "
+        "WHERE `summary` LIKE CONCAT ('%%', %s, '%%') ESCAPE '=' AND {0} "
+        "ORDER BY relevance DESC "
+        "LIMIT 0,%s)"
+    )
+    buckets = (
+        ("open_recent", "resolution = '' AND modified >= %s"),
+        ("all_others", "(modified < %s OR resolution <> '')"),
+    )
+
+    queries = []
+    placeholders = []
+    for i, search_term in enumerate(search_terms):
+        # Wrap search term so it is used as a phrase in the full-text search.
+        search_term_fulltext = search_term.join('""')
+        # Substitute escape and wildcard characters, so the search term is used
+        # literally in the LIKE statement.
+        search_term_like = search_term.replace('=', '==').replace('%', '=%').replace('_', '=_')
+
+        term_bug_ids = (bug_ids or {}).get(search_term)
+        for bucket, condition in buckets:
+            placeholders.extend([i, bucket, search_term_fulltext,
+                                 search_term_like, time_limit])
+            if term_bug_ids:
+                condition += " AND id IN ({0})".format(
+                    ",".join(["%s"] * len(term_bug_ids)))
+                placeholders.extend(term_bug_ids)
+            queries.append(query.format(condition))
+            placeholders.append(limit)
+
+    return " UNION ALL ".join(queries), placeholders
+
+
+def get_range_partitions(start_timestamp, end_timestamp, interval):
+    """
+    Return the ``(name, less than)`` of the range partitions covering the
+    timestamps from ``start_timestamp`` to ``end_timestamp``.
+
+    Each partition holds ``interval`` seconds of data, aligned on the epoch
+    so the same timestamp always falls in the same partition, and is named
+    after the day it starts on, or the second when ``interval`` isn't a
+    whole number of days.
+    """
+    if interval % (24 * 3600):
+        name_format = "p%Y%m%d%H%M%S"
+    else:
+        name_format = "p%Y%m%d"
+    partitions = []
+    bound = start_timestamp - start_timestamp % interval
+    while bound <= end_timestamp:
+        name = datetime.utcfromtimestamp(bound).strftime(name_format)
+        bound += interval
+        partitions.append((name, bound))
+    return partitions
+
+
+def get_range_partitions_sql(partitions):
+    """
+    Return the definition of ``partitions``, followed by the catch-all
+    ``pmax`` partition.
+    """
+    definitions = ["PARTITION {0} VALUES LESS THAN ({1})".format(name, bound)
+                   for name, bound in partitions]
+    definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ", ".join(definitions)
+
+
 def retry_execute(dhub, logger, retries=0, **kwargs):
     """Retry the query in the case of an OperationalError."""
     try:
@@ -81,3 +176,27 @@ def retry_execute(dhub, logger, retries=0, **kwargs):
             return retry_execute(dhub, logger, retries, **kwargs)
         else:
             raise
+
+
+@contextmanager
+def cache_lock(key, tries=1, timeout=60, interval=0.05):
+    """
+    Hold a lock shared by all the processes through the cache, yielding
+    whether it was acquired.
+
+    The lock is tried ``tries`` times, ``interval`` seconds apart.  It
+    expires after ``timeout`` seconds, in case its holder dies.
+    """
+    for i in range(tries):
+        if cache.add(key, True, timeout):
+            break
+        if i < tries - 1:
+            time.sleep(interval)
+    else:
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        cache.delete(key)
@@ -4,6 +4,7 @@
 
 # Django settings for webapp project.
 import os
+import tempfile
 from datetime import timedelta
 
 from kombu import Exchange, Queue
@@ -27,6 +28,10 @@ DEBUG = os.environ.get("TREEHERDER_DEBUG", False)
 TREEHERDER_REQUEST_PROTOCOL = os.environ.get("TREEHERDER_REQUEST_PROTOCOL", "http")
 TREEHERDER_REQUEST_HOST = os.environ.get("TREEHERDER_REQUEST_HOST", "local.treeherder.mozilla.org")
 
+# The local directory of the file based caches which aren't part of the source
+TREEHERDER_CACHE_DIR = os.environ.get("TREEHERDER_CACHE_DIR",
+                                      os.path.join(tempfile.gettempdir(), "treeherder"))
+
 TREEHERDER_PERF_SERIES_TIME_RANGES = [
     {"seconds": 86400, "days": 1},
     {"seconds": 604800, "days": 7},
@@ -35,9 +40,30 @@ TREEHERDER_PERF_SERIES_TIME_RANGES = [
     {"seconds": 5184000, "days": 60},
     {"seconds": 7776000, "days": 90},
 ]
+# The number of versions of each performance series summary whose changes
+# are kept, for the clients to only fetch what changed since their version.
+PERF_SERIES_SUMMARY_MAX_DELTAS = 100
 
 DATA_CYCLE_INTERVAL = timedelta(days=30 * 4)
 OBJECTSTORE_CYCLE_INTERVAL = timedelta(days=1)
+# The job ETA stats are updated as the jobs complete, and stored in the
+# job_eta table every JOB_ETA_PERSIST_INTERVAL.  Each ETA covers at most
+# JOB_ETA_SAMPLE_WINDOW worth of completed jobs.
+JOB_ETA_PERSIST_INTERVAL = timedelta(minutes=10)
+JOB_ETA_SAMPLE_WINDOW = timedelta(hours=6)
+# The objectstore is partitioned by loaded_timestamp, so it can be cycled by
+# dropping whole partitions: each partition holds this much data, and
+# OBJECTSTORE_PARTITIONS_AHEAD empty partitions are kept ready ahead of now.
+OBJECTSTORE_PARTITION_INTERVAL = timedelta(days=1)
+OBJECTSTORE_PARTITIONS_AHEAD = 7
+# The expired objectstore partitions still holding blobs which weren't loaded
+# are kept for this long, then dropped anyway.
+OBJECTSTORE_PARTITION_GRACE_PERIOD = timedelta(days=7)
+# The job, job_artifact, job_log_url, performance_point and result_set tables
+# are partitioned by submit or push timestamp the same way.  Every lookup by
+# id probes each partition, so they hold more data than the objectstore ones.
+JOBS_PARTITION_INTERVAL = timedelta(days=7)
+JOBS_PARTITIONS_AHEAD = 2
 
 RABBITMQ_USER = os.environ.get("TREEHERDER_RABBITMQ_USER", "guest")
 RABBITMQ_PASSWORD = os.environ.get("TREEHERDER_RABBITMQ_PASSWORD", "guest")
@@ -263,9 +289,9 @@ CELERYBEAT_SCHEDULE = {
             'queue': 'cycle_data'
         }
     },
-    'calculate-eta-every-6-hours': {
+    'calculate-eta-every-10-minutes': {
         'task': 'calculate-eta',
-        'schedule': timedelta(hours=6),
+        'schedule': JOB_ETA_PERSIST_INTERVAL,
         'relative': True,
         'options': {
             'queue': 'calculate_eta'
@@ -314,11 +340,81 @@ BUILDAPI_PENDING_CHUNK_SIZE = 500
 BUILDAPI_RUNNING_CHUNK_SIZE = 500
 BUILDAPI_BUILDS4H_CHUNK_SIZE = 500
 
+# The objectstore of each project is loaded by a separate process-objects
+# task, claiming the next batches while the current one is being loaded
+# with up to OBJECTSTORE_LOADER_QUEUE_SIZE batches waiting.  Each task runs
+# until the objectstore is empty or for at most
+# OBJECTSTORE_LOADER_MAX_SECONDS.
+OBJECTSTORE_LOADER_QUEUE_SIZE = 1
+OBJECTSTORE_LOADER_MAX_SECONDS = 50
+
 PARSER_MAX_STEP_ERROR_LINES = 100
 PARSER_MAX_SUMMARY_LINES = 200
 
+# The number of processes each log is parsed with.  With more than one,
+# logs are split into chunks of at least PARSER_CHUNK_LINES lines on step
+# boundaries, and the chunks are parsed in parallel.  Each log parser task
+# then uses up to that many processes on top of the worker concurrency.
+PARSER_PROCESSES = int(os.environ.get("TREEHERDER_PARSER_PROCESSES", 1))
+PARSER_CHUNK_LINES = 100000
+
+# The logs served by the logslice api are stored in the filesystem cache in
+# blocks of about LOG_SLICE_BLOCK_SIZE uncompressed bytes, so a slice only
+# decompresses the blocks it overlaps.
+LOG_SLICE_BLOCK_SIZE = 1024 * 1024
+
 BZ_API_URL = "https://bugzilla.mozilla.org"
 
+# The bugscache is synced with the bugs changed since the last sync, and
+# fully refreshed at most every BZ_FULL_SYNC_INTERVAL seconds.
+BZ_FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# The number of search terms whose bug suggestions are retrieved with a
+# single query.
+BUG_SUGGESTIONS_BATCH_SIZE = 25
+
+# Look up the bugs matching the bug suggestion search terms in an in-process
+# index of the bugscache summaries, so the FULLTEXT queries only rank these
+# bugs instead of scanning the bugscache with LIKE.  The index is dropped
+# when the bugscache has more than BUGSCACHE_INDEX_MAX_BUGS bugs: at about
+# 5KB per bug, that bounds it to 50MB in every process.  A search term
+# matching more than BUGSCACHE_INDEX_MAX_MATCHES bugs is looked up in the
+# database.
+BUGSCACHE_INDEX_ENABLED = True
+BUGSCACHE_INDEX_MAX_BUGS = 10000
+BUGSCACHE_INDEX_MAX_MATCHES = 1000
+
+# Look up the performance series signatures in an in-process inverted index
+# of their properties instead of querying the series_signature table.
+PERF_SIGNATURE_INDEX_ENABLED = True
+
+# The number of (job_guid, state) pairs of each project remembered as
+# stored, so the unchanged jobs submitted again by the buildapi feeds are
+# dropped without querying the jobs table.  0 disables the cache.
+JOB_STATE_CACHE_SIZE = 20000
+
+# The ids of the jobs changed in each project are kept in the cache for
+# JOB_CHANGE_FEED_TIMEOUT seconds, for the clients of /jobs/changes/ to
+# only fetch the jobs changed since their cursor.  Clients further behind
+# than JOB_CHANGE_FEED_MAX_ENTRIES feed entries, or with more than
+# JOB_CHANGE_FEED_MAX_JOBS jobs changed, have to reload their jobs.
+# A request waits at most JOB_CHANGE_FEED_MAX_WAIT seconds for a change,
+# checking the feed every JOB_CHANGE_FEED_POLL_INTERVAL seconds.  A waiting
+# request holds a whole gunicorn sync worker, so long-polling is disabled
+# by default: only enable it when the web workers use an async worker class
+# (eg. gunicorn --worker-class gevent), and keep it under the gunicorn
+# --timeout.
+JOB_CHANGE_FEED_TIMEOUT = 60 * 60
+JOB_CHANGE_FEED_MAX_ENTRIES = 1000
+JOB_CHANGE_FEED_MAX_JOBS = 2000
+JOB_CHANGE_FEED_MAX_WAIT = int(os.environ.get("TREEHERDER_JOB_CHANGE_FEED_MAX_WAIT", 0))
+JOB_CHANGE_FEED_POLL_INTERVAL = 1
+
+# The performance data of these projects only has its types and required
+# properties validated against the perf schemas.  Meant for the projects
+# whose performance data only comes from our own log parser.
+PERF_DATA_TRUSTED_PROJECTS = []
+
 # this setting allows requests from any host
 CORS_ORIGIN_ALLOW_ALL = True
 
@@ -416,7 +512,27 @@ CACHES = {
         "TIMEOUT": 0,
         "VERSION": 1,
         'OPTIONS': {
-            'MAX_ENTRIES': 1000
+            'MAX_ENTRIES': 10000
+        }
+    },
+    # artifacts of parsed logs, keyed by log url and parser version
+    "log_artifacts": {
+        "BACKEND": "treeherder.cache.LRUFileBasedCache",
+        "LOCATION": os.path.join(TREEHERDER_CACHE_DIR, "log_artifacts"),
+        "TIMEOUT": None,
+        "VERSION": 1,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'MAX_SIZE': 1024 * 1024 * 1024
+        }
+    },
+    # process local ids of the reference data rows already stored
+    "refdata": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "refdata",
+        "TIMEOUT": 15 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000
         }
     }
 }
@@ -2,15 +2,32 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, you can obtain one at http://mozilla.org/MPL/2.0/.
 
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets
 from rest_framework.response import Response
-from rest_framework.decorators import action
+from rest_framework.decorators import action, list_route
 from rest_framework.reverse import reverse
 from rest_framework.permissions import IsAuthenticated
 
 from treeherder.webapp.api.utils import (UrlQueryFilter, with_jobs,
-                                         oauth_required, get_option)
+                                         oauth_required, get_option,
+                                         iter_columnar_json)
 from treeherder.model.derived import ArtifactsModel
+from treeherder.model.job_change_feed import get_job_changes
+
+# the job properties sent once per distinct value with ``return_type=columns``
+DICTIONARY_ENCODED_COLUMNS = set([
+    'build_architecture', 'build_os', 'build_platform', 'build_system_type',
+    'device_name', 'job_group_description', 'job_group_name',
+    'job_group_symbol', 'job_type_description', 'job_type_name',
+    'job_type_symbol', 'machine_name', 'machine_platform_architecture',
+    'machine_platform_os', 'option_collection_hash', 'platform',
+    'platform_option', 'reason', 'ref_data_name', 'result', 'signature',
+    'state', 'tier', 'who',
+])
 
 
 class JobsViewSet(viewsets.ViewSet):
@@ -62,6 +79,11 @@ class JobsViewSet(viewsets.ViewSet):
         - offset (0)
         - count (10)
         - return_type (dict)
+
+        With ``return_type=list`` every job is a list of values, in the order
+        of ``job_property_names``.  With ``return_type=columns`` the values
+        of each property are a list in ``columns``, and the properties that
+        have few distinct values are sent as indexes into ``dictionaries``.
         """
         filter = UrlQueryFilter(request.QUERY_PARAMS)
 
@@ -76,8 +98,20 @@ class JobsViewSet(viewsets.ViewSet):
 
         if results:
             option_collections = jm.refdata_model.get_all_option_collections()
+            platform_options = {}
             for job in results:
-                job["platform_option"] = get_option(job, option_collections)
+                option_hash = job.get("option_collection_hash")
+                if option_hash not in platform_options:
+                    platform_options[option_hash] = get_option(
+                        job, option_collections)
+                job["platform_option"] = platform_options[option_hash]
+
+        if return_type == "columns":
+            meta = {"repository": project, "offset": offset, "count": count}
+            return StreamingHttpResponse(
+                iter_columnar_json({"meta": meta}, results or [],
+                                   DICTIONARY_ENCODED_COLUMNS),
+                content_type="application/json")
 
         response_body = dict(meta={"repository": project}, results=[])
 
@@ -89,6 +123,63 @@ class JobsViewSet(viewsets.ViewSet):
 
         return Response(response_body)
 
+    @list_route()
+    @with_jobs
+    def changes(self, request, project, jm):
+        """
+        GET method returning the jobs changed since a cursor
+        Optional parameters (default):
+        - cursor (none)
+        - wait (0), the seconds to wait for a change if there is none yet,
+          capped at JOB_CHANGE_FEED_MAX_WAIT, which is 0 unless the web
+          workers are async
+        - exclusion_profile (default)
+
+        The response has the cursor to pass to the next call.  When
+        ``reset`` is true the changes since ``cursor`` are unknown, and all
+        the jobs must be fetched again from the job list; a client gets its
+        first cursor that way, before fetching the job list.
+        """
+        cursor = request.QUERY_PARAMS.get("cursor")
+        try:
+            wait = float(request.QUERY_PARAMS.get("wait", 0))
+        except ValueError:
+            wait = None
+        if not 0 <= wait:
+            return Response("``wait`` must be a number of seconds", 400)
+        wait = min(wait, settings.JOB_CHANGE_FEED_MAX_WAIT)
+        exclusion_profile = request.QUERY_PARAMS.get("exclusion_profile",
+                                                     "default")
+        if exclusion_profile in ('false', 'null'):
+            exclusion_profile = None
+
+        deadline = time.time() + wait
+        while True:
+            new_cursor, job_ids = get_job_changes(project, cursor)
+            if job_ids != set() or time.time() >= deadline:
+                break
+            time.sleep(settings.JOB_CHANGE_FEED_POLL_INTERVAL)
+
+        # too many changes to send them all
+        if job_ids and len(job_ids) > settings.JOB_CHANGE_FEED_MAX_JOBS:
+            job_ids = None
+
+        results = []
+        if job_ids:
+            results = jm.get_job_list(
+                0, len(job_ids),
+                conditions={"id": set([("IN", tuple(job_ids))])},
+                exclusion_profile=exclusion_profile)
+            option_collections = jm.refdata_model.get_all_option_collections()
+            for job in results:
+                job["platform_option"] = get_option(job, option_collections)
+
+        return Response({
+            "meta": {"repository": project, "cursor": new_cursor,
+                     "reset": job_ids is None},
+            "results": results,
+        })
+
     @action(permission_classes=[IsAuthenticated])
     @with_jobs
     def update_state(self, request, project, jm, pk=None):
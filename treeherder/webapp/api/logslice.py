@@ -5,19 +5,107 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 from django.core.cache import caches
-from django.utils.six import BytesIO
 
+from treeherder.log_parser.artifactbuildercollection import iter_gzip_lines
 from treeherder.webapp.api.utils import (with_jobs)
 from treeherder.webapp.api.exceptions import ResourceNotFoundException
 from django.conf import settings
 
+from bisect import bisect_right
+from contextlib import closing
+import io
 import urllib2
-import gzip
 import json
+import zlib
 
 filesystem = caches['filesystem']
 
 
+def get_log_index_cache_key(url):
+    return "logslice-index:{0}".format(url)
+
+
+def get_log_block_cache_key(url, block):
+    return "logslice-block:{0}:{1}".format(url, block)
+
+
+class LogIndex(object):
+    """
+    Random access to the lines of a gzipped log.
+
+    The log is decompressed once and split in blocks of about
+    ``LOG_SLICE_BLOCK_SIZE`` uncompressed bytes, each compressed on its own
+    and stored in the filesystem cache.  The index maps every block to the
+    number of its first line, so a slice of the log only decompresses the
+    blocks it overlaps instead of the whole log up to its first line.
+    """
+
+    def __init__(self, url, first_lines):
+        self.url = url
+        self.first_lines = first_lines
+
+    @classmethod
+    def get(cls, url):
+        """Return the index of the log at ``url``, or None if not built."""
+        first_lines = filesystem.get(get_log_index_cache_key(url))
+        if first_lines is None:
+            return None
+        return cls(url, first_lines)
+
+    @classmethod
+    def build(cls, url, lines, block_size=None):
+        """Split ``lines`` in blocks and store them with their index."""
+        block_size = block_size or settings.LOG_SLICE_BLOCK_SIZE
+
+        first_lines = []
+        block = []
+        size = 0
+        for lineno, line in enumerate(lines):
+            if not block:
+                first_lines.append(lineno)
+            block.append(line)
+            size += len(line)
+            if size >= block_size:
+                cls._store_block(url, len(first_lines) - 1, block)
+                block = []
+                size = 0
+        if block:
+            cls._store_block(url, len(first_lines) - 1, block)
+
+        # the index is stored last, so all its blocks exist when it's found
+        filesystem.set(get_log_index_cache_key(url), first_lines)
+        return cls(url, first_lines)
+
+    @staticmethod
+    def _store_block(url, block, lines):
+        filesystem.set(get_log_block_cache_key(url, block),
+                       zlib.compress(b''.join(lines)))
+
+    def get_lines(self, start_line, end_line):
+        """
+        Return the ``(line number, line)`` pairs from ``start_line`` up to
+        ``end_line`` excluded, or None if a block was culled from the cache.
+        """
+        first_block = max(bisect_right(self.first_lines, start_line) - 1, 0)
+        last_block = bisect_right(self.first_lines, end_line - 1)
+        blocks = range(first_block, last_block)
+        keys = [get_log_block_cache_key(self.url, block) for block in blocks]
+        cached = filesystem.get_many(keys)
+        if len(cached) < len(keys):
+            return None
+
+        lines = []
+        for block, key in zip(blocks, keys):
+            lineno = self.first_lines[block]
+            for line in io.BytesIO(zlib.decompress(cached[key])):
+                if lineno >= end_line:
+                    break
+                if lineno >= start_line:
+                    lines.append((lineno, line))
+                lineno += 1
+        return lines
+
+
 class LogSliceView(viewsets.ViewSet):
 
     """
@@ -31,6 +119,21 @@ class LogSliceView(viewsets.ViewSet):
             timeout=settings.TREEHERDER_REQUESTS_TIMEOUT
         )
 
+    def get_log_lines(self, url, start_line, end_line):
+        """
+        Return the ``(line number, line)`` pairs of a slice of the log.
+
+        The log is only downloaded to build its index, the first time it's
+        requested or when some of its blocks were culled from the cache.
+        """
+        index = LogIndex.get(url)
+        lines = index.get_lines(start_line, end_line) if index else None
+        if lines is None:
+            with closing(self.get_log_handle(url)) as handle:
+                index = LogIndex.build(url, iter_gzip_lines(handle))
+            lines = index.get_lines(start_line, end_line) or []
+        return lines
+
     @with_jobs
     def list(self, request, project, jm):
         """
@@ -42,9 +145,6 @@ class LogSliceView(viewsets.ViewSet):
         log_name = request.QUERY_PARAMS.get("name", "buildbot_text")
         format = 'json' if log_name == 'mozlog_json' else 'text'
 
-        handle = None
-        gz_file = None
-
         start_line = request.QUERY_PARAMS.get("start_line")
         end_line = request.QUERY_PARAMS.get("end_line")
         if not start_line or not end_line:
@@ -68,34 +168,12 @@ class LogSliceView(viewsets.ViewSet):
         except StopIteration:
             raise ResourceNotFoundException("job_artifact {0} not found".format(job_id))
 
-        try:
-            url = log.get("url")
-            gz_file = filesystem.get(url)
+        lines = []
 
-            if not gz_file:
-                handle = self.get_log_handle(url)
-                gz_file = gzip.GzipFile(fileobj=BytesIO(handle.read()))
-                filesystem.set(url, gz_file.fileobj)
+        for i, line in self.get_log_lines(log.get("url"), start_line, end_line):
+            if format == 'json':
+                lines.append({"data": json.loads(line), "index": i})
             else:
-                gz_file = gzip.GzipFile(fileobj=gz_file)
-
-            lines = []
-
-            for i, line in enumerate(gz_file):
-                if i < start_line:
-                    continue
-                elif i >= end_line:
-                    break
-
-                if format == 'json':
-                    lines.append({"data": json.loads(line), "index": i})
-                else:
-                    lines.append({"text": line, "index": i})
-
-            return Response(lines)
+                lines.append({"text": line, "index": i})
 
-        finally:
-            if handle:
-                handle.close()
-            if gz_file:
-                gz_file.close()
+        return Response(lines)
@@ -36,14 +36,20 @@ class PerformanceDataViewSet(viewsets.ViewSet):
         """
         GET method implementation for listing signatures
 
-        Input: time interval
-        Output: all series signatures and their properties
+        Input: time interval, and optionally the ETag of a previous summary
+        Output: all series signatures and their properties, or only the
+        ones which changed since the previous summary
         """
         try:
             interval = int(request.QUERY_PARAMS.get('interval'))
         except:
             return Response("incorrect parameters", 400)
 
+        since = request.QUERY_PARAMS.get('since')
+        if since:
+            return Response(
+                jm.get_performance_series_summary_changes(interval, since))
+
         summary = jm.get_performance_series_summary(interval)
 
         return Response(summary)
@@ -5,6 +5,7 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import list_route
 from rest_framework_extensions.mixins import CacheResponseAndETAGMixin
 
 from django.contrib.auth.models import User
@@ -72,6 +73,19 @@ class BugscacheViewSet(viewsets.ReadOnlyModelViewSet):
         with RefDataManager() as rdm:
             return Response(rdm.get_bug_suggestions(search_term))
 
+    @list_route()
+    def batch(self, request):
+        """
+        Retrieves the bug suggestions of several search terms at once
+        search -- Mandatory term of search, repeated for each search term
+        """
+        search_terms = request.QUERY_PARAMS.getlist("search")
+        if not search_terms:
+            return Response({"message": "the 'search' parameter is mandatory"}, status=400)
+
+        with RefDataManager() as rdm:
+            return Response(rdm.get_bug_suggestions_for_terms(search_terms))
+
 
 class MachineViewSet(viewsets.ReadOnlyModelViewSet):
 
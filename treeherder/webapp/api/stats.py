@@ -0,0 +1,29 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, you can obtain one at http://mozilla.org/MPL/2.0/.
+
+from django.http import HttpResponse
+import simplejson as json
+
+from treeherder.model.models import Datasource
+
+
+def log_artifact_cache_stats(request):
+    """Return the hit/miss counters of the parsed log artifact cache."""
+    # importing here to avoid an import loop
+    from treeherder.log_parser.utils import get_log_artifact_cache_stats
+    return HttpResponse(
+        content=json.dumps(get_log_artifact_cache_stats()),
+        content_type='application/json'
+    )
+
+
+def objectstore_loader_stats(request):
+    """Return the batches/sec and lag of the last loader run of each project."""
+    # importing here to avoid an import loop
+    from treeherder.model.objectstore_loader import get_objectstore_loader_stats
+    projects = Datasource.objects.values_list('project', flat=True).distinct()
+    return HttpResponse(
+        content=json.dumps(get_objectstore_loader_stats(projects)),
+        content_type='application/json'
+    )
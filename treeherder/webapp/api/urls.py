@@ -6,7 +6,7 @@ from django.conf.urls import patterns, include, url
 from treeherder.webapp.api import (refdata, objectstore, jobs, resultset,
                                    artifact, note, revision, bug, logslice,
                                    performance_data, job_log_url,
-                                   performance_artifact, projects)
+                                   performance_artifact, projects, stats)
 
 from rest_framework import routers
 
@@ -108,6 +108,10 @@ urlpatterns = patterns(
         include(project_bound_router.urls)),
     url(r'^project/(?P<project>[\w-]{0,50})/?$',
         projects.project_info, name='project_info'),
+    url(r'^stats/log-artifact-cache/$',
+        stats.log_artifact_cache_stats, name='log_artifact_cache_stats'),
+    url(r'^stats/objectstore-loader/$',
+        stats.objectstore_loader_stats, name='objectstore_loader_stats'),
     url(r'^',
         include(default_router.urls)),
 )
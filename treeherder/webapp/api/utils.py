@@ -11,6 +11,7 @@ import simplejson as json
 import oauth2 as oauth
 from django.conf import settings
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
 from treeherder.model.derived import JobsModel
 from treeherder.etl.oauth_utils import OAuthCredentials
@@ -211,6 +212,53 @@ def get_option(obj, option_collections):
         return None
 
 
+def dictionary_encode(values):
+    """
+    Return the distinct ``values``, in order of appearance, and the index
+    of each value in them.
+    """
+    dictionary = []
+    indexes = {}
+    encoded = []
+    for value in values:
+        index = indexes.get(value)
+        if index is None:
+            index = indexes[value] = len(dictionary)
+            dictionary.append(value)
+        encoded.append(index)
+    return dictionary, encoded
+
+
+def iter_columnar_json(body, rows, dictionary_columns=()):
+    """
+    Yield the json of ``body`` with ``rows``, a list of dicts with the same
+    keys, added one column at a time.
+
+    The response has the names of the columns in ``job_property_names``
+    and an array of values per column in ``columns``.  The columns named
+    in ``dictionary_columns`` hold indexes into their distinct values,
+    found in ``dictionaries``.
+    """
+    # encoded like the other responses, which have datetimes
+    encode = JSONEncoder().encode
+    names = rows[0].keys() if rows else []
+    body = dict(body, job_property_names=names)
+    # the body is closed once the columns are written
+    yield encode(body)[:-1]
+
+    dictionaries = {}
+    yield ', "columns": {'
+    for i, name in enumerate(names):
+        values = [row[name] for row in rows]
+        if name in dictionary_columns:
+            dictionaries[name], values = dictionary_encode(values)
+        yield "{0}{1}: {2}".format(", " if i else "", encode(name),
+                                   encode(values))
+    yield '}, "dictionaries": '
+    yield encode(dictionaries)
+    yield '}'
+
+
 def to_timestamp(datestr):
     """get a timestamp from a datestr like 2014-03-31"""
     return time.mktime(datetime.datetime.strptime(
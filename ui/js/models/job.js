@@ -43,16 +43,28 @@ treeherder.factory('ThJobModel', [
             then(function(response) {
                 var item_list;
                 var next_pages_jobs = [];
-                // if the number of elements returned equals the page size, fetch the next pages
-                if(fetch_all && (response.data.results.length == response.data.meta.count)){
-                    var current_offset = parseInt(response.data.meta.offset);
-                    var page_size = parseInt(response.data.meta.count);
-                    var new_options = angular.copy(options);
-                    new_options.offset = page_size + current_offset;
-                    new_options.count = page_size;
-                    next_pages_jobs = ThJobModel.get_list(repoName, new_options, config);
-                }
-                if(_.has(response.data, 'job_property_names')){
+                if(_.has(response.data, 'columns')){
+                    // the results came as a list of values per field,
+                    // some of them indexes into the field's dictionary
+                    var names = response.data.job_property_names;
+                    var columns = _.map(names, function(name){
+                        var column = response.data.columns[name];
+                        var dictionary = response.data.dictionaries[name];
+                        if(dictionary){
+                            column = _.map(column, function(index){
+                                return dictionary[index];
+                            });
+                        }
+                        return column;
+                    });
+                    var num_jobs = names.length ? columns[0].length : 0;
+                    item_list = _.map(_.range(num_jobs), function(i){
+                        var job_obj = _.object(names, _.map(columns, function(column){
+                            return column[i];
+                        }));
+                        return new ThJobModel(job_obj);
+                    });
+                }else if(_.has(response.data, 'job_property_names')){
                     // the results came as list of fields
                     //we need to convert them to objects
                     item_list = _.map(response.data.results, function(elem){
@@ -64,6 +76,15 @@ treeherder.factory('ThJobModel', [
                         return new ThJobModel(job_obj);
                     });
                 }
+                // if the number of elements returned equals the page size, fetch the next pages
+                if(fetch_all && (item_list.length == response.data.meta.count)){
+                    var current_offset = parseInt(response.data.meta.offset);
+                    var page_size = parseInt(response.data.meta.count);
+                    var new_options = angular.copy(options);
+                    new_options.offset = page_size + current_offset;
+                    new_options.count = page_size;
+                    next_pages_jobs = ThJobModel.get_list(repoName, new_options, config);
+                }
                 // next_pages_jobs is wrapped in a $q.when call because it could be
                 // either a promise or a value
                 return $q.when(next_pages_jobs).then(function(maybe_job_list){
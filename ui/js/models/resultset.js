@@ -125,7 +125,7 @@ treeherder.factory('ThResultSetModel', ['$rootScope', '$http', '$location', '$q'
                 result_set_id__in: resultSetIdList.join(","),
                 count: 2000,
                 last_modified__gt: lastModified,
-                return_type: "list"
+                return_type: "columns"
             };
             if(exclusionProfile){
                 params.exclusion_profile = exclusionProfile;
@@ -139,7 +139,7 @@ treeherder.factory('ThResultSetModel', ['$rootScope', '$http', '$location', '$q'
                 resultSets.results,
                 function(rs, index){
                     var params = {
-                        return_type: "list",
+                        return_type: "columns",
                         result_set_id:rs.id,
                         count: 2000
                     };